@@ -0,0 +1,42 @@
+# apis/metrics.py
+import ipaddress
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from env import env
+from utils.metrics import metrics
+
+# /metrics 접근 허용 네트워크(쉼표 구분 IP/CIDR, 기본: 로컬 루프백만). 비우면 엔드포인트 비활성(항상 404)
+# 대기열 깊이/캐시 크기/모델 버전/단계별 지연 등 내부 정보가 노출되므로 외부 공개 경로에서 접근할 수 없게 둔다.
+# 리버스 프록시 뒤라면 프록시 주소가 아니라 내부 수집기 주소만 허용해야 한다(프록시 경유 요청은 모두 프록시 주소로 보임)
+METRICS_ALLOWED_NETWORKS = tuple(
+    ipaddress.ip_network(part.strip(), strict=False)
+    for part in env.get("METRICS_ALLOWED_NETWORKS", "127.0.0.1/32,::1/128").split(",")
+    if part.strip()
+)
+
+
+def metrics_access(request: Request) -> None:
+    """Dependency: 허용 네트워크 밖의 요청은 엔드포인트가 없는 것처럼 404"""
+    host = request.client.host if request.client else None
+    try:
+        addr = ipaddress.ip_address(host) if host else None
+    except ValueError:
+        addr = None
+    if addr is None or not any(addr in network for network in METRICS_ALLOWED_NETWORKS):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    dependencies=[Depends(metrics_access)],
+)
+
+
+@router.get(
+    "",  # GET /metrics
+    summary="Process-local metrics snapshot (METRICS_ALLOWED_NETWORKS only)",
+)
+async def get_metrics() -> dict[str, dict]:
+    return metrics.snapshot()
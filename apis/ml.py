@@ -1,8 +1,29 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from typing import List, Optional
 
-from auth.auth_bearer import JWTBearer
-from services.ml import MLService, get_ml_service
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile, HTTPException
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.auth_bearer import jwt_bearer
+from db_shard import get_user_db_session
+from error.exceptions import AppError
+from schemas.image import ImagePage
+from services.ml import (
+    MLService,
+    get_ml_service,
+    ML_BATCH_UPLOAD_MAX_BYTES,
+    ML_IMAGE_CACHE_CONTROL,
+    ML_IMAGE_PAGE_MAX_LIMIT,
+    ML_SERVER_TIMING,
+    ML_UPLOAD_MAX_BYTES,
+)
+from utils.etag import if_none_match, not_modified, not_modified_since
+from utils.timing import StageTimer
+from utils.upload import body_limit_route
+
+# multipart 경계/헤더 등 파일 외 본문 여유분
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
 
 
 # 메인 라우터: 전역 JWT 인증 적용
@@ -10,34 +31,118 @@ router = APIRouter(
     prefix="/ml",
     tags=["ml"],
     responses={404: {"description": "Not found"}},
-    dependencies=[Depends(JWTBearer())],
+    dependencies=[Depends(jwt_bearer)],
+    # 업로드 본문이 한도를 넘으면 파싱 도중 413으로 중단
+    route_class=body_limit_route(
+        ML_UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD_BYTES, reported_max_bytes=ML_UPLOAD_MAX_BYTES),
+)
+
+# 배치 예측 라우터: 본문 한도만 다름(ML_BATCH_UPLOAD_MAX_BYTES)
+batch_router = APIRouter(
+    prefix="/ml",
+    tags=["ml"],
+    dependencies=[Depends(jwt_bearer)],
+    route_class=body_limit_route(
+        ML_BATCH_UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD_BYTES, reported_max_bytes=ML_BATCH_UPLOAD_MAX_BYTES),
 )
 
 
 @router.post(
     "/predict",
     summary="이미지 업로드 후 예측 결과 반환",
+    responses={
+        413: {"description": "업로드 크기 초과(ML_UPLOAD_MAX_BYTES)"},
+        415: {"description": "허용되지 않은 이미지 형식"},
+    },
 )
 async def predict(
     image: UploadFile = File(...),
-    user_id: str = Depends(JWTBearer()),
+    user_id: str = Depends(jwt_bearer),
     svc: MLService = Depends(get_ml_service),
+    db: AsyncSession = Depends(get_user_db_session),
 ):
+    timings = StageTimer("ml_predict")
     try:
-        result = await svc.predict(image, user_id=user_id)
-        return JSONResponse(result)
+        result = await svc.predict(image, user_id=user_id, db=db, timings=timings)
+        with timings.span("serialize"):
+            response = JSONResponse(result)
+        # 단계별 시간: /metrics의 ml_predict_{stage}_seconds 히스토그램 + Server-Timing 헤더
+        server_timing = timings.finish()
+        if ML_SERVER_TIMING:
+            response.headers["Server-Timing"] = server_timing
+        return response
+    except AppError:
+        # 413/415 등 도메인 오류는 공통 핸들러에서 상태코드로 변환
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
 
 
 @router.get(
     "/myImg/{img_url}",
-    summary="저장한 이미지 반환",
+    summary="저장한 이미지 반환(ETag/Last-Modified 조건부 요청, Range 지원)",
+    responses={
+        206: {"description": "Range 요청의 부분 응답"},
+        304: {"description": "Not modified"},
+        416: {"description": "Range not satisfiable"},
+    },
 )
 async def my_img(
+    request: Request,
     img_url: str,
-    user_id: str = Depends(JWTBearer()),
+    size: Optional[int] = Query(
+        None, ge=1, le=4096, description="썸네일 긴 변 크기(px). ML_THUMBNAIL_SIZES 중 이 값 이상인 가장 작은 크기로 맞춤"),
+    user_id: str = Depends(jwt_bearer),
+    svc: MLService = Depends(get_ml_service),
+    db: AsyncSession = Depends(get_user_db_session),
+):
+    image = await svc.get_my_image(img_url, user_id=user_id, db=db, size=size)
+    headers = {"ETag": image.etag, "Cache-Control": ML_IMAGE_CACHE_CONTROL}
+    if if_none_match(request, image.etag) or not_modified_since(request, image.stat.st_mtime):
+        return not_modified(image.etag, {"Cache-Control": ML_IMAGE_CACHE_CONTROL})
+    # Range/If-Range 처리와 Last-Modified는 FileResponse가 담당(ETag는 위에서 지정한 값을 사용)
+    return FileResponse(image.path, media_type=image.media_type, headers=headers, stat_result=image.stat)
+
+
+@router.get(
+    "/images",
+    response_model=ImagePage,
+    summary="내가 업로드한 이미지 목록(id 순, keyset 페이지)",
+)
+async def list_images(
+    limit: int = Query(100, ge=1, le=ML_IMAGE_PAGE_MAX_LIMIT, description="페이지 크기"),
+    after: Optional[int] = Query(None, ge=0, description="keyset cursor: 이 id 이후의 이미지부터 조회"),
+    user_id: str = Depends(jwt_bearer),
+    svc: MLService = Depends(get_ml_service),
+    db: AsyncSession = Depends(get_user_db_session),
+):
+    items, next_after = await svc.list_images(user_id=user_id, db=db, limit=limit, after=after)
+    return ImagePage(items=items, next_after=next_after)
+
+
+@router.get(
+    "/model",
+    summary="현재 서비스 중인 모델 정보(버전, 로딩/워밍업 시간, 리로드 횟수)",
+)
+async def model_info(svc: MLService = Depends(get_ml_service)):
+    return svc.models.info()
+
+
+@batch_router.post(
+    "/predict/batch",
+    summary="이미지 여러 개 또는 zip 하나를 한 번에 예측(NDJSON 스트리밍, 입력 순서)",
+    responses={
+        200: {"content": {"application/x-ndjson": {}},
+              "description": '한 줄에 하나: {"index", "filename", "content_hash", "predict", "cached"} '
+                             '또는 {"index", "filename", "error"}'},
+        400: {"description": "손상된 zip"},
+        413: {"description": "본문 크기(ML_BATCH_UPLOAD_MAX_BYTES) 또는 이미지 수(ML_BATCH_MAX_FILES) 초과"},
+    },
+)
+async def predict_batch(
+    images: List[UploadFile] = File(..., description="이미지 파일 여러 개 또는 이미지가 담긴 zip 하나"),
+    user_id: str = Depends(jwt_bearer),
     svc: MLService = Depends(get_ml_service),
 ):
-    img_path = svc.get_my_image_path(img_url, user_id=user_id)
-    return FileResponse(img_path, media_type="image/png")
+    batch = await svc.prepare_batch(images)
+    return StreamingResponse(svc.stream_batch(batch, user_id=user_id), media_type="application/x-ndjson")
@@ -1,16 +1,37 @@
 # apis/todo.py
-from fastapi import APIRouter, Response, status, Depends, Request
-from db import get_db_session
-from schemas.todo import Todo, CreateTodoInput, UpdateTodoInput
+from typing import AsyncIterator, Literal, Optional
+from fastapi import APIRouter, Response, status, Depends, Request, Query
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from db_shard import get_user_db_session
+from schemas.todo import (
+    Todo,
+    CreateTodoInput,
+    UpdateTodoInput,
+    BatchCreateTodoInput,
+    BatchUpdateTodoInput,
+    BatchDeleteTodoInput,
+    TodoBatchItemResult,
+    TodoBatchResult,
+)
+from error.exceptions import TodoNotFoundError
 from services.todo import TodoService, get_todo_service
-from auth.auth_bearer import JWTBearer
-from sqlalchemy.orm import Session
+from auth.auth_bearer import jwt_bearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from env import env
+from utils.etag import todo_etag, todo_list_etag, if_none_match, if_match_versions, not_modified
+
+# 페이지 크기 상한
+TODO_PAGE_MAX_LIMIT = env.get_int("TODO_PAGE_MAX_LIMIT", 1000)
+
+# 목록 응답 직렬화용(서비스에서 이미 검증된 Todo를 response_model로 다시 검증하지 않고 바로 JSON으로 변환)
+_todo_list_adapter = TypeAdapter(list[Todo])
 
 router = APIRouter(
     prefix="/todos",
     tags=["todos"],
     responses={404: {"description": "Not found"}},
-    dependencies=[Depends(JWTBearer())]
+    dependencies=[Depends(jwt_bearer)]
 )
 
 
@@ -21,45 +42,185 @@ router = APIRouter(
     response_model_exclude_none=True,
     summary="Create a new todo",
 )
-def create_todo(
+async def create_todo(
     payload: CreateTodoInput,
+    response: Response,
     svc: TodoService = Depends(get_todo_service),
-    user_id: str = Depends(JWTBearer()),
-    db: Session = Depends(get_db_session),
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
 ) -> Todo:
-    todo_out = svc.create_todo(
+    todo_out = await svc.create_todo(
         payload, user_id=int(user_id), db=db
     )
+    response.headers["ETag"] = todo_etag(todo_out.id, todo_out.version)
     return todo_out
 
 
+@router.post(
+    "/batch",  # POST /todos/batch
+    response_model=TodoBatchResult,
+    status_code=status.HTTP_201_CREATED,
+    response_model_exclude_none=True,
+    summary="Create many todos in one transaction",
+)
+async def create_todos(
+    payload: BatchCreateTodoInput,
+    svc: TodoService = Depends(get_todo_service),
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
+) -> TodoBatchResult:
+    todos = await svc.create_todos(payload.items, user_id=int(user_id), db=db)
+    return TodoBatchResult(results=[
+        TodoBatchItemResult(index=i, id=todo.id, status=status.HTTP_201_CREATED, todo=todo)
+        for i, todo in enumerate(todos)
+    ])
+
+
+@router.patch(
+    "/batch",  # PATCH /todos/batch
+    response_model=TodoBatchResult,
+    response_model_exclude_none=True,
+    summary="Partially update many todos in one transaction",
+)
+async def update_todos(
+    payload: BatchUpdateTodoInput,
+    svc: TodoService = Depends(get_todo_service),
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
+) -> TodoBatchResult:
+    todos = await svc.update_todos(payload.items, user_id=int(user_id), db=db)
+    return TodoBatchResult(results=[
+        TodoBatchItemResult(index=i, id=item.id, status=status.HTTP_200_OK, todo=todo)
+        if todo is not None else
+        TodoBatchItemResult(index=i, id=item.id, status=status.HTTP_404_NOT_FOUND,
+                            code=TodoNotFoundError.code)
+        for i, (item, todo) in enumerate(zip(payload.items, todos))
+    ])
+
+
+@router.delete(
+    "/batch",  # DELETE /todos/batch
+    response_model=TodoBatchResult,
+    response_model_exclude_none=True,
+    summary="Delete many todos in one transaction",
+)
+async def delete_todos(
+    payload: BatchDeleteTodoInput,
+    svc: TodoService = Depends(get_todo_service),
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
+) -> TodoBatchResult:
+    deleted = await svc.delete_todos(payload.ids, user_id=int(user_id), db=db)
+    return TodoBatchResult(results=[
+        TodoBatchItemResult(index=i, id=todo_id, status=status.HTTP_204_NO_CONTENT)
+        if ok else
+        TodoBatchItemResult(index=i, id=todo_id, status=status.HTTP_404_NOT_FOUND,
+                            code=TodoNotFoundError.code)
+        for i, (todo_id, ok) in enumerate(zip(payload.ids, deleted))
+    ])
+
+
 @router.get(
     "/all",  # GET /todos/all
     response_model=list[Todo],
     response_model_exclude_none=True,
     summary="Get all todos",
+    responses={200: {"content": {"application/x-ndjson": {}}}, 304: {"description": "Not modified"}},
 )
-def get_all_todos(
+async def get_all_todos(
+    request: Request,
+    limit: Optional[int] = Query(
+        None, ge=1, le=TODO_PAGE_MAX_LIMIT, description="페이지 크기(미지정 시 전체)"),
+    after: Optional[int] = Query(
+        None, ge=0, description="keyset cursor: 이 id 이후의 todo부터 조회"),
+    fmt: Literal["json", "ndjson"] = Query(
+        "json", alias="format", description="ndjson: 한 줄에 todo 하나씩 스트리밍"),
     svc: TodoService = Depends(get_todo_service),
-    user_id: str = Depends(JWTBearer()),
-    db: Session = Depends(get_db_session),
-) -> list[Todo]:
-    return svc.get_all_todos(user_id=int(user_id), db=db)
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
+) -> Response:
+    if fmt == "ndjson":
+        return StreamingResponse(
+            _ndjson(svc.stream_todos(user_id=int(user_id), after=after)),
+            media_type="application/x-ndjson",
+        )
+
+    # 목록 ETag: 소유자의 todo 리비전. 페이지 조회 전에 읽어 두어 ETag가 본문보다 새로울 수 없도록 함
+    etag = todo_list_etag(int(user_id), await svc.get_todos_version(user_id=int(user_id), db=db))
+    if if_none_match(request, etag):
+        return not_modified(etag)
+
+    todos, next_cursor = await svc.get_todo_page(
+        user_id=int(user_id), db=db, limit=limit, after=after)
+    headers = {"ETag": etag}
+    if next_cursor is not None:
+        # 다음 페이지 정보는 본문(list[Todo]) 형식을 유지하기 위해 헤더로 전달
+        headers["X-Next-Cursor"] = str(next_cursor)
+        next_url = request.url.include_query_params(after=next_cursor)
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return Response(
+        content=_todo_list_adapter.dump_json(todos, exclude_none=True),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@router.get(
+    "/search",  # GET /todos/search?q=
+    response_model=list[Todo],
+    response_model_exclude_none=True,
+    summary="Full-text search over my todos (bm25 ranked)",
+)
+async def search_todos(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200,
+                   description="검색어(공백으로 구분된 단어를 모두 포함, 'abc*' 는 접두 검색)"),
+    limit: int = Query(20, ge=1, le=TODO_PAGE_MAX_LIMIT, description="페이지 크기"),
+    offset: int = Query(0, ge=0, description="건너뛸 결과 수"),
+    svc: TodoService = Depends(get_todo_service),
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
+) -> Response:
+    todos, next_offset = await svc.search_todos(
+        q, user_id=int(user_id), db=db, limit=limit, offset=offset)
+    headers = {}
+    if next_offset is not None:
+        headers["X-Next-Offset"] = str(next_offset)
+        next_url = request.url.include_query_params(offset=next_offset)
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return Response(
+        content=_todo_list_adapter.dump_json(todos, exclude_none=True),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+async def _ndjson(todos: AsyncIterator[Todo]) -> AsyncIterator[bytes]:
+    async for todo in todos:
+        yield todo.model_dump_json(exclude_none=True).encode() + b"\n"
 
 
 @router.get(
     "/{todo_id}",  # GET /todos/{todo_id}
     response_model=Todo,
     response_model_exclude_none=True,
-    summary="Get a todo by ID"
+    summary="Get a todo by ID",
+    responses={304: {"description": "Not modified"}},
 )
-def get_todo(
+async def get_todo(
     todo_id: int,
+    request: Request,
+    response: Response,
     svc: TodoService = Depends(get_todo_service),
-    user_id: str = Depends(JWTBearer()),
-    db: Session = Depends(get_db_session),
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
 ) -> Todo:
-    todo = svc.get_todo(todo_id, user_id=int(user_id), db=db)
+    todo = await svc.get_todo(todo_id, user_id=int(user_id), db=db)
+    etag = todo_etag(todo.id, todo.version)
+    if if_none_match(request, etag):
+        # 본문 직렬화 없이 304
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return todo
 
 
@@ -68,18 +229,22 @@ def get_todo(
     response_model=Todo,
     response_model_exclude_none=True,
     summary="Partially update a todo by ID",
+    responses={412: {"description": "If-Match does not match the current version"}},
 )
-def update_todo(
+async def update_todo(
     todo_id: int,
     payload: UpdateTodoInput,
+    request: Request,
     response: Response,
     svc: TodoService = Depends(get_todo_service),
-    user_id: str = Depends(JWTBearer()),
-    db: Session = Depends(get_db_session),
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
 ) -> Todo:
-    todo = svc.update_todo(todo_id, payload, user_id=int(user_id), db=db)
-    # 간단한 Weak ETag 재설정
-    response.headers["ETag"] = f'W/"todo-{todo.id}-0"'
+    todo = await svc.update_todo(
+        todo_id, payload, user_id=int(user_id), db=db,
+        expected_versions=if_match_versions(request, f"todo-{todo_id}"),
+    )
+    response.headers["ETag"] = todo_etag(todo.id, todo.version)
     return todo
 
 
@@ -87,12 +252,17 @@ def update_todo(
     "/{todo_id}",  # DELETE /todos/{todo_id}
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Delete a todo by ID",
+    responses={412: {"description": "If-Match does not match the current version"}},
 )
-def delete_todo(
+async def delete_todo(
     todo_id: int,
+    request: Request,
     svc: TodoService = Depends(get_todo_service),
-    user_id: str = Depends(JWTBearer()),
-    db: Session = Depends(get_db_session),
+    user_id: str = Depends(jwt_bearer),
+    db: AsyncSession = Depends(get_user_db_session),
 ) -> None:
-    svc.delete_todo(todo_id, user_id=int(user_id), db=db)
+    await svc.delete_todo(
+        todo_id, user_id=int(user_id), db=db,
+        expected_versions=if_match_versions(request, f"todo-{todo_id}"),
+    )
     return None
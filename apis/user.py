@@ -1,12 +1,26 @@
 # apis/user.py
-from fastapi import APIRouter, Response, status, HTTPException, Depends, Request
-from schemas.user import UserOut, CreateUserInput, UpdateUserInput, LoginUserInput, UserWithTokenOutput
+from typing import Optional
+from fastapi import APIRouter, Response, status, HTTPException, Depends, Request, Query
+from schemas.user import UserOut, CreateUserInput, UpdateUserInput, LoginUserInput, UserWithTokenOutput, TodoIdPage
 from services.user import UserService, get_user_service
 from utils.converters import remove_password
-from auth.auth_bearer import JWTBearer
+from auth.auth_bearer import jwt_bearer
 from auth.auth_handler import signJWT
-from sqlalchemy.orm import Session
-from db import get_db_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from db_shard import get_user_db_session, get_login_db_session, get_signup_db_session
+from utils.etag import user_etag, if_match_versions
+from env import env
+
+# todo id 페이지 크기 상한(/todos 목록과 같은 설정 사용)
+TODO_PAGE_MAX_LIMIT = env.get_int("TODO_PAGE_MAX_LIMIT", 1000)
+
+
+def include_todo_ids(
+    include: Optional[str] = Query(
+        None, description="쉼표로 구분한 추가 필드. `todo_ids`: 응답에 todo_id_list 포함"),
+) -> bool:
+    """Dependency: include=todo_ids 요청 여부(기본은 todo id 목록을 조회하지 않음)"""
+    return include is not None and "todo_ids" in {part.strip() for part in include.split(",")}
 
 router = APIRouter(
     prefix="/users",
@@ -22,14 +36,15 @@ router = APIRouter(
     response_model_exclude_none=True,
     summary="Create a new user",
 )
-def create_user(
+async def create_user(
     payload: CreateUserInput,
     response: Response,
     request: Request,
     svc: UserService = Depends(get_user_service),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_signup_db_session),
 ) -> UserOut:
-    user = svc.create_user(payload, db=db)
+    user = await svc.create_user(payload, db=db)
+    response.headers["ETag"] = user_etag(user.id, user.version)
     return remove_password(user)
 
 
@@ -38,30 +53,49 @@ def create_user(
     response_model=UserWithTokenOutput,
     response_model_exclude_none=True,
     summary="Get the current user",
-    dependencies=[Depends(JWTBearer())]
+    dependencies=[Depends(jwt_bearer)]
 )
-def get_user(
-    user_id: str = Depends(JWTBearer()),
+async def get_user(
+    user_id: str = Depends(jwt_bearer),
+    with_todo_ids: bool = Depends(include_todo_ids),
     svc: UserService = Depends(get_user_service),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_user_db_session),
 ) -> UserWithTokenOutput:
-    user = svc.get_user(int(user_id), db=db)
+    user = await svc.get_user(int(user_id), db=db, with_todo_ids=with_todo_ids)
     access_token = signJWT(user.id)
     return UserWithTokenOutput(user=remove_password(user), access_token=access_token)
 
 
+@router.get(
+    "/me/todo-ids",
+    response_model=TodoIdPage,
+    summary="List the current user's todo ids (keyset pagination)",
+    dependencies=[Depends(jwt_bearer)]
+)
+async def list_todo_ids(
+    after: Optional[int] = Query(None, description="이전 페이지의 next_after 값"),
+    limit: int = Query(100, ge=1, le=TODO_PAGE_MAX_LIMIT),
+    user_id: str = Depends(jwt_bearer),
+    svc: UserService = Depends(get_user_service),
+    db: AsyncSession = Depends(get_user_db_session),
+) -> TodoIdPage:
+    ids, next_after = await svc.list_todo_ids(int(user_id), db=db, after=after, limit=limit)
+    return TodoIdPage(ids=ids, next_after=next_after)
+
+
 @router.post(
     "/login",
     response_model=UserWithTokenOutput,
     response_model_exclude_none=True,
     summary="Login a user",
 )
-def login_user(
+async def login_user(
     payload: LoginUserInput,
+    with_todo_ids: bool = Depends(include_todo_ids),
     svc: UserService = Depends(get_user_service),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_login_db_session),
 ) -> UserWithTokenOutput:
-    user = svc.login_user(payload, db=db)
+    user = await svc.login_user(payload, db=db, with_todo_ids=with_todo_ids)
     access_token = signJWT(user.id)
     return UserWithTokenOutput(user=remove_password(user), access_token=access_token)
 
@@ -71,17 +105,24 @@ def login_user(
     response_model=UserOut,
     response_model_exclude_none=True,
     summary="Partially update a user by ID",
-    dependencies=[Depends(JWTBearer())]
+    dependencies=[Depends(jwt_bearer)],
+    responses={412: {"description": "If-Match does not match the current version"}},
 )
-def update_user(
+async def update_user(
     payload: UpdateUserInput,
+    request: Request,
     response: Response,
-    user_id: str = Depends(JWTBearer()),
+    user_id: str = Depends(jwt_bearer),
+    with_todo_ids: bool = Depends(include_todo_ids),
     svc: UserService = Depends(get_user_service),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_user_db_session),
 ) -> UserOut:
-    user = svc.update_user(int(user_id), payload, db=db)
-    response.headers["ETag"] = f'W/"user-{user.id}-0"'
+    user = await svc.update_user(
+        int(user_id), payload, db=db,
+        expected_versions=if_match_versions(request, f"user-{user_id}"),
+        with_todo_ids=with_todo_ids,
+    )
+    response.headers["ETag"] = user_etag(user.id, user.version)
     return remove_password(user)
 
 
@@ -89,12 +130,17 @@ def update_user(
     "",
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Delete the current user",
-    dependencies=[Depends(JWTBearer())]
+    dependencies=[Depends(jwt_bearer)],
+    responses={412: {"description": "If-Match does not match the current version"}},
 )
-def delete_user(
-    user_id: str = Depends(JWTBearer()),
+async def delete_user(
+    request: Request,
+    user_id: str = Depends(jwt_bearer),
     svc: UserService = Depends(get_user_service),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_user_db_session),
 ) -> None:
-    svc.delete_user(int(user_id), db=db)
+    await svc.delete_user(
+        int(user_id), db=db,
+        expected_versions=if_match_versions(request, f"user-{user_id}"),
+    )
     return None
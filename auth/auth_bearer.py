@@ -1,7 +1,7 @@
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from .auth_handler import decodeJWT
+from .auth_handler import verifyJWT
 
 
 class JWTBearer(HTTPBearer):
@@ -33,6 +33,11 @@ class JWTBearer(HTTPBearer):
 
     def verify_jwt(self, jwtoken: str) -> bool:
         try:
-            return decodeJWT(jwtoken)
+            return verifyJWT(jwtoken)
         except:
             return None
+
+
+# 공용 인스턴스: FastAPI는 같은 callable 의존성을 요청당 한 번만 실행하므로
+# 라우터 dependencies와 엔드포인트 파라미터 모두 이 인스턴스를 사용해야 토큰 검증이 한 번으로 끝난다
+jwt_bearer = JWTBearer()
@@ -1,7 +1,16 @@
+import hashlib
+import threading
 import time
+from collections import OrderedDict
+from typing import Optional
+
 import jwt
 
 from env import env
+from utils.metrics import metrics
+
+# 검증된 토큰 캐시 크기(0: 비활성). 토큰 원문 대신 다이제스트를 키로 보관
+JWT_CACHE_SIZE = env.get_int("JWT_CACHE_SIZE", 10000)
 
 
 def signJWT(user_id: str) -> str:
@@ -22,3 +31,69 @@ def decodeJWT(token: str) -> dict:
         return decoded_token if decoded_token["expires"] >= time.time() else None
     except:
         return {}
+
+
+class VerifiedTokenCache:
+    """
+    서명 검증을 통과한 토큰의 payload를 보관하는 LRU.
+    같은 토큰으로 반복 요청할 때 HMAC 검증/디코딩을 생략하고, 조회 시마다 expires를 다시 확인한다.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = metrics.counter("auth_token_cache_hits_total", "검증된 토큰 캐시 적중 수")
+        self._misses = metrics.counter("auth_token_cache_misses_total", "토큰 서명 검증 수행 수")
+        metrics.gauge("auth_token_cache_size", "검증된 토큰 캐시 항목 수", getter=lambda: len(self._entries))
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                return None
+            if payload["expires"] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        self._hits.inc()
+        return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def verify(self, token: str) -> Optional[dict]:
+        """decodeJWT와 같은 반환 규칙(만료: None, 위조/형식 오류: {})에 캐시를 더한 버전"""
+        payload = self.get(token)
+        if payload is not None:
+            return payload
+        self._misses.inc()
+        payload = decodeJWT(token)
+        # 유효한 payload만 캐시(만료/위조 토큰은 매번 검증)
+        if payload and isinstance(payload.get("expires"), (int, float)):
+            self.put(token, payload)
+        return payload
+
+
+token_cache = VerifiedTokenCache(JWT_CACHE_SIZE) if JWT_CACHE_SIZE > 0 else None
+
+
+def verifyJWT(token: str) -> Optional[dict]:
+    """요청 인증용: 캐시가 켜져 있으면 검증된 토큰 캐시를 거쳐 decodeJWT"""
+    if token_cache is None:
+        return decodeJWT(token)
+    return token_cache.verify(token)
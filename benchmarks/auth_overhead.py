@@ -0,0 +1,153 @@
+# benchmarks/auth_overhead.py
+"""
+요청당 JWT 인증 비용 측정(변경 전/후 비교).
+
+1) 함수 단위: decodeJWT(매번 HMAC 검증) vs 검증된 토큰 캐시 적중 시 1회 비용(µs)
+2) 요청 단위: 작은 FastAPI 앱을 in-process(ASGI)로 띄워 같은 토큰으로 반복 호출
+   - none:   인증 없음(기준선)
+   - before: 라우터 dependencies와 파라미터에 서로 다른 JWTBearer 인스턴스 + 캐시 없음(기존 구조)
+   - after:  공용 jwt_bearer 인스턴스 + 검증된 토큰 캐시
+   요청당 서명 검증(decodeJWT) 횟수와 기준선 대비 추가 지연(µs)을 JSON으로 출력한다.
+
+    python benchmarks/auth_overhead.py [--requests 2000] [--calls 20000] [--output result.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _bench_functions(token: str, calls: int) -> dict:
+    from auth import auth_handler
+
+    cache = auth_handler.VerifiedTokenCache(16)
+    cache.verify(token)
+
+    def per_call_us(fn) -> float:
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn(token)
+        return round((time.perf_counter() - started) / calls * 1e6, 3)
+
+    return {
+        "decodeJWT_us": per_call_us(auth_handler.decodeJWT),
+        "cache_hit_us": per_call_us(cache.verify),
+    }
+
+
+def _build_app():
+    from fastapi import APIRouter, Depends, FastAPI
+    from auth.auth_bearer import JWTBearer, jwt_bearer
+    from auth import auth_handler
+
+    class LegacyJWTBearer(JWTBearer):
+        # 변경 전 동작: 캐시 없이 매번 서명 검증
+        def verify_jwt(self, jwtoken: str):
+            try:
+                return auth_handler.decodeJWT(jwtoken)
+            except:
+                return None
+
+    app = FastAPI()
+    none = APIRouter(prefix="/none")
+    before = APIRouter(prefix="/before", dependencies=[Depends(LegacyJWTBearer())])
+    after = APIRouter(prefix="/after", dependencies=[Depends(jwt_bearer)])
+
+    @none.get("")
+    async def none_route():
+        return {"user_id": None}
+
+    @before.get("")
+    async def before_route(user_id: str = Depends(LegacyJWTBearer())):
+        return {"user_id": user_id}
+
+    @after.get("")
+    async def after_route(user_id: str = Depends(jwt_bearer)):
+        return {"user_id": user_id}
+
+    for router in (none, before, after):
+        app.include_router(router)
+    return app
+
+
+async def _bench_requests(token: str, requests: int) -> dict:
+    import httpx
+    from auth import auth_handler
+
+    # 요청당 서명 검증 횟수를 세기 위해 decodeJWT를 계수 래퍼로 교체(동작은 그대로)
+    decode = auth_handler.decodeJWT
+    decodes = 0
+
+    def counting_decode(jwtoken: str):
+        nonlocal decodes
+        decodes += 1
+        return decode(jwtoken)
+
+    auth_handler.decodeJWT = counting_decode
+    app = _build_app()
+    headers = {"Authorization": f"Bearer {token}"}
+    result: dict[str, dict] = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for label in ("none", "before", "after"):
+                for _ in range(min(50, requests)):  # 워밍업(캐시 채움 포함)
+                    (await client.get(f"/{label}", headers=headers)).raise_for_status()
+                decodes = 0
+                samples = []
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    r = await client.get(f"/{label}", headers=headers)
+                    samples.append(time.perf_counter() - started)
+                    r.raise_for_status()
+                result[label] = {
+                    "requests": requests,
+                    "decodes_per_request": round(decodes / requests, 3),
+                    "mean_us": round(statistics.fmean(samples) * 1e6, 1),
+                    "p50_us": round(statistics.median(samples) * 1e6, 1),
+                }
+    finally:
+        auth_handler.decodeJWT = decode
+
+    for label in ("before", "after"):
+        result[label]["auth_overhead_us"] = round(result[label]["mean_us"] - result["none"]["mean_us"], 1)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="시나리오별 요청 수")
+    parser.add_argument("--calls", type=int, default=20000, help="함수 단위 측정 반복 횟수")
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("JWT_SECRET", "bench-secret-" + "0" * 32)
+    os.environ.setdefault("JWT_ALGORITHM", "HS256")
+    os.environ.setdefault("JWT_EXPIRE_TIME", "3600")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    from auth.auth_handler import signJWT
+
+    token = signJWT("1")
+    result = {
+        "functions": _bench_functions(token, max(1, args.calls)),
+        "requests": asyncio.run(_bench_requests(token, max(1, args.requests))),
+    }
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/forest_engine.py
+"""
+포레스트 추론 엔진 비교: scikit-learn model.predict vs 배열 기반 FlatForest(services/forest_engine.py, ML_ENGINE=flat).
+
+1) 정확성: 임의 입력 --rows개(0..255 픽셀 범위, 전부 0/255인 경계 행 포함)에 대해 두 엔진의 predict 결과가
+   모두 같은지, predict_proba 최대 차이를 확인한다. 작은 합성 데이터로 학습한 ExtraTrees 분류기,
+   RandomForest 회귀기도 함께 확인한다. 하나라도 다르면 종료 코드 1.
+2) 성능: 배치 크기별(--batch-sizes) 호출 지연 p50/p95(ms)와 처리량(rows/s)을 측정한다.
+
+    python benchmarks/forest_engine.py [--model path | --synthetic] [--rows 2000]
+                                       [--batch-sizes 1,8,32,256] [--repeat 50] [--output result.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load_model(args: argparse.Namespace):
+    if args.synthetic:
+        import numpy as np
+        from sklearn.ensemble import RandomForestClassifier
+
+        rng = np.random.default_rng(0)
+        x = rng.integers(0, 256, (2000, 784)).astype(np.float32)
+        y = rng.integers(0, 10, 2000)
+        return RandomForestClassifier(n_estimators=100, random_state=0).fit(x, y)
+
+    from joblib import load
+
+    path = args.model or Path(os.environ.get(
+        "ML_MODEL_PATH", ROOT / "assets" / "ratron-random_forest_model.joblib"))
+    if not Path(path).exists():
+        raise SystemExit(f"model not found: {path} (use --model or --synthetic)")
+    return load(Path(path).as_posix())
+
+
+def _check(model, flat, x) -> dict:
+    import numpy as np
+
+    expected, actual = model.predict(x), flat.predict(x)
+    result = {"rows": len(x), "mismatches": int(np.sum(expected != actual))}
+    if hasattr(model, "predict_proba"):
+        result["max_proba_diff"] = float(np.max(np.abs(model.predict_proba(x) - flat.predict_proba(x))))
+    else:
+        result["max_abs_diff"] = float(np.max(np.abs(expected - actual)))
+        result["mismatches"] = int(np.sum(~np.isclose(expected, actual, rtol=0, atol=1e-9)))
+    return result
+
+
+def _extra_checks() -> dict:
+    """다른 포레스트 종류(ExtraTrees 분류기, 회귀기)도 같은 결과인지 확인"""
+    import numpy as np
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestRegressor
+    from services.forest_engine import FlatForest
+
+    rng = np.random.default_rng(2)
+    x = rng.normal(size=(300, 20)).astype(np.float32)
+    y_class, y_reg = rng.integers(0, 3, 300), x[:, 0] * 2 + rng.normal(size=300)
+    test = rng.normal(size=(500, 20)).astype(np.float32)
+    checks = {}
+    for name, model in (
+        ("extra_trees_classifier", ExtraTreesClassifier(n_estimators=20, random_state=0).fit(x, y_class)),
+        ("random_forest_regressor", RandomForestRegressor(n_estimators=20, random_state=0).fit(x, y_reg)),
+    ):
+        checks[name] = _check(model, FlatForest.from_estimator(model), test)
+    return checks
+
+
+def _latency(fn, x, repeat: int) -> dict:
+    fn(x)  # 워밍업
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(x)
+        samples.append(time.perf_counter() - started)
+    p50 = statistics.median(samples)
+    return {
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(statistics.quantiles(samples, n=20)[18] * 1000, 3),
+        "rows_per_second": round(len(x) / p50, 1),
+    }
+
+
+def _bench(args: argparse.Namespace) -> dict:
+    import numpy as np
+    from services.forest_engine import FlatForest
+
+    model = _load_model(args)
+    started = time.perf_counter()
+    flat = FlatForest.from_estimator(model)
+    result: dict = {
+        "model": type(model).__name__,
+        "trees": flat.n_trees,
+        "nodes": flat.n_nodes,
+        "max_depth": flat.max_depth,
+        "build_seconds": round(time.perf_counter() - started, 4),
+        "flat_bytes": int(flat.feature.nbytes + flat.threshold.nbytes + flat.children.nbytes + flat.value.nbytes),
+    }
+
+    rng = np.random.default_rng(1)
+    x = rng.integers(0, 256, (args.rows, flat.n_features)).astype(np.float32)
+    x[0], x[1] = 0.0, 255.0  # 경계 행
+    result["correctness"] = {"model": _check(model, flat, x), **_extra_checks()}
+
+    result["latency"] = {}
+    for size in args.batch_sizes:
+        batch = x[:size] if size <= len(x) else rng.integers(0, 256, (size, flat.n_features)).astype(np.float32)
+        sk, fl = _latency(model.predict, batch, args.repeat), _latency(flat.predict, batch, args.repeat)
+        result["latency"][f"batch{size}"] = {
+            "sklearn": sk,
+            "flat": fl,
+            "speedup_p50": round(sk["p50_ms"] / fl["p50_ms"], 2) if fl["p50_ms"] else None,
+        }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, help="joblib 모델 경로")
+    parser.add_argument("--synthetic", action="store_true", help="임의 데이터로 학습한 모델 사용")
+    parser.add_argument("--rows", type=int, default=2000, help="정확성 확인에 쓰는 입력 행 수")
+    parser.add_argument("--batch-sizes", default="1,8,32,256", help="지연을 측정할 배치 크기 목록(쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=50, help="배치 크기/엔진별 측정 횟수")
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+    args.batch_sizes = [int(b) for b in args.batch_sizes.split(",") if b]
+
+    sys.path.insert(0, str(ROOT))
+    result = _bench(args)
+    failures = [name for name, check in result["correctness"].items() if check["mismatches"]]
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    if failures:
+        print(f"flat engine differs from model.predict: {', '.join(failures)}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+# benchmarks/http_load.py
+"""
+HTTP 부하 벤치마크: 라우트별 처리량(RPS)과 지연 시간 분위수(p50/p95/p99)를 측정.
+
+임시 디렉터리에 새 DB를 만들고 앱을 in-process(ASGI) 또는 uvicorn 서버로 띄운 뒤,
+사용자/todo를 시드하고 가중치로 지정한 요청 조합을 동시성 단계별로 일정 시간 동안 실행한다.
+결과는 JSON으로 출력/저장하며, 저장해 둔 기준 결과(--baseline)와 비교할 수 있다.
+
+    python benchmarks/http_load.py [--mode inprocess|uvicorn] [--concurrency 1,8,32] [--duration 10]
+                                   [--mix login=1,users_me=2,...] [--output result.json]
+                                   [--baseline base.json] [--fail-on-regression 10]
+
+라우트 이름: login, users_me, todos_get, todos_all, todos_search, todos_create, todos_patch, ml_predict
+(ml_predict는 assets/ 의 모델 파일이 없으면 자동으로 제외)
+의존성: `uv sync --group bench` (httpx)
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+MODEL_PATH = ROOT / "assets" / "ratron-random_forest_model.joblib"
+
+DEFAULT_MIX = {
+    "login": 1,
+    "users_me": 2,
+    "todos_get": 6,
+    "todos_all": 2,
+    "todos_search": 1,
+    "todos_create": 2,
+    "todos_patch": 2,
+    "ml_predict": 0.5,
+}
+PASSWORD = "bench-passw0rd"
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"]
+
+
+def _parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"unknown route in --mix: {name} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _png_bytes() -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("L", (28, 28), color=128).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """최근접 순위(nearest-rank) 분위수"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(q * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+class Session:
+    """시드된 사용자 한 명(토큰 + 소유 todo id 목록)"""
+
+    def __init__(self, name: str, headers: dict[str, str], todo_ids: list[int]):
+        self.name = name
+        self.headers = headers
+        self.todo_ids = todo_ids
+
+
+class LoadRunner:
+    def __init__(self, client, *, mix: dict[str, float], seed: int = 0):
+        self.client = client
+        self.mix = {name: w for name, w in mix.items() if w > 0}
+        self.rng = random.Random(seed)
+        self.sessions: list[Session] = []
+        self.png = _png_bytes() if "ml_predict" in self.mix else b""
+
+    async def seed(self, users: int, todos_per_user: int) -> None:
+        for i in range(users):
+            name = f"bench-{i}"
+            r = await self.client.post("/users", json={"name": name, "password": PASSWORD})
+            r.raise_for_status()
+            r = await self.client.post("/users/login", json={"name": name, "password": PASSWORD})
+            r.raise_for_status()
+            headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+            todo_ids: list[int] = []
+            for start in range(0, todos_per_user, 500):
+                items = [
+                    {"title": f"{self.rng.choice(WORDS)} task {n}", "description": f"{self.rng.choice(WORDS)} bench"}
+                    for n in range(start, min(todos_per_user, start + 500))
+                ]
+                r = await self.client.post("/todos/batch", json={"items": items}, headers=headers)
+                r.raise_for_status()
+                todo_ids.extend(item["id"] for item in r.json()["results"])
+            self.sessions.append(Session(name, headers, todo_ids))
+
+    def _request(self, route: str, rng: random.Random):
+        s = rng.choice(self.sessions)
+        if route == "login":
+            return "POST", "/users/login", {"json": {"name": s.name, "password": PASSWORD}}
+        if route == "users_me":
+            return "GET", "/users/me", {"headers": s.headers}
+        if route == "todos_get":
+            return "GET", f"/todos/{rng.choice(s.todo_ids)}", {"headers": s.headers}
+        if route == "todos_all":
+            return "GET", "/todos/all", {"headers": s.headers, "params": {"limit": 50}}
+        if route == "todos_search":
+            return "GET", "/todos/search", {"headers": s.headers, "params": {"q": rng.choice(WORDS)}}
+        if route == "todos_create":
+            return "POST", "/todos", {"headers": s.headers, "json": {"title": "load", "description": "bench"}}
+        if route == "todos_patch":
+            return "PATCH", f"/todos/{rng.choice(s.todo_ids)}", {
+                "headers": s.headers, "json": {"completed": rng.random() < 0.5}}
+        if route == "ml_predict":
+            return "POST", "/ml/predict", {
+                "headers": s.headers, "files": {"image": ("bench.png", self.png, "image/png")}}
+        raise ValueError(route)
+
+    async def run_level(self, concurrency: int, duration: float) -> dict:
+        routes, weights = list(self.mix), list(self.mix.values())
+        latencies: dict[str, list[float]] = defaultdict(list)
+        errors: dict[str, int] = defaultdict(int)
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int) -> None:
+            rng = random.Random(self.rng.random() + worker_id)
+            while time.perf_counter() < deadline:
+                route = rng.choices(routes, weights)[0]
+                method, url, kwargs = self._request(route, rng)
+                started = time.perf_counter()
+                try:
+                    r = await self.client.request(method, url, **kwargs)
+                    ok = r.status_code < 400
+                except Exception:
+                    ok = False
+                latencies[route].append(time.perf_counter() - started)
+                if not ok:
+                    errors[route] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        report = {}
+        for route in routes:
+            values = sorted(latencies[route])
+            report[route] = {
+                "requests": len(values),
+                "errors": errors[route],
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(_percentile(values, 0.50) * 1000, 3),
+                "p95_ms": round(_percentile(values, 0.95) * 1000, 3),
+                "p99_ms": round(_percentile(values, 0.99) * 1000, 3),
+            }
+        total = sum(len(v) for v in latencies.values())
+        report["_total"] = {
+            "requests": total,
+            "errors": sum(errors.values()),
+            "rps": round(total / elapsed, 2),
+        }
+        return report
+
+
+async def _run(args, mix: dict[str, float], base_url: str | None) -> dict:
+    import httpx
+
+    if base_url is None:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        lifespan = app.router.lifespan_context(app)
+        client_kwargs = {"transport": transport, "base_url": "http://bench"}
+    else:
+        lifespan = None
+        client_kwargs = {"base_url": base_url}
+
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 10)
+    async with httpx.AsyncClient(timeout=60, limits=limits, **client_kwargs) as client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            runner = LoadRunner(client, mix=mix, seed=args.seed)
+            await runner.seed(args.users, args.todos_per_user)
+            levels = {}
+            for concurrency in args.concurrency:
+                if args.warmup > 0:
+                    await runner.run_level(concurrency, args.warmup)
+                levels[str(concurrency)] = await runner.run_level(concurrency, args.duration)
+                print(f"concurrency={concurrency}: {levels[str(concurrency)]['_total']}", file=sys.stderr)
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    return {
+        "config": {
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else 1,
+            "duration": args.duration,
+            "users": args.users,
+            "todos_per_user": args.todos_per_user,
+            "mix": mix,
+            "env": {k: v for k, v in os.environ.items() if k.startswith(("DB_", "TODO_"))},
+        },
+        "levels": levels,
+    }
+
+
+def _start_uvicorn(workers: int) -> tuple[subprocess.Popen, str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit("uvicorn exited during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit("uvicorn did not start within 30s")
+
+
+def compare(result: dict, baseline: dict) -> list[dict]:
+    """기준 결과 대비 라우트별 RPS/p95 변화율(%). 양수 rps_change = 개선, 양수 p95_change = 악화"""
+    rows = []
+    for level, routes in result["levels"].items():
+        base_routes = baseline.get("levels", {}).get(level, {})
+        for route, cur in routes.items():
+            base = base_routes.get(route)
+            if not base or route == "_total" or not base.get("rps"):
+                continue
+            rows.append({
+                "concurrency": int(level),
+                "route": route,
+                "rps_change_pct": round((cur["rps"] - base["rps"]) / base["rps"] * 100, 1),
+                "p95_change_pct": round((cur["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100, 1)
+                if base.get("p95_ms") else None,
+            })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 워커 프로세스 수(--mode uvicorn)")
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 8, 32],
+                        help="동시 요청 수 단계(쉼표 구분)")
+    parser.add_argument("--duration", type=float, default=10.0, help="단계별 측정 시간(초)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="단계별 예열 시간(초, 결과 미포함)")
+    parser.add_argument("--mix", type=_parse_mix, default=dict(DEFAULT_MIX), help="라우트=가중치 목록")
+    parser.add_argument("--users", type=int, default=20, help="시드할 사용자 수")
+    parser.add_argument("--todos-per-user", type=int, default=100, help="사용자당 시드할 todo 수")
+    parser.add_argument("--seed", type=int, default=0, help="요청 선택 난수 시드")
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--baseline", type=Path, help="비교할 기준 결과 JSON")
+    parser.add_argument("--fail-on-regression", type=float, default=None, metavar="PCT",
+                        help="기준 대비 어떤 라우트의 RPS가 PCT%% 넘게 떨어지면 종료 코드 1")
+    args = parser.parse_args()
+
+    mix = args.mix
+    if mix.get("ml_predict") and not MODEL_PATH.exists():
+        print(f"model not found ({MODEL_PATH}); ml_predict excluded", file=sys.stderr)
+        mix = {k: v for k, v in mix.items() if k != "ml_predict"}
+
+    output = args.output.resolve() if args.output else None
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+
+    # DB 파일/업로드 파일은 현재 작업 디렉터리에 생성되므로 임시 디렉터리에서 실행
+    workdir = tempfile.mkdtemp(prefix="bench-http-")
+    os.chdir(workdir)
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("JWT_SECRET", "bench-secret-" + "0" * 32)
+    os.environ.setdefault("JWT_ALGORITHM", "HS256")
+    os.environ.setdefault("JWT_EXPIRE_TIME", "3600")
+    # 요청 로그(httpx)는 측정과 무관하므로 끔
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    proc = None
+    base_url = None
+    if args.mode == "uvicorn":
+        proc, base_url = _start_uvicorn(args.workers)
+    try:
+        result = asyncio.run(_run(args, mix, base_url))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    exit_code = 0
+    if baseline is not None:
+        result["comparison"] = compare(result, baseline)
+        if args.fail_on_regression is not None:
+            regressions = [r for r in result["comparison"] if r["rps_change_pct"] < -args.fail_on_regression]
+            if regressions:
+                print(f"{len(regressions)} route(s) regressed more than {args.fail_on_regression}%", file=sys.stderr)
+                exit_code = 1
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        output.write_text(text + "\n", encoding="utf-8")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
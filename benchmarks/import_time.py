@@ -0,0 +1,121 @@
+# benchmarks/import_time.py
+"""
+모듈 import 시간 측정(python -X importtime 결과 요약).
+
+새 인터프리터에서 대상 모듈(기본: main)을 import 하며 -X importtime 출력을 수집하고,
+전체 시간, 누적 시간 상위 모듈, 무거운 의존성(numpy/PIL/joblib/sklearn)의 로드 여부를 JSON으로 출력한다.
+저장해 둔 기준 결과(--baseline)와 비교해 import 시간 회귀를 추적할 수 있다.
+
+    python benchmarks/import_time.py [--module main] [--repeat 5] [--top 15]
+                                     [--output result.json] [--baseline base.json]
+                                     [--max-regression 20] [--forbid numpy,PIL,joblib,sklearn]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("numpy", "PIL", "joblib", "sklearn", "scipy")
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure_once(module: str, workdir: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.setdefault("JWT_SECRET", "bench-secret-" + "0" * 32)
+    env.setdefault("JWT_ALGORITHM", "HS256")
+    env.setdefault("JWT_EXPIRE_TIME", "3600")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules: dict[str, dict] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        depth = (len(indent) - 1) // 2
+        modules[name] = {"self_us": self_us, "cumulative_us": cumulative_us, "depth": depth}
+        if depth == 0:
+            total_us += cumulative_us
+    return {"total_us": total_us, "modules": modules}
+
+
+def summarize(runs: list[dict], top: int) -> dict:
+    # 반복 측정 중 중앙값 실행을 대표값으로 사용(캐시/디스크 상태에 따른 편차 완화)
+    runs = sorted(runs, key=lambda r: r["total_us"])
+    median_run = runs[len(runs) // 2]
+    modules = median_run["modules"]
+
+    def top_by(key: str) -> list[dict]:
+        ranked = sorted(modules.items(), key=lambda kv: kv[1][key], reverse=True)[:top]
+        return [{"module": name, "ms": round(info[key] / 1000, 2)} for name, info in ranked]
+
+    project_modules = {
+        name: round(info["cumulative_us"] / 1000, 2)
+        for name, info in modules.items()
+        if (ROOT / name.split(".")[0]).exists() or (ROOT / f"{name.split('.')[0]}.py").exists()
+    }
+    return {
+        "total_ms": round(median_run["total_us"] / 1000, 2),
+        "total_ms_runs": [round(r["total_us"] / 1000, 2) for r in runs],
+        "total_ms_stdev": round(statistics.pstdev(r["total_us"] for r in runs) / 1000, 2),
+        "module_count": len(modules),
+        "heavy_modules_loaded": sorted({n.split(".")[0] for n in modules} & set(HEAVY_MODULES)),
+        "top_cumulative": top_by("cumulative_us"),
+        "top_self": top_by("self_us"),
+        "project_modules_ms": dict(sorted(project_modules.items(), key=lambda kv: kv[1], reverse=True)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="import 할 모듈")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 측정 횟수(중앙값 사용)")
+    parser.add_argument("--top", type=int, default=15, help="상위 모듈 표시 개수")
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--baseline", type=Path, help="비교할 기준 결과 JSON")
+    parser.add_argument("--max-regression", type=float, default=None, metavar="PCT",
+                        help="기준 대비 total_ms가 PCT%% 넘게 늘면 종료 코드 1")
+    parser.add_argument("--forbid", default="", help="import 되면 실패로 처리할 최상위 모듈(쉼표 구분)")
+    args = parser.parse_args()
+
+    # logs/, DB 파일 등 import 부수 효과가 작업 트리에 남지 않도록 임시 디렉터리에서 실행
+    workdir = tempfile.mkdtemp(prefix="bench-import-")
+    result = {"module": args.module, **summarize(
+        [measure_once(args.module, workdir) for _ in range(max(1, args.repeat))], args.top)}
+
+    failures = []
+    forbidden = sorted({m for m in args.forbid.split(",") if m} & set(result["heavy_modules_loaded"]))
+    if forbidden:
+        failures.append(f"forbidden modules imported: {', '.join(forbidden)}")
+    if args.baseline:
+        base = json.loads(args.baseline.read_text(encoding="utf-8"))
+        change = (result["total_ms"] - base["total_ms"]) / base["total_ms"] * 100
+        result["comparison"] = {"baseline_total_ms": base["total_ms"], "total_change_pct": round(change, 1)}
+        if args.max_regression is not None and change > args.max_regression:
+            failures.append(f"import time regressed {change:.1f}% (> {args.max_regression}%)")
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/ml_inference.py
+"""
+추론 처리량 측정: 요청마다 predict(배칭 없음) vs 마이크로 배칭 스케줄러(services/inference.py).
+
+같은 입력을 동시 요청 C개로 나눠 예측하고 처리량(predictions/s), 요청 지연(p50/p95),
+배치 크기 분포를 JSON으로 출력한다. 두 방식의 예측 결과가 같은지도 확인한다.
+모델은 --model(기본: ML_MODEL_PATH 또는 assets/ratron-random_forest_model.joblib)을 사용하고,
+파일이 없으면 --synthetic으로 임의 데이터에 학습한 RandomForest를 사용할 수 있다.
+
+    python benchmarks/ml_inference.py [--model path | --synthetic] [--requests 512]
+                                      [--concurrency 1,8,32] [--max-batch 32] [--max-wait-ms 2]
+                                      [--output result.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load_model(args: argparse.Namespace):
+    if args.synthetic:
+        import numpy as np
+        from sklearn.ensemble import RandomForestClassifier
+
+        rng = np.random.default_rng(0)
+        x = rng.integers(0, 256, (2000, 784)).astype(np.float32)
+        y = rng.integers(0, 10, 2000)
+        return RandomForestClassifier(n_estimators=100, random_state=0).fit(x, y)
+
+    from joblib import load
+
+    path = args.model or Path(os.environ.get(
+        "ML_MODEL_PATH", ROOT / "assets" / "ratron-random_forest_model.joblib"))
+    if not Path(path).exists():
+        raise SystemExit(f"model not found: {path} (use --model or --synthetic)")
+    return load(Path(path).as_posix())
+
+
+async def _run(predictor, rows, concurrency: int) -> tuple[list, list[float], float]:
+    results: list = [None] * len(rows)
+    latencies: list[float] = []
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < len(rows):
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            results[i] = await predictor.predict(rows[i])
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, latencies, time.perf_counter() - started
+
+
+async def _bench(args: argparse.Namespace) -> dict:
+    import numpy as np
+    from services.inference import BatchingPredictor
+    from utils.metrics import metrics
+
+    model = _load_model(args)
+    rng = np.random.default_rng(1)
+    rows = list(rng.integers(0, 256, (args.requests, 784)).astype(np.float32))
+    model.predict(np.stack(rows[:2]))  # 워밍업
+
+    result: dict = {"requests": args.requests, "modes": {}}
+    reference = None
+    for concurrency in args.concurrency:
+        for label, enabled in (("per_request", False), ("batched", True)):
+            predictor = BatchingPredictor(
+                model.predict, enabled=enabled, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+            sizes = metrics.histogram("ml_inference_batch_size")
+            count_before, sum_before = sizes._count, sizes._sum
+            preds, latencies, elapsed = await _run(predictor, rows, concurrency)
+            await predictor.close()
+
+            values = [p.item() for p in preds]
+            if reference is None:
+                reference = values
+            batches = sizes._count - count_before
+            result["modes"][f"{label}@c{concurrency}"] = {
+                "concurrency": concurrency,
+                "batching": enabled,
+                "predictions_per_second": round(len(rows) / elapsed, 1),
+                "latency_p50_ms": round(statistics.median(latencies) * 1000, 2),
+                "latency_p95_ms": round(statistics.quantiles(latencies, n=20)[18] * 1000, 2),
+                "predict_calls": batches,
+                "mean_batch_size": round((sizes._sum - sum_before) / batches, 2) if batches else 0,
+                "matches_reference": values == reference,
+            }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, help="joblib 모델 경로")
+    parser.add_argument("--synthetic", action="store_true", help="임의 데이터로 학습한 모델 사용")
+    parser.add_argument("--requests", type=int, default=512, help="모드별 예측 요청 수")
+    parser.add_argument("--concurrency", default="1,8,32", help="동시 요청 수 목록(쉼표 구분)")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c]
+
+    sys.path.insert(0, str(ROOT))
+    result = asyncio.run(_bench(args))
+    failures = [label for label, mode in result["modes"].items() if not mode["matches_reference"]]
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    if failures:
+        print(f"predictions differ from reference: {', '.join(failures)}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
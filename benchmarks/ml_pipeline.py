@@ -0,0 +1,194 @@
+# benchmarks/ml_pipeline.py
+"""
+/ml/predict 파이프라인 단계별 시간 측정(오프라인, 서버 없이 같은 코드 경로를 한 프로세스에서 실행).
+
+크기(--sizes)와 형식(--formats)을 조합한 합성 이미지 말뭉치를 만든 뒤 이미지마다
+read(청크 단위 읽기) → hash(BLAKE2b) → write(임시 파일) → decode/grayscale/resize(services/ml_worker.preprocess)
+→ predict(단건) → serialize(응답 JSON) 순서로 실행하고, 단계별 p50/p95/p99(ms)와 처리량(images/s, MB/s)을
+전체 및 (형식, 크기) 그룹별로 출력한다. 서버의 ml_predict_{stage}_seconds 히스토그램/Server-Timing과 같은 단계 이름을 쓴다.
+(DB 기록/예측 캐시/배치 대기는 포함하지 않음)
+
+    python benchmarks/ml_pipeline.py [--model path | --synthetic] [--engine sklearn|flat]
+                                     [--sizes 28,256,1024,3000] [--formats png,jpeg,webp,gif,bmp]
+                                     [--images-per-group 20] [--output result.json]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+STAGES = ("read", "hash", "write", "decode", "grayscale", "resize", "predict", "serialize")
+CHUNK_BYTES = 256 * 1024
+
+
+def _model_path(args: argparse.Namespace, work: Path) -> Path:
+    if args.synthetic:
+        import numpy as np
+        from joblib import dump
+        from sklearn.ensemble import RandomForestClassifier
+
+        rng = np.random.default_rng(0)
+        x = rng.integers(0, 256, (2000, 784)).astype(np.float32)
+        y = rng.integers(0, 10, 2000)
+        path = work / "synthetic.joblib"
+        dump(RandomForestClassifier(n_estimators=100, random_state=0).fit(x, y), path)
+        return path
+
+    path = args.model or Path(os.environ.get(
+        "ML_MODEL_PATH", ROOT / "assets" / "ratron-random_forest_model.joblib"))
+    if not Path(path).exists():
+        raise SystemExit(f"model not found: {path} (use --model or --synthetic)")
+    return Path(path)
+
+
+def _make_corpus(args: argparse.Namespace, work: Path) -> list[tuple[str, int, Path]]:
+    """(형식, 크기, 경로) 목록. 사진처럼 압축되도록 그라디언트 + 잡음 이미지를 사용"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    corpus = []
+    for size in args.sizes:
+        yy, xx = np.mgrid[0:size, 0:size]
+        base = np.stack([xx * 255 // max(1, size - 1), yy * 255 // max(1, size - 1), (xx + yy) % 256], axis=-1)
+        for fmt in args.formats:
+            for i in range(args.images_per_group):
+                noise = rng.integers(-20, 21, base.shape)
+                pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+                path = work / "corpus" / f"{fmt}-{size}-{i}.{fmt}"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                Image.fromarray(pixels).save(path, format=fmt.upper())
+                corpus.append((fmt, size, path))
+    return corpus
+
+
+def _run_one(path: Path, tmp: Path, ref) -> dict[str, float]:
+    from services import ml_worker
+
+    times: dict[str, float] = dict.fromkeys(STAGES, 0.0)
+    digest = hashlib.blake2b(digest_size=ml_worker.CONTENT_HASH_BYTES)
+    size = 0
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        while True:
+            started = time.perf_counter()
+            chunk = src.read(CHUNK_BYTES)
+            hashed = time.perf_counter()
+            times["read"] += hashed - started
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)
+            written = time.perf_counter()
+            times["hash"] += written - hashed
+            dst.write(chunk)
+            times["write"] += time.perf_counter() - written
+
+    row, stages = ml_worker.preprocess(tmp.as_posix())
+    times.update(stages)
+
+    started = time.perf_counter()
+    pred = ml_worker.predict_batch(ref, row.reshape(1, -1))[0]
+    predicted = time.perf_counter()
+    value = pred.item() if hasattr(pred, "item") else pred
+    json.dumps({"filename": digest.hexdigest(), "size": size, "predict": value, "cached": False}).encode()
+    times["predict"] = predicted - started
+    times["serialize"] = time.perf_counter() - predicted
+    return times
+
+
+def _percentiles(samples: list[float]) -> dict:
+    ms = sorted(s * 1000 for s in samples)
+    if len(ms) < 2:
+        return {"p50_ms": round(ms[0], 4) if ms else None}
+    q = statistics.quantiles(ms, n=100)
+    return {"p50_ms": round(statistics.median(ms), 4), "p95_ms": round(q[94], 4), "p99_ms": round(q[98], 4)}
+
+
+def _summarize(results: list[dict[str, float]], elapsed: float, total_bytes: int) -> dict:
+    totals = [sum(r.values()) for r in results]
+    return {
+        "images": len(results),
+        "images_per_second": round(len(results) / elapsed, 1) if elapsed else None,
+        "mb_per_second": round(total_bytes / elapsed / 1e6, 2) if elapsed else None,
+        "total": _percentiles(totals),
+        "stages": {stage: _percentiles([r[stage] for r in results]) for stage in STAGES},
+        "share_of_time": {
+            stage: round(sum(r[stage] for r in results) / sum(totals), 4) for stage in STAGES
+        } if sum(totals) else {},
+    }
+
+
+def _bench(args: argparse.Namespace) -> dict:
+    from services import ml_worker
+    from services.model_manager import install_model
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        model_path = _model_path(args, work)
+        # 서비스와 같이 버전 폴더로 복사한 뒤 엔진에 맞게 준비(flat: 배열 파일을 mmap으로 로딩)
+        version, directory = install_model(model_path, work / "models")
+        engine = ml_worker.prepare_model(directory.as_posix(), args.engine)
+        ref = ml_worker.ModelRef(directory.as_posix(), version, "r", engine)
+        warm = ml_worker.warm_up(ref, 2, 32)
+        corpus = _make_corpus(args, work)
+
+        # 형식별 디코더/코드 경로 예열(첫 이미지 측정값이 초기화 비용을 포함하지 않도록)
+        for fmt in args.formats:
+            path = next(p for f, _, p in corpus if f == fmt)
+            _run_one(path, work / "warm.part", ref)
+
+        groups: dict[str, list[dict[str, float]]] = {}
+        group_bytes: dict[str, int] = {}
+        group_seconds: dict[str, float] = {}
+        for fmt, size, path in corpus:
+            key = f"{fmt}-{size}"
+            started = time.perf_counter()
+            result = _run_one(path, work / "upload.part", ref)
+            group_seconds[key] = group_seconds.get(key, 0.0) + time.perf_counter() - started
+            groups.setdefault(key, []).append(result)
+            group_bytes[key] = group_bytes.get(key, 0) + path.stat().st_size
+
+        everything = [r for results in groups.values() for r in results]
+        return {
+            "engine": warm["engine"],
+            "model_load_seconds": round(warm["load_seconds"], 4),
+            "overall": _summarize(everything, sum(group_seconds.values()), sum(group_bytes.values())),
+            "groups": {
+                key: {"mean_file_bytes": group_bytes[key] // len(results),
+                      **_summarize(results, group_seconds[key], group_bytes[key])}
+                for key, results in groups.items()
+            },
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, help="joblib 모델 경로")
+    parser.add_argument("--synthetic", action="store_true", help="임의 데이터로 학습한 모델 사용")
+    parser.add_argument("--engine", choices=("sklearn", "flat"), default="sklearn", help="추론 엔진(ML_ENGINE)")
+    parser.add_argument("--sizes", default="28,256,1024,3000", help="정사각형 이미지 한 변 크기 목록(px, 쉼표 구분)")
+    parser.add_argument("--formats", default="png,jpeg,webp,gif,bmp", help="이미지 형식 목록(쉼표 구분)")
+    parser.add_argument("--images-per-group", type=int, default=20, help="(형식, 크기) 조합별 이미지 수")
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+    args.sizes = [int(s) for s in args.sizes.split(",") if s]
+    args.formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+
+    sys.path.insert(0, str(ROOT))
+    text = json.dumps(_bench(args), indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/statement_count.py
+"""
+요청 하나당 실행되는 SQL 문/commit 수를 측정.
+
+임시 디렉터리에 새 DB를 만들고 앱을 in-process(ASGI)로 띄운 뒤,
+각 엔드포인트를 여러 번 호출하면서 SQLAlchemy 엔진 이벤트로 실행된 SQL 문과 commit을 센다.
+변경 전/후 커밋에서 각각 실행해 결과(JSON)를 비교한다.
+
+    python benchmarks/statement_count.py [--repeat 20] [--output result.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.statements = 0
+        self.commits = 0
+
+    def install(self) -> None:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        # 클래스 단위 리스너: 앱이 만든 모든 엔진(동기/비동기/writer)에 적용
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        event.listen(Engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def snapshot(self) -> tuple[int, int]:
+        return self.statements, self.commits
+
+
+async def _measure(repeat: int) -> dict[str, dict[str, float]]:
+    import httpx
+    from main import app
+
+    counter = StatementCounter()
+    counter.install()
+    totals: dict[str, list[int]] = defaultdict(lambda: [0, 0, 0])
+
+    async def call(label: str, method: str, url: str, **kwargs):
+        before = counter.snapshot()
+        r = await client.request(method, url, **kwargs)
+        r.raise_for_status()
+        after = counter.snapshot()
+        t = totals[label]
+        t[0] += after[0] - before[0]
+        t[1] += after[1] - before[1]
+        t[2] += 1
+        return r
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            cred = {"name": "bench-user", "password": "bench-passw0rd"}
+            await call("POST /users", "POST", "/users", json=cred)
+            r = await call("POST /users/login", "POST", "/users/login", json=cred)
+            headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+            for i in range(repeat):
+                r = await call("POST /todos", "POST", "/todos",
+                               json={"title": f"todo {i}", "description": "bench"}, headers=headers)
+                todo_id = r.json()["id"]
+                await call("GET /todos/{id}", "GET", f"/todos/{todo_id}", headers=headers)
+                await call("PATCH /todos/{id}", "PATCH", f"/todos/{todo_id}",
+                           json={"completed": True}, headers=headers)
+                await call("GET /todos/all", "GET", "/todos/all", headers=headers)
+                await call("GET /users/me", "GET", "/users/me", headers=headers)
+                await call("PATCH /users", "PATCH", "/users",
+                           json={"name": f"bench-user-{i}"}, headers=headers)
+                await call("DELETE /todos/{id}", "DELETE", f"/todos/{todo_id}", headers=headers)
+
+    return {
+        label: {
+            "requests": n,
+            "statements_per_request": round(stmts / n, 2),
+            "commits_per_request": round(commits / n, 2),
+        }
+        for label, (stmts, commits, n) in totals.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="엔드포인트별 호출 횟수")
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    output = args.output.resolve() if args.output else None
+    # DB 파일은 현재 작업 디렉터리에 생성되므로 임시 디렉터리에서 실행
+    workdir = tempfile.mkdtemp(prefix="bench-stmt-")
+    os.chdir(workdir)
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    os.environ.setdefault("JWT_ALGORITHM", "HS256")
+    os.environ.setdefault("JWT_EXPIRE_TIME", "3600")
+
+    # 요청 로그(httpx)는 측정과 무관하므로 끔
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    result = asyncio.run(_measure(args.repeat))
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        output.write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
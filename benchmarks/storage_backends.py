@@ -0,0 +1,204 @@
+# benchmarks/storage_backends.py
+"""
+업로드 저장소 백엔드 확인/비교(services/storage.py): LocalStorage vs S3Storage.
+
+1) 정확성: 백엔드마다 임의 내용 객체 --objects개를 put 한 뒤 exists/stat/get/stream(전체, 범위)/download 결과가
+   원본과 같은지, 같은 키를 다시 put 하면 False(중복 제거)인지, 없는 키는 FileNotFoundError인지 확인한다.
+   하나라도 다르면 종료 코드 1.
+2) 성능: 연산별 지연 p50/p95(ms). 객체별 연산은 --concurrency개씩 동시에 실행한다.
+
+S3는 --endpoint-url(MinIO 등)을 주지 않으면 moto 서버(`pip install "moto[server]"`)를 로컬에 띄워 사용한다.
+boto3가 필요하다(`uv sync --group s3`).
+
+    python benchmarks/storage_backends.py [--backends local,s3] [--objects 200] [--size 65536]
+                                          [--concurrency 16] [--endpoint-url URL] [--bucket NAME] [--output result.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _summary(samples: list[float]) -> dict:
+    if len(samples) < 2:
+        return {"p50_ms": round(samples[0] * 1000, 3) if samples else None}
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(statistics.quantiles(samples, n=20)[18] * 1000, 3),
+    }
+
+
+async def _timed(samples: list[float], coro):
+    started = time.perf_counter()
+    result = await coro
+    samples.append(time.perf_counter() - started)
+    return result
+
+
+async def _gather_limited(coros, limit: int):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+async def _bench_backend(storage, work: Path, args: argparse.Namespace) -> dict:
+    from services.storage import object_key
+
+    payloads = {}
+    for _ in range(args.objects):
+        data = os.urandom(args.size)
+        name = f"{data[:32].hex()}.bin"  # 내용 해시처럼 앞 글자가 고르게 분포
+        src = work / f"src-{name}"
+        src.write_bytes(data)
+        payloads[object_key(name)] = (src, data)
+
+    timings: dict[str, list[float]] = {op: [] for op in ("put", "exists", "stat", "get", "stream_range", "download")}
+    errors: list[str] = []
+
+    created = await _gather_limited([
+        _timed(timings["put"], storage.put(key, src, content_type="application/octet-stream"))
+        for key, (src, _) in payloads.items()
+    ], args.concurrency)
+    if not all(created):
+        errors.append("put returned False for a new key")
+    key, (src, data) = next(iter(payloads.items()))
+    if await storage.put(key, src, content_type="application/octet-stream"):
+        errors.append("second put of the same key returned True")
+    if not src.exists():
+        errors.append("put removed the source file")
+
+    async def check(key: str, src: Path, data: bytes) -> None:
+        if not await _timed(timings["exists"], storage.exists(key)):
+            errors.append(f"{key}: exists is False")
+        info = await _timed(timings["stat"], storage.stat(key))
+        if info.size != len(data):
+            errors.append(f"{key}: stat size {info.size} != {len(data)}")
+        if await _timed(timings["get"], storage.get(key)) != data:
+            errors.append(f"{key}: get differs")
+        start, end = len(data) // 3, len(data) // 3 * 2
+        if await _timed(timings["stream_range"], _collect(storage.stream(key, start=start, end=end))) != data[start:end]:
+            errors.append(f"{key}: ranged stream differs")
+        dst = src.with_name(f"dst-{src.name}")
+        await _timed(timings["download"], storage.download(key, dst))
+        if dst.read_bytes() != data:
+            errors.append(f"{key}: download differs")
+
+    await _gather_limited([check(key, src, data) for key, (src, data) in payloads.items()], args.concurrency)
+    if await _collect(storage.stream(key, chunk_size=1000)) != data:
+        errors.append("full stream differs")
+
+    missing = object_key("ffff-missing.bin")
+    if await storage.exists(missing):
+        errors.append("exists is True for a missing key")
+    for name, op in (("get", storage.get(missing)), ("stat", storage.stat(missing))):
+        try:
+            await op
+            errors.append(f"{name} of a missing key did not raise")
+        except FileNotFoundError:
+            pass
+
+    await _gather_limited([storage.delete(key) for key in payloads], args.concurrency)
+    return {
+        "objects": args.objects,
+        "object_bytes": args.size,
+        "errors": errors[:20],
+        "mismatches": len(errors),
+        "latency": {op: _summary(samples) for op, samples in timings.items()},
+    }
+
+
+def _s3_storage(args: argparse.Namespace, stack: list):
+    from services.storage import S3Storage
+
+    endpoint = args.endpoint_url
+    if endpoint is None:
+        # 로컬 대체 서버: moto(S3 API 에뮬레이터)를 이 프로세스 안에서 실행
+        import logging
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)  # 요청마다 남는 접근 로그 숨김
+        server = ThreadedMotoServer(port=0, verbose=False)
+        server.start()
+        stack.append(server.stop)
+        host, port = server.get_host_and_port()
+        endpoint = f"http://{host}:{port}"
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+
+    storage = S3Storage(args.bucket, prefix="benchmark/", endpoint_url=endpoint, region=args.region)
+    client = storage._client()
+    try:
+        client.head_bucket(Bucket=args.bucket)
+    except Exception:
+        client.create_bucket(Bucket=args.bucket)
+    return storage, endpoint
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    from services.storage import LocalStorage
+
+    result: dict = {}
+    stack: list = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            work = Path(tmp) / "work"
+            work.mkdir()
+            for backend in args.backends:
+                if backend == "local":
+                    storage, where = LocalStorage(Path(tmp) / "store"), "tempdir"
+                elif backend == "s3":
+                    storage, where = _s3_storage(args, stack)
+                else:
+                    raise SystemExit(f"unknown backend: {backend}")
+                result[backend] = {"location": where, **await _bench_backend(storage, work, args)}
+    finally:
+        for stop in stack:
+            stop()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="local,s3", help="확인할 백엔드 목록(쉼표 구분)")
+    parser.add_argument("--objects", type=int, default=200, help="백엔드별 객체 수")
+    parser.add_argument("--size", type=int, default=64 * 1024, help="객체 크기(바이트)")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시에 실행할 연산 수")
+    parser.add_argument("--endpoint-url", help="S3 호환 엔드포인트(미지정 시 moto 서버를 로컬에 실행)")
+    parser.add_argument("--bucket", default="storage-benchmark", help="S3 버킷(없으면 생성)")
+    parser.add_argument("--region", default="us-east-1", help="S3 리전")
+    parser.add_argument("--output", type=Path, help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+    args.backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+
+    sys.path.insert(0, str(ROOT))
+    result = asyncio.run(_run(args))
+    failures = [name for name, r in result.items() if r["mismatches"]]
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    if failures:
+        print(f"storage backend check failed: {', '.join(failures)}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
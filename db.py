@@ -1,49 +1,281 @@
 # db/__init__.py
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
 from db_base import db_base
+from env import env
 
 # 모델을 메타데이터에 등록하기 위해 import가 필요.
-from model import UserTable, TodoTable  # noqa: F401
+from model import UserTable, TodoTable, ImageTable, PredictionTable  # noqa: F401
+
 
+# 1. 실행 모드: 기본은 async(aiosqlite). DB_ASYNC=0 이면 기존 동기 세션을 스레드풀에서 사용(벤치마크 비교용)
+DB_ASYNC = env.get_bool("DB_ASYNC", True)
 
 # 2. 데이터베이스 URL 설정 using absolute path
+# DB_SHARDS > 1 이면 owner_id 해시로 나눈 N개의 SQLite 파일에 저장(샤드 0은 기존 Database.db).
+# 샤드 수를 바꾼 뒤에는 `python manage.py rebalance` 로 데이터를 재배치해야 함.
+DB_SHARDS = max(1, env.get_int("DB_SHARDS", 1))
 DB_PATH = os.path.join(os.getcwd(), "Database.db")
 DB_URL = f'sqlite:///{DB_PATH}'
+ASYNC_DB_URL = f'sqlite+aiosqlite:///{DB_PATH}'
 
-engine = create_engine(DB_URL, connect_args={
-                       "check_same_thread": False}, echo=False)
 
-
-@event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
 
 
-# 4. 테이블 생성
-try:
-    db_base.metadata.create_all(engine)
-    print("테이블 생성 성공")
-    print(f"Database path: {DB_PATH}")
-except Exception as e:
-    print(f"테이블 생성 실패: {e}")
+def shard_db_path(index: int) -> str:
+    return DB_PATH if index == 0 else os.path.join(os.getcwd(), f"Database.shard{index}.db")
+
+
+class Shard:
+    """샤드 하나(SQLite 파일 하나)에 대한 엔진/세션 생성기 묶음"""
+
+    def __init__(self, index: int, path: str | None = None):
+        self.index = index
+        self.path = path or shard_db_path(index)
+        self.url = f'sqlite:///{self.path}'
+        self.async_url = f'sqlite+aiosqlite:///{self.path}'
+        self.engine = create_engine(self.url, connect_args={"check_same_thread": False}, echo=False)
+        self.async_engine = create_async_engine(self.async_url, echo=False)
+        event.listen(self.engine, "connect", set_sqlite_pragma)
+        event.listen(self.async_engine.sync_engine, "connect", set_sqlite_pragma)
+        # commit 후 객체를 만료(expire)시키면 속성 접근 시 재조회(SELECT)가 발생하므로 만료하지 않음.
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(
+            self.async_engine, autoflush=False, expire_on_commit=False)
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash(Lamping & Veach). 버킷 수가 N -> N+1 로 늘어날 때 약 1/(N+1)의 키만 이동하므로
+    리밸런싱 시 옮겨야 하는 사용자 수가 최소가 됨.
+    """
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+shards = [Shard(i) for i in range(DB_SHARDS)]
+
+
+def shard_for(user_id: int) -> Shard:
+    """사용자(owner_id)의 데이터가 저장된 샤드"""
+    return shards[jump_hash(user_id, len(shards))] if len(shards) > 1 else shards[0]
+
+
+# 샤드 0(단일 DB 모드에서는 유일한 DB)에 대한 기존 이름 유지
+engine = shards[0].engine
+async_engine = shards[0].async_engine
+
+
+# 3. 스키마 보완: create_all은 기존 테이블에 컬럼을 추가하지 않으므로 누락된 컬럼과 트리거를 보완(idempotent)
+_ADDED_COLUMNS = [
+    ("todo", "version", "version INTEGER NOT NULL DEFAULT 1"),
+    ("user", "version", "version INTEGER NOT NULL DEFAULT 1"),
+    ("user", "todos_version", "todos_version INTEGER NOT NULL DEFAULT 0"),
+]
+
+# todo가 바뀌면 소유자의 todos_version을 올려 목록 ETag가 바뀌도록 함(일괄 처리/연쇄 삭제 포함)
+_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_bump_owner_ai AFTER INSERT ON todo BEGIN
+        UPDATE "user" SET todos_version = todos_version + 1 WHERE id = NEW.owner_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_bump_owner_au AFTER UPDATE ON todo BEGIN
+        UPDATE "user" SET todos_version = todos_version + 1 WHERE id IN (OLD.owner_id, NEW.owner_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_bump_owner_ad AFTER DELETE ON todo BEGIN
+        UPDATE "user" SET todos_version = todos_version + 1 WHERE id = OLD.owner_id;
+    END
+    """,
+]
+
+
+# todo 전문 검색(FTS5) 인덱스: todo 테이블을 원본으로 하는 external content 테이블 + 동기화 트리거
+TODO_FTS_TABLE = "todo_fts"
+_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TODO_FTS_TABLE} USING fts5(
+        title, description, content='todo', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS todo_fts_ai AFTER INSERT ON todo BEGIN
+        INSERT INTO {TODO_FTS_TABLE}(rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS todo_fts_ad AFTER DELETE ON todo BEGIN
+        INSERT INTO {TODO_FTS_TABLE}({TODO_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END
+    """,
+    # completed/version만 바뀌는 갱신은 재색인하지 않음
+    f"""
+    CREATE TRIGGER IF NOT EXISTS todo_fts_au AFTER UPDATE OF title, description ON todo BEGIN
+        INSERT INTO {TODO_FTS_TABLE}({TODO_FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO {TODO_FTS_TABLE}(rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+]
+
+
+def rebuild_todo_fts(conn) -> None:
+    """todo 테이블 내용으로 검색 인덱스를 처음부터 다시 생성(manage.py rebuild-fts)"""
+    conn.exec_driver_sql(f"INSERT INTO {TODO_FTS_TABLE}({TODO_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def upgrade_schema(conn) -> None:
+    for table, column, ddl in _ADDED_COLUMNS:
+        columns = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+        if column not in columns:
+            conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {ddl}')
+    # 이미 있는 테이블에 새로 선언한 인덱스(create_all은 기존 테이블의 인덱스를 추가하지 않음)
+    for table in db_base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    for ddl in _TRIGGERS:
+        conn.exec_driver_sql(ddl)
+
+    fts_exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TODO_FTS_TABLE,)
+    ).scalar() is not None
+    for ddl in _FTS_DDL:
+        conn.exec_driver_sql(ddl)
+    if not fts_exists:
+        # 기존 DB에 인덱스를 새로 추가한 경우 이미 있던 todo를 색인
+        rebuild_todo_fts(conn)
+
+
+def create_schema(shard: Shard) -> None:
+    db_base.metadata.create_all(shard.engine)
+    with shard.engine.begin() as conn:
+        upgrade_schema(conn)
 
-# 5. 세션 생성기 설정
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# 4. 테이블 생성: import 시점이 아니라 앱 lifespan(DB_AUTO_MIGRATE) 또는 `python manage.py migrate`에서 실행
+DB_AUTO_MIGRATE = env.get_bool("DB_AUTO_MIGRATE", True)
+
+
+def init_schema() -> None:
+    """모든 샤드에 테이블 생성 + 누락된 컬럼/트리거/검색 인덱스 보완(idempotent)"""
+    try:
+        for shard in shards:
+            create_schema(shard)
+        print("테이블 생성 성공")
+        print(f"Database path: {DB_PATH}" + (f" (+{len(shards) - 1} shards)" if len(shards) > 1 else ""))
+    except Exception as e:
+        print(f"테이블 생성 실패: {e}")
+        raise
+
+# 5. 세션 생성기 설정(샤드 0)
+SessionLocal = shards[0].SessionLocal
+AsyncSessionLocal = shards[0].AsyncSessionLocal
+
+
+def is_foreign_key_violation(exc: IntegrityError) -> bool:
+    """PRAGMA foreign_keys=ON 상태에서 FK 제약 위반으로 발생한 오류인지 여부"""
+    return "FOREIGN KEY constraint failed" in str(exc.orig)
+
+
+def is_unique_violation(exc: IntegrityError) -> bool:
+    """UNIQUE 제약 위반으로 발생한 오류인지 여부"""
+    return "UNIQUE constraint failed" in str(exc.orig)
+
+
+class SyncSessionAdapter:
+    """
+    동기 Session을 AsyncSession과 같은 인터페이스로 감싼 어댑터.
+    서비스 코드는 항상 `await db.execute(...)` 형태로 작성하고,
+    DB_ASYNC=0 일 때는 각 호출이 스레드풀에서 블로킹 Session으로 실행됨.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @property
+    def info(self) -> dict:
+        return self.sync_session.info
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+@asynccontextmanager
+async def open_session(shard: Shard | None = None) -> AsyncIterator[AsyncSession]:
+    """
+    설정(DB_ASYNC)에 맞는 세션을 열고 종료 시 반드시 close.
+    세션의 info["shard"]에 샤드 번호를 기록(쓰기 시 해당 샤드의 group commit writer 선택에 사용).
+    """
+    shard = shard or shards[0]
+    if DB_ASYNC:
+        async with shard.AsyncSessionLocal() as db:
+            db.info["shard"] = shard.index
+            yield db
+    else:
+        db = SyncSessionAdapter(shard.SessionLocal())
+        db.info["shard"] = shard.index
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+async def dispose_engines() -> None:
+    for shard in shards:
+        await shard.async_engine.dispose()
 
 # 6. 의존성으로 사용할 세션 생성 함수
 
 
-def get_db_session():
+async def get_db_session() -> AsyncIterator[AsyncSession]:
     """
     Dependency
-    try-finally 블록을 통해 db 연결을 종료하거나 문제가 생겼을 때 무조건 close.
+    async with 블록을 통해 db 연결을 종료하거나 문제가 생겼을 때 무조건 close.
+    샤드 0 세션을 반환하므로 사용자 데이터 접근에는 db_shard의 샤드별 의존성을 사용.
     """
-    db = SessionLocal()
-    try:
+    async with open_session() as db:
         yield db
-    finally:
-        db.close()
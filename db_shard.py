@@ -0,0 +1,303 @@
+# db_shard.py
+"""
+샤드 라우팅: 사용자 디렉터리 + 요청별 샤드 세션 의존성 + 리밸런싱.
+
+DB_SHARDS > 1 이면 사용자와 그 todo는 jump_hash(user_id) 로 정해지는 샤드 파일 하나에 함께 저장된다.
+샤드마다 writer lock이 따로 있으므로 서로 다른 샤드의 쓰기는 서로를 기다리지 않는다.
+
+- 인증된 요청: JWT의 user_id만으로 샤드가 정해지므로 디렉터리를 조회하지 않음
+- 로그인: 이름 -> user_id 를 디렉터리에서 조회한 뒤 해당 샤드로 라우팅
+- 회원가입: 디렉터리에서 이름을 선점하고 전역 user_id를 발급받은 뒤 해당 샤드에 생성
+- todo id: 샤드 간 이동(리밸런싱) 시 충돌하지 않도록 디렉터리에서 블록 단위(hi/lo)로 전역 발급
+
+DB_SHARDS=1(기본)이면 디렉터리를 사용하지 않고 기존 단일 Database.db 동작과 동일하다.
+"""
+from __future__ import annotations
+
+import asyncio
+import glob
+import os
+import re
+from typing import AsyncIterator, Optional
+
+from fastapi import Depends
+from sqlalchemy import (
+    Column, Integer, MetaData, String, Table, create_engine, delete, insert, select, update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from auth.auth_bearer import jwt_bearer
+from db import (
+    DB_SHARDS, DB_PATH, Shard, create_schema, init_schema, jump_hash, open_session, shard_db_path, shard_for,
+    shards, is_unique_violation,
+)
+from env import env
+from error.exceptions import LoginFailedError, UserAlreadyExistsError
+from log import logger
+from model import ImageTable, PredictionTable, TodoTable, UserTable
+from schemas.user import CreateUserInput, LoginUserInput
+
+DIRECTORY_DB_PATH = os.path.join(os.path.dirname(DB_PATH), "Database.directory.db")
+
+# ---- 디렉터리 스키마(샤드와 별도의 메타데이터) ----
+directory_metadata = MetaData()
+
+user_directory_table = Table(
+    "user_directory",
+    directory_metadata,
+    Column("id", Integer, primary_key=True),  # 전역 user_id
+    Column("name", String(50), unique=True, nullable=False),
+    sqlite_autoincrement=True,  # 삭제된 id를 재사용하지 않음(토큰의 user_id가 다른 사용자를 가리키지 않도록)
+)
+
+id_sequence_table = Table(
+    "id_sequence",
+    directory_metadata,
+    Column("name", String(50), primary_key=True),
+    Column("next_id", Integer, nullable=False),
+)
+
+
+class UserDirectory:
+    def __init__(self, path: str, *, enabled: bool, id_block: int = 1000):
+        self.path = path
+        self.enabled = enabled
+        self.id_block = max(1, id_block)
+        self.engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, echo=False)
+        self.async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=False)
+        # 프로세스 내 todo id 블록 [next, limit)
+        self._todo_next = 0
+        self._todo_limit = 0
+        self._todo_lock = asyncio.Lock()
+
+    def create_schema(self) -> None:
+        directory_metadata.create_all(self.engine)
+
+    async def close(self) -> None:
+        await self.async_engine.dispose()
+
+    # ---- 사용자 ----
+
+    async def reserve(self, name: str) -> int:
+        """이름을 선점하고 새 user_id 발급(중복 이름이면 UserAlreadyExistsError)"""
+        try:
+            async with self.async_engine.begin() as conn:
+                return (await conn.execute(
+                    insert(user_directory_table).values(name=name).returning(user_directory_table.c.id)
+                )).scalar_one()
+        except IntegrityError as e:
+            if is_unique_violation(e):
+                raise UserAlreadyExistsError(context={"name": name}) from e
+            raise
+
+    async def release(self, user_id: int) -> None:
+        """회원가입 실패/회원 탈퇴 시 디렉터리 항목 제거"""
+        async with self.async_engine.begin() as conn:
+            await conn.execute(delete(user_directory_table).where(user_directory_table.c.id == user_id))
+
+    async def lookup(self, name: str) -> Optional[int]:
+        async with self.async_engine.connect() as conn:
+            return (await conn.execute(
+                select(user_directory_table.c.id).where(user_directory_table.c.name == name)
+            )).scalar_one_or_none()
+
+    async def rename(self, user_id: int, name: str) -> Optional[str]:
+        """이름 변경. 변경 전 이름을 반환(샤드 쓰기 실패 시 되돌리기용)"""
+        try:
+            async with self.async_engine.begin() as conn:
+                previous = (await conn.execute(
+                    select(user_directory_table.c.name).where(user_directory_table.c.id == user_id)
+                )).scalar_one_or_none()
+                await conn.execute(
+                    update(user_directory_table).where(user_directory_table.c.id == user_id).values(name=name))
+                return previous
+        except IntegrityError as e:
+            if is_unique_violation(e):
+                raise UserAlreadyExistsError(context={"name": name}) from e
+            raise
+
+    # ---- todo id(hi/lo) ----
+
+    async def allocate_todo_ids(self, count: int) -> list[int]:
+        """전역 todo id를 count개 발급. 디렉터리 쓰기는 블록(id_block)당 한 번."""
+        async with self._todo_lock:
+            ids: list[int] = []
+            while len(ids) < count:
+                if self._todo_next >= self._todo_limit:
+                    size = max(self.id_block, count - len(ids))
+                    self._todo_next = await self._reserve_block("todo", size)
+                    self._todo_limit = self._todo_next + size
+                take = min(count - len(ids), self._todo_limit - self._todo_next)
+                ids.extend(range(self._todo_next, self._todo_next + take))
+                self._todo_next += take
+            return ids
+
+    async def _reserve_block(self, name: str, size: int) -> int:
+        seq = id_sequence_table
+        async with self.async_engine.begin() as conn:
+            await conn.execute(
+                sqlite_insert(seq).values(name=name, next_id=1).on_conflict_do_nothing(index_elements=["name"]))
+            end = (await conn.execute(
+                update(seq).where(seq.c.name == name).values(next_id=seq.c.next_id + size).returning(seq.c.next_id)
+            )).scalar_one()
+        return end - size
+
+
+user_directory = UserDirectory(
+    DIRECTORY_DB_PATH,
+    enabled=DB_SHARDS > 1,
+    id_block=env.get_int("DB_SHARD_ID_BLOCK", 1000),
+)
+
+
+def migrate() -> None:
+    """샤드 스키마 + (샤딩 모드) 디렉터리 스키마 생성/보완. lifespan 또는 manage.py migrate에서 호출"""
+    init_schema()
+    if user_directory.enabled:
+        user_directory.create_schema()
+
+
+# ---- 요청별 샤드 세션 의존성 ----
+
+async def get_user_db_session(user_id: str = Depends(jwt_bearer)) -> AsyncIterator[AsyncSession]:
+    """Dependency: 인증된 사용자의 데이터가 있는 샤드의 세션"""
+    async with open_session(shard_for(int(user_id))) as db:
+        yield db
+
+
+async def get_login_db_session(payload: LoginUserInput) -> AsyncIterator[AsyncSession]:
+    """Dependency: 로그인할 이름을 디렉터리에서 찾아 해당 샤드의 세션을 반환(없으면 로그인 실패)"""
+    shard = shards[0]
+    if user_directory.enabled:
+        user_id = await user_directory.lookup(payload.name)
+        if user_id is None:
+            raise LoginFailedError(context={"name": payload.name})
+        shard = shard_for(user_id)
+    async with open_session(shard) as db:
+        yield db
+
+
+async def get_signup_db_session(payload: CreateUserInput) -> AsyncIterator[AsyncSession]:
+    """
+    Dependency: 디렉터리에서 이름을 선점해 user_id를 발급받고 해당 샤드의 세션을 반환.
+    발급된 id는 db.info["user_id"]로 서비스에 전달되며, 요청이 실패하면 선점을 해제.
+    """
+    if not user_directory.enabled:
+        async with open_session() as db:
+            yield db
+        return
+
+    user_id = await user_directory.reserve(payload.name)
+    try:
+        async with open_session(shard_for(user_id)) as db:
+            db.info["user_id"] = user_id
+            yield db
+    except Exception:
+        await user_directory.release(user_id)
+        raise
+
+
+# ---- 리밸런싱(manage.py rebalance) ----
+
+def existing_shard_indexes() -> list[int]:
+    """디스크에 존재하는 샤드 파일 번호 목록(샤드 0 = Database.db)"""
+    indexes = {0} if os.path.exists(DB_PATH) else set()
+    pattern = re.compile(r"Database\.shard(\d+)\.db$")
+    for path in glob.glob(os.path.join(os.path.dirname(DB_PATH), "Database.shard*.db")):
+        m = pattern.search(path)
+        if m:
+            indexes.add(int(m.group(1)))
+    return sorted(indexes)
+
+
+def rebalance(shard_count: int, *, dry_run: bool = False) -> dict:
+    """
+    모든 샤드 파일의 사용자를 jump_hash(user_id, shard_count) 위치로 옮기고 디렉터리를 갱신.
+    서버를 중지한 상태에서 실행해야 하며, 중간에 중단되어도 다시 실행하면 이어서 처리됨(멱등).
+    """
+    user_t, todo_t = UserTable.__table__, TodoTable.__table__
+    indexes = sorted(set(existing_shard_indexes()) | set(range(shard_count)))
+    by_index = {i: Shard(i, shard_db_path(i)) for i in indexes}
+    if not dry_run:
+        for i in range(shard_count):
+            create_schema(by_index[i])
+        user_directory.create_schema()
+
+    stats = {"shards": shard_count, "users": 0, "moved": 0, "conflicts": [], "max_todo_id": 0}
+    seen: set[int] = set()  # 이미 옮긴 사용자가 대상 샤드에서 다시 조회되는 경우 건너뜀
+    for index in indexes:
+        src = by_index[index]
+        if not os.path.exists(src.path):
+            continue
+        with src.engine.connect() as conn:
+            users = conn.execute(select(user_t)).mappings().all()
+            max_todo_id = conn.execute(select(todo_t.c.id).order_by(todo_t.c.id.desc()).limit(1)).scalar()
+        stats["max_todo_id"] = max(stats["max_todo_id"], max_todo_id or 0)
+
+        for user in users:
+            if user["id"] in seen:
+                continue
+            seen.add(user["id"])
+            stats["users"] += 1
+            target = jump_hash(user["id"], shard_count)
+            if dry_run:
+                stats["moved"] += int(target != index)
+                continue
+            try:
+                _register(user["id"], user["name"])
+                if target != index:
+                    _move_user(dict(user), src, by_index[target])
+                    stats["moved"] += 1
+            except IntegrityError as e:
+                logger.warning("rebalance_conflict", extra={"context": {"user_id": user["id"], "error": str(e.orig)}})
+                stats["conflicts"].append(user["id"])
+
+    if not dry_run:
+        # 이후 발급되는 todo id가 기존 id와 겹치지 않도록 시퀀스를 앞당김
+        seq = id_sequence_table
+        with user_directory.engine.begin() as conn:
+            conn.execute(sqlite_insert(seq).values(name="todo", next_id=stats["max_todo_id"] + 1)
+                         .on_conflict_do_nothing(index_elements=["name"]))
+            conn.execute(update(seq).where(seq.c.name == "todo", seq.c.next_id <= stats["max_todo_id"])
+                         .values(next_id=stats["max_todo_id"] + 1))
+    for shard in by_index.values():
+        shard.engine.dispose()
+    stats["unused_files"] = [by_index[i].path for i in indexes if i >= shard_count]
+    return stats
+
+
+def _register(user_id: int, name: str) -> None:
+    """디렉터리에 (id, name) 등록. 같은 이름이 다른 id로 이미 있으면 IntegrityError"""
+    stmt = sqlite_insert(user_directory_table).values(id=user_id, name=name)
+    with user_directory.engine.begin() as conn:
+        conn.execute(stmt.on_conflict_do_update(index_elements=["id"], set_={"name": stmt.excluded.name}))
+
+
+def _move_user(user: dict, src: Shard, dst: Shard) -> None:
+    """사용자와 todo/이미지 소유 기록을 dst로 복사(한 트랜잭션)한 뒤 src에서 삭제(연관 행은 CASCADE)"""
+    user_t, todo_t, image_t = UserTable.__table__, TodoTable.__table__, ImageTable.__table__
+    prediction_t = PredictionTable.__table__
+    with src.engine.connect() as conn:
+        todos = [dict(row) for row in conn.execute(
+            select(todo_t).where(todo_t.c.owner_id == user["id"])).mappings()]
+        images = [dict(row) for row in conn.execute(
+            select(image_t).where(image_t.c.owner_id == user["id"])).mappings()]
+        # 예측 캐시는 샤드마다 따로 있으므로 옮기는 이미지의 결과를 대상 샤드에도 복사
+        predictions = [dict(row) for row in conn.execute(
+            select(prediction_t).where(prediction_t.c.content_hash.in_({row["content_hash"] for row in images}))
+        ).mappings()] if images else []
+    with dst.engine.begin() as conn:
+        # 이전 실행이 복사 후 삭제 전에 중단된 경우의 잔여분 제거
+        conn.execute(delete(user_t).where(user_t.c.id == user["id"]))
+        conn.execute(insert(user_t), [user])
+        if todos:
+            conn.execute(insert(todo_t), todos)
+        if images:
+            # 이미지 행 id는 샤드별 자동 증가 값이므로 대상 샤드에서 새로 발급
+            conn.execute(insert(image_t), [{k: v for k, v in row.items() if k != "id"} for row in images])
+        if predictions:
+            conn.execute(sqlite_insert(prediction_t).on_conflict_do_nothing(), predictions)
+    with src.engine.begin() as conn:
+        conn.execute(delete(user_t).where(user_t.c.id == user["id"]))
@@ -0,0 +1,176 @@
+# db_writer.py
+"""
+Group commit 쓰기 파이프라인.
+
+SQLite는 파일 단위 writer lock을 사용하므로 요청마다 commit(=lock 획득 + fsync)하면
+동시 쓰기 처리량이 commit 횟수에 묶인다. 이 모듈은 여러 요청의 쓰기 작업을 하나의
+단일 writer 태스크로 모아 짧은 구간(max_wait_ms) 또는 N개(max_batch) 단위로
+한 트랜잭션에 적용한 뒤, 각 요청자에게 자신의 결과/예외를 돌려준다.
+
+- 각 작업은 SAVEPOINT 안에서 실행되므로 한 작업의 실패가 같은 배치의 다른 작업에 영향을 주지 않는다.
+- 작업 함수는 commit하지 않는다(flush까지만). commit은 배치 단위로 writer가 수행한다.
+- DB_GROUP_COMMIT=0(기본)이면 기존처럼 요청 세션에서 바로 commit한다.
+- 샤드(DB_SHARDS)마다 별도의 writer를 두므로 샤드끼리는 서로의 writer lock을 기다리지 않는다.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from db import set_sqlite_pragma, shards
+from env import env
+from log import logger
+
+T = TypeVar("T")
+WriteOp = Callable[[AsyncSession], Awaitable[T]]
+
+# writer 전용 엔진: 드라이버의 암묵적 BEGIN을 끄고 SQLAlchemy가 직접 BEGIN IMMEDIATE를 발행.
+# - SAVEPOINT가 올바르게 동작하려면 필요(pysqlite/aiosqlite 공통 제약)
+# - IMMEDIATE로 배치 시작 시점에 writer lock을 잡아 읽기→쓰기 lock 승격 교착을 피함
+def _disable_driver_transaction(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+def _begin_immediate(conn):
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def create_writer_engine(url: str) -> AsyncEngine:
+    engine = create_async_engine(url, echo=False)
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragma)
+    event.listen(engine.sync_engine, "connect", _disable_driver_transaction)
+    event.listen(engine.sync_engine, "begin", _begin_immediate)
+    return engine
+
+
+class GroupCommitWriter:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        enabled: bool = False,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        self.enabled = enabled
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # 간단한 통계(배치 수/작업 수)
+        self.batches = 0
+        self.ops = 0
+
+    async def submit(self, op: WriteOp[T]) -> T:
+        """작업을 writer 큐에 넣고, 해당 배치가 commit된 뒤 결과를 반환."""
+        self._ensure_started()
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((op, fut))
+        return await fut
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue))
+
+    async def close(self) -> None:
+        """남은 작업을 모두 처리한 뒤 writer 태스크를 종료."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.engine.dispose()
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple[WriteOp, asyncio.Future]]:
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await self._collect(queue)
+            try:
+                await self._apply(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _apply(self, batch: list[tuple[WriteOp, asyncio.Future]]) -> None:
+        outcomes: list[tuple[asyncio.Future, Any, Optional[BaseException]]] = []
+        try:
+            async with self.session_factory() as db:
+                async with db.begin():
+                    for op, fut in batch:
+                        if fut.done():  # 요청이 이미 취소된 경우
+                            continue
+                        try:
+                            async with db.begin_nested():
+                                result = await op(db)
+                            outcomes.append((fut, result, None))
+                        except Exception as e:
+                            outcomes.append((fut, None, e))
+        except Exception as e:
+            # commit 자체가 실패하면 성공으로 기록된 작업도 모두 실패 처리
+            logger.warning("group_commit_failed", extra={"context": {"error": str(e), "size": len(batch)}})
+            outcomes = [(fut, None, err or e) for fut, _, err in outcomes]
+
+        self.batches += 1
+        self.ops += len(outcomes)
+        for fut, result, err in outcomes:
+            if fut.done():
+                continue
+            if err is not None:
+                fut.set_exception(err)
+            else:
+                fut.set_result(result)
+
+
+# 샤드별 writer(인덱스 = 샤드 번호)
+group_writers = [
+    GroupCommitWriter(
+        create_writer_engine(shard.async_url),
+        enabled=env.get_bool("DB_GROUP_COMMIT", False),
+        max_batch=env.get_int("DB_GROUP_COMMIT_MAX_BATCH", 64),
+        max_wait_ms=env.get_float("DB_GROUP_COMMIT_MAX_WAIT_MS", 5.0),
+    )
+    for shard in shards
+]
+group_writer = group_writers[0]
+
+
+async def close_writers() -> None:
+    for writer in group_writers:
+        await writer.close()
+
+
+async def run_write(db: AsyncSession, op: WriteOp[T]) -> T:
+    """
+    서비스 계층의 쓰기 진입점.
+    group commit이 켜져 있으면 세션이 속한 샤드의 writer에 위임하고, 아니면 현재 세션에서 실행 후 바로 commit.
+    """
+    writer = group_writers[db.info.get("shard", 0)]
+    if writer.enabled:
+        return await writer.submit(op)
+    result = await op(db)
+    await db.commit()
+    return result
@@ -7,8 +7,26 @@ class Env:
     def __init__(self):
         load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
-    def get(self, key: str) -> Optional[str]:
-        return os.environ.get(key)
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return os.environ.get(key, default)
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = os.environ.get(key)
+        if value is None or value.strip() == "":
+            return default
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    def get_int(self, key: str, default: int) -> int:
+        value = os.environ.get(key)
+        if value is None or value.strip() == "":
+            return default
+        return int(value)
+
+    def get_float(self, key: str, default: float) -> float:
+        value = os.environ.get(key)
+        if value is None or value.strip() == "":
+            return default
+        return float(value)
 
 
 env = Env()
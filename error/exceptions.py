@@ -47,3 +47,34 @@ class UnauthorizedError(AppError):
     """인가 실패(소유권 불일치 등)"""
     default_message = "Unauthorized"
     code = "UNAUTHORIZED"
+
+
+class PreconditionFailedError(AppError):
+    """조건부 요청 실패(If-Match의 ETag가 현재 버전과 불일치)"""
+    default_message = "Precondition failed"
+    code = "PRECONDITION_FAILED"
+
+
+class ServerBusyError(AppError):
+    """일시적 과부하(작업 대기열 가득 참). Retry-After 이후 재시도"""
+    default_message = "Server is busy, retry later"
+    code = "SERVER_BUSY"
+    retry_after = 1  # 초
+
+
+class PayloadTooLargeError(AppError):
+    """요청 본문/업로드 파일이 허용 크기를 초과"""
+    default_message = "Payload too large"
+    code = "PAYLOAD_TOO_LARGE"
+
+
+class UnsupportedMediaTypeError(AppError):
+    """허용되지 않은 업로드 형식(Content-Type 또는 파일 시그니처 불일치)"""
+    default_message = "Unsupported media type"
+    code = "UNSUPPORTED_MEDIA_TYPE"
+
+
+class InvalidUploadError(AppError):
+    """업로드 형식 오류(손상된 zip 아카이브 등)"""
+    default_message = "Invalid upload"
+    code = "INVALID_UPLOAD"
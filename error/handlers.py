@@ -6,7 +6,11 @@ from starlette.status import (
     HTTP_400_BAD_REQUEST,
     HTTP_401_UNAUTHORIZED,
     HTTP_404_NOT_FOUND,
+    HTTP_412_PRECONDITION_FAILED,
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_415_UNSUPPORTED_MEDIA_TYPE,
     HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
 )
 from error.exceptions import (
     AppError,
@@ -16,6 +20,11 @@ from error.exceptions import (
     TodoNotFoundError,
     ImageNotFoundError,
     UnauthorizedError,
+    PreconditionFailedError,
+    ServerBusyError,
+    PayloadTooLargeError,
+    UnsupportedMediaTypeError,
+    InvalidUploadError,
 )
 
 # HTTP 상태코드 매핑
@@ -26,6 +35,11 @@ STATUS_BY_TYPE: dict[type[AppError], int] = {
     UserNotFoundError: HTTP_404_NOT_FOUND,
     ImageNotFoundError: HTTP_404_NOT_FOUND,
     UnauthorizedError: HTTP_401_UNAUTHORIZED,
+    PreconditionFailedError: HTTP_412_PRECONDITION_FAILED,
+    ServerBusyError: HTTP_503_SERVICE_UNAVAILABLE,
+    PayloadTooLargeError: HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    UnsupportedMediaTypeError: HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+    InvalidUploadError: HTTP_400_BAD_REQUEST,
 }
 
 
@@ -36,7 +50,10 @@ def _status_for_app_error(exc: AppError) -> int:
     return HTTP_400_BAD_REQUEST
 
 
-def _problem(detail: str, *, code: str, status: int, request: Request, context: dict | None = None):
+def _problem(
+    detail: str, *, code: str, status: int, request: Request, context: dict | None = None,
+    headers: dict[str, str] | None = None,
+):
     payload = {
         "detail": detail,
         "code": code,
@@ -44,7 +61,7 @@ def _problem(detail: str, *, code: str, status: int, request: Request, context:
     }
     if context:
         payload["context"] = context  # 외부 노출 OK한 정보만
-    return JSONResponse(status_code=status, content=payload)
+    return JSONResponse(status_code=status, content=payload, headers=headers)
 
 
 def register_exception_handlers(app: FastAPI) -> None:
@@ -58,7 +75,11 @@ def register_exception_handlers(app: FastAPI) -> None:
         else:
             logger.warning("app_error", extra={"path": request.url.path,
                                                "context": exc.context, "code": exc.code})
-        return _problem(str(exc), code=exc.code, status=status, request=request, context=exc.context)
+        # 재시도 가능한 오류(ServerBusyError 등)는 Retry-After 안내
+        retry_after = getattr(exc, "retry_after", None)
+        headers = {"Retry-After": str(retry_after)} if retry_after else None
+        return _problem(str(exc), code=exc.code, status=status, request=request,
+                        context=exc.context, headers=headers)
 
     @app.exception_handler(Exception)
     async def _unhandled(request: Request, exc: Exception):
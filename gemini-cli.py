@@ -1,80 +1,298 @@
-import subprocess
+"""
+papers/**/*.md 논문을 gemini CLI로 요약해 results/{이름}.summary.md로 저장.
+
+- 동시 실행: asyncio 서브프로세스로 최대 --concurrency개를 동시에 호출
+  (전체 소요 시간 ≈ 논문 수 ÷ 동시 실행 수 × 호출 1회 지연)
+- 재시도: 실패(종료 코드 != 0, 시간 초과, 유효하지 않은 출력)하면 지수 백오프 + 지터로 --retries번까지 다시 호출
+- 이어서 실행: 결과 파일이 이미 있고 유효하면(JSON 객체, --accept-text면 비어 있지 않은 텍스트) 건너뜀.
+  실행 기록(results/manifest.jsonl)에 논문마다 입력 해시(프롬프트 + 논문 + 모델)·상태·시도 횟수·소요 시간을 한 줄씩
+  추가하며, 프롬프트나 논문이 바뀐 경우에는 기존 결과가 있어도 다시 요약한다. 중간에 중단돼도 다시 실행하면 남은 논문만 처리.
+- 결과 파일은 임시 파일에 쓴 뒤 rename(중단돼도 반쯤 쓴 결과가 남지 않음). 실패 로그는 results/{이름}.error.txt
+
+    python gemini-cli.py [--concurrency 4] [--timeout 600] [--retries 3] [--model gemini-2.5-flash] [--force]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
 import shutil
+import sys
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
-# 설정
-PROMPT_FILE = Path("summarized_prompt.txt")
+# 설정(기본값, 명령행 옵션으로 변경 가능)
+PROMPT_FILE = Path("summary_prompt.txt")
 PAPERS_DIR = Path("papers")
 RESULTS_DIR = Path("results")
 MODEL_NAME = "gemini-2.5-flash"
 PROJECT_TMP_DIR = Path(".gemini/tmp")
+MANIFEST_NAME = "manifest.jsonl"
 
 
-def main():
-    # 사전 점검
-    if shutil.which("gemini") is None:
-        raise RuntimeError(
-            "gemini CLI를 찾을 수 없습니다. `npm i -g @google/gemini-cli` 등으로 설치 후 PATH를 확인하세요.")
-    if not PROMPT_FILE.exists():
-        raise FileNotFoundError(f"프롬프트 파일이 없습니다: {PROMPT_FILE}")
-    if not PAPERS_DIR.exists():
-        raise FileNotFoundError(f"논문 폴더가 없습니다: {PAPERS_DIR}")
+@dataclass(frozen=True)
+class Task:
+    paper: Path
+    out_path: Path
+    input_hash: str  # 프롬프트 + 논문 + 모델 해시(입력이 바뀌면 다시 요약)
 
-    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
-    PROJECT_TMP_DIR.mkdir(parents=True, exist_ok=True)
 
-    # papers 폴더의 .md 파일을 이름순으로 순차 처리
-    paper_files = sorted(PAPERS_DIR.glob("**/*.md"))
-    if not paper_files:
-        print("papers 폴더에 .md 파일이 없습니다.")
-        return
+@dataclass
+class Outcome:
+    task: Task
+    status: str  # ok | failed
+    attempts: int
+    seconds: float
+    error: Optional[str] = None
 
-    for paper in paper_files:
-        # 결과 파일 경로
-        out_path = RESULTS_DIR / f"{paper.stem}.summary.md"
 
-        # 프롬프트 구성:
-        # 1) summarized_prompt.txt 내용을 먼저 읽음
-        # 2) 이어서 해당 논문(md)의 내용을 붙여 임시 프롬프트 파일을 생성
-        prompt_text = PROMPT_FILE.read_text(encoding="utf-8")
-        paper_text = paper.read_text(encoding="utf-8")
-        combined_text = f"{prompt_text}\n{paper_text}"
+def _strip_fence(text: str) -> str:
+    """```json ... ``` 코드 펜스로 감싼 응답이면 안쪽만"""
+    text = text.strip()
+    if text.startswith("```") and text.endswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text[: text.rfind("```")]
+    return text.strip()
+
+
+def is_valid_output(text: str, *, accept_text: bool) -> bool:
+    text = _strip_fence(text)
+    if not text or text.startswith("[ERROR]"):  # 이전 버전이 실패 로그를 결과 파일에 쓰던 형식
+        return False
+    if accept_text:
+        return True
+    try:
+        return isinstance(json.loads(text), dict)
+    except ValueError:
+        return False
+
 
-        # 대용량/특수문자 경로 문제를 피하기 위해 프로젝트 내부 임시 파일을 사용
-        tmp_path = PROJECT_TMP_DIR / f"{paper.stem}.prompt.txt"
+def _write_atomic(path: Path, text: str) -> None:
+    part = path.with_name(f".{path.name}.part")
+    part.write_text(text, encoding="utf-8")
+    os.replace(part, path)
+
+
+def load_manifest(path: Path) -> dict[str, dict]:
+    """논문 경로 → 마지막 기록(잘린 마지막 줄은 무시)"""
+    entries: dict[str, dict] = {}
+    if not path.exists():
+        return entries
+    for line in path.read_text(encoding="utf-8").splitlines():
         try:
-            tmp_path.write_text(combined_text, encoding="utf-8")
-
-            # gemini CLI 호출
-            cmd = [
-                "gemini",
-                "-m", MODEL_NAME,
-                "-p", f"@{{{tmp_path.resolve().as_posix()}}}",
-            ]
-
-            print(f"[RUN] {paper} → {out_path.name}")
-            proc = subprocess.run(cmd, capture_output=True, text=True)
-
-            if proc.returncode != 0:
-                # 실패 시 stderr를 결과 파일에 남겨 추후 디버깅
-                err_txt = (
-                    f"[ERROR] gemini CLI failed for {paper.name}\n\n"
-                    f"STDERR:\n{proc.stderr}"
-                )
-                out_path.write_text(err_txt, encoding="utf-8")
-                print(f"  ↳ 실패(로그 저장): {out_path}")
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        entries[entry["paper"]] = entry
+    return entries
+
+
+class Manifest:
+    """실행 기록(JSONL). 논문 하나가 끝날 때마다 한 줄 추가하고 바로 flush(강제 종료돼도 완료분 유지)"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.previous = load_manifest(path)
+        self._f = open(path, "a", encoding="utf-8")
+
+    def record(self, outcome: Outcome, run_id: str) -> None:
+        entry = {
+            "paper": outcome.task.paper.as_posix(),
+            "output": outcome.task.out_path.as_posix(),
+            "input_hash": outcome.task.input_hash,
+            "status": outcome.status,
+            "attempts": outcome.attempts,
+            "seconds": round(outcome.seconds, 3),
+            "run": run_id,
+            "finished_at": time.time(),
+        }
+        if outcome.error:
+            entry["error"] = outcome.error[-500:]
+        self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def plan(args: argparse.Namespace, prompt_text: str, manifest: Manifest) -> tuple[list[Task], int]:
+    """(처리할 작업 목록, 건너뛴 수)"""
+    tasks, skipped = [], 0
+    for paper in sorted(args.papers.glob("**/*.md")):
+        paper_text = paper.read_text(encoding="utf-8")
+        digest = hashlib.sha256(f"{args.model}\0{prompt_text}\0{paper_text}".encode()).hexdigest()
+        task = Task(paper, args.results / f"{paper.stem}.summary.md", digest)
+        if not args.force and task.out_path.exists():
+            previous = manifest.previous.get(paper.as_posix())
+            # 기록이 없는 결과(이전 버전 스크립트로 만든 결과)는 유효하면 그대로 사용
+            same_input = previous is None or previous.get("input_hash") == digest
+            if same_input and is_valid_output(task.out_path.read_text(encoding="utf-8"), accept_text=args.accept_text):
+                skipped += 1
                 continue
+        tasks.append(task)
+    return tasks, skipped
+
 
-            # 성공: stdout을 결과 파일로 저장
-            output_text = proc.stdout.strip()
-            print(output_text)
-            out_path.write_text(output_text, encoding="utf-8")
-            print(f"  ↳ 완료: {out_path}")
-        finally:
+async def call_gemini(args: argparse.Namespace, prompt_path: Path) -> tuple[int, str, str]:
+    """gemini CLI 1회 호출 → (종료 코드, stdout, stderr). 시간 초과면 프로세스를 종료하고 TimeoutError"""
+    proc = await asyncio.create_subprocess_exec(
+        args.gemini, "-m", args.model, "-p", f"@{{{prompt_path.resolve().as_posix()}}}",
+        stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=args.timeout)
+    except BaseException:  # 시간 초과/취소(Ctrl+C): 자식 프로세스를 남기지 않음
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    return proc.returncode, stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """attempt번째 실패 후 대기 시간: 0 ~ min(cap, base * 2^(attempt-1)) 사이 무작위(full jitter)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+async def summarize(args: argparse.Namespace, task: Task, prompt_text: str) -> Outcome:
+    started = time.perf_counter()
+    # 대용량/특수문자 경로 문제를 피하기 위해 프롬프트 + 논문을 프로젝트 내부 임시 파일로 전달
+    tmp_path = PROJECT_TMP_DIR / f"{task.paper.stem}-{task.input_hash[:12]}.prompt.txt"
+    tmp_path.write_text(f"{prompt_text}\n{task.paper.read_text(encoding='utf-8')}", encoding="utf-8")
+    error = None
+    try:
+        for attempt in range(1, args.retries + 2):
             try:
-                tmp_path.unlink(missing_ok=True)
-            except Exception:
-                pass
+                code, stdout, stderr = await call_gemini(args, tmp_path)
+                output = stdout.strip()
+                if code != 0:
+                    error = f"exit code {code}\n{stderr.strip()}"
+                elif not is_valid_output(output, accept_text=args.accept_text):
+                    error = f"invalid output ({len(output)} chars)\n{output[:300]}"
+                else:
+                    _write_atomic(task.out_path, output)
+                    task.out_path.with_suffix("").with_suffix(".error.txt").unlink(missing_ok=True)
+                    return Outcome(task, "ok", attempt, time.perf_counter() - started)
+            except asyncio.TimeoutError:
+                error = f"timed out after {args.timeout}s"
+            if attempt <= args.retries:
+                delay = backoff_delay(attempt, args.backoff, args.backoff_max)
+                print(f"  ↳ 재시도 {attempt}/{args.retries} ({delay:.1f}s 후): {task.paper.name}: {error.splitlines()[0]}")
+                await asyncio.sleep(delay)
+        # 실패: 결과 파일 대신 오류 로그를 남김(다음 실행에서 다시 시도)
+        _write_atomic(task.out_path.with_suffix("").with_suffix(".error.txt"),
+                      f"[ERROR] gemini CLI failed for {task.paper.name}\n\n{error}")
+        return Outcome(task, "failed", args.retries + 1, time.perf_counter() - started, error)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+class Progress:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.busy_seconds = 0.0  # 작업별 소요 시간 합(평균 지연/실제 동시성 계산)
+        self.started = time.perf_counter()
+
+    def update(self, outcome: Outcome) -> None:
+        self.done += 1
+        self.failed += outcome.status != "ok"
+        self.busy_seconds += outcome.seconds
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed * 60 if elapsed else 0.0
+        eta = (self.total - self.done) / (self.done / elapsed) if self.done else 0.0
+        mark = "완료" if outcome.status == "ok" else "실패"
+        print(f"[{self.done}/{self.total}] {mark}: {outcome.task.paper} → {outcome.task.out_path.name} "
+              f"({outcome.seconds:.1f}s, 시도 {outcome.attempts}회) | {rate:.1f}편/분, 남은 시간 약 {eta:.0f}s")
+
+    def summary(self, skipped: int) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "processed": self.done,
+            "ok": self.done - self.failed,
+            "failed": self.failed,
+            "skipped": skipped,
+            "wall_seconds": round(elapsed, 1),
+            "papers_per_minute": round(self.done / elapsed * 60, 2) if elapsed else None,
+            "mean_latency_seconds": round(self.busy_seconds / self.done, 1) if self.done else None,
+            # 평균 동시 실행 수(작업 시간 합 / 실제 경과 시간)
+            "effective_concurrency": round(self.busy_seconds / elapsed, 2) if elapsed else None,
+        }
+
+
+async def run(args: argparse.Namespace) -> int:
+    # 프롬프트는 한 번만 읽음
+    prompt_text = args.prompt.read_text(encoding="utf-8")
+    args.results.mkdir(parents=True, exist_ok=True)
+    PROJECT_TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+    manifest = Manifest(args.results / MANIFEST_NAME)
+    try:
+        tasks, skipped = plan(args, prompt_text, manifest)
+        if not tasks:
+            print(f"처리할 논문이 없습니다(이미 완료: {skipped}편).")
+            return 0
+        print(f"논문 {len(tasks)}편 요약 시작(건너뜀 {skipped}편, 동시 실행 {args.concurrency}, 모델 {args.model})")
+
+        run_id = time.strftime("%Y%m%dT%H%M%S")
+        progress = Progress(len(tasks))
+        queue: asyncio.Queue[Task] = asyncio.Queue()
+        for task in tasks:
+            queue.put_nowait(task)
+
+        async def worker() -> None:
+            while not queue.empty():
+                task = queue.get_nowait()
+                outcome = await summarize(args, task, prompt_text)
+                manifest.record(outcome, run_id)
+                progress.update(outcome)
+
+        await asyncio.gather(*(worker() for _ in range(min(args.concurrency, len(tasks)))))
+        summary = progress.summary(skipped)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 1 if summary["failed"] else 0
+    finally:
+        manifest.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompt", type=Path, default=PROMPT_FILE, help="요약 프롬프트 파일")
+    parser.add_argument("--papers", type=Path, default=PAPERS_DIR, help="논문(.md) 폴더")
+    parser.add_argument("--results", type=Path, default=RESULTS_DIR, help="결과 폴더")
+    parser.add_argument("--model", default=MODEL_NAME, help="gemini 모델 이름")
+    parser.add_argument("--gemini", default="gemini", help="gemini CLI 실행 파일")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 실행할 gemini 호출 수")
+    parser.add_argument("--timeout", type=float, default=600.0, help="호출 1회 시간 제한(초)")
+    parser.add_argument("--retries", type=int, default=3, help="실패 시 재시도 횟수")
+    parser.add_argument("--backoff", type=float, default=2.0, help="재시도 대기 기준 시간(초, 시도마다 2배)")
+    parser.add_argument("--backoff-max", type=float, default=60.0, help="재시도 대기 최대 시간(초)")
+    parser.add_argument("--accept-text", action="store_true", help="JSON이 아닌 응답도 유효한 결과로 인정")
+    parser.add_argument("--force", action="store_true", help="기존 결과를 무시하고 모두 다시 요약")
+    args = parser.parse_args()
+    args.concurrency = max(1, args.concurrency)
+    args.retries = max(0, args.retries)
+
+    # 사전 점검
+    if shutil.which(args.gemini) is None:
+        raise RuntimeError(
+            "gemini CLI를 찾을 수 없습니다. `npm i -g @google/gemini-cli` 등으로 설치 후 PATH를 확인하세요.")
+    if not args.prompt.exists():
+        raise FileNotFoundError(f"프롬프트 파일이 없습니다: {args.prompt}")
+    if not args.papers.exists():
+        raise FileNotFoundError(f"논문 폴더가 없습니다: {args.papers}")
+
+    try:
+        sys.exit(asyncio.run(run(args)))
+    except KeyboardInterrupt:
+        print("중단됨: 완료한 논문은 실행 기록에 남아 있으며 다시 실행하면 이어서 처리합니다.")
+        sys.exit(130)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,44 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from apis.todo import router as todo_router
 from apis.user import router as user_router
-from apis.ml import router as ml_router
+from apis.ml import router as ml_router, batch_router as ml_batch_router
+from apis.metrics import router as metrics_router
+from starlette.concurrency import run_in_threadpool
+from db import DB_AUTO_MIGRATE, dispose_engines
+from db_writer import close_writers
+from db_shard import migrate, user_directory
 from error.handlers import register_exception_handlers
+from services.password import password_hasher
+from services.ml import close_ml_service, start_ml_service
 
-app = FastAPI(title="Todo API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 스키마 생성/보완은 import 시점이 아니라 시작 시 한 번만 수행.
+    # 멀티 워커 배포에서는 DB_AUTO_MIGRATE=0 으로 두고 배포 단계에서 `python manage.py migrate` 실행
+    if DB_AUTO_MIGRATE:
+        await run_in_threadpool(migrate)
+    # 모델을 ML 워커에 미리 로딩·워밍업(ML_PRELOAD=0이면 첫 /ml 요청에서 로딩)
+    await start_ml_service()
+    try:
+        yield
+    finally:
+        # 종료 시 남은 group commit 작업을 flush하고 커넥션 풀 정리
+        await close_ml_service()
+        await close_writers()
+        await dispose_engines()
+        await user_directory.close()
+        await run_in_threadpool(password_hasher.close)
+
+
+app = FastAPI(title="Todo API", version="1.0.0", lifespan=lifespan)
 app.include_router(todo_router)
 app.include_router(user_router)
 app.include_router(ml_router)
+app.include_router(ml_batch_router)
+app.include_router(metrics_router)
 
 # 전역 예외 처리
 register_exception_handlers(app)
@@ -0,0 +1,69 @@
+# manage.py
+"""
+운영용 관리 명령 모음.
+
+사용법:
+    python manage.py migrate        # 테이블 생성 + 누락된 컬럼/트리거/검색 인덱스 보완(모든 샤드, 디렉터리)
+    python manage.py rebuild-fts    # todo 전문 검색 인덱스(todo_fts) 재생성
+    python manage.py rebalance      # DB_SHARDS 변경 후 사용자/todo를 새 샤드 위치로 재배치(서버 중지 상태에서)
+"""
+import argparse
+import time
+
+
+def migrate(args: argparse.Namespace) -> None:
+    from db_shard import migrate as run_migrate
+
+    started = time.perf_counter()
+    run_migrate()
+    print(f"migrated in {time.perf_counter() - started:.2f}s")
+
+
+def rebuild_fts(args: argparse.Namespace) -> None:
+    from db import shards, init_schema, rebuild_todo_fts, TODO_FTS_TABLE
+
+    init_schema()
+    for shard in shards:
+        started = time.perf_counter()
+        with shard.engine.begin() as conn:
+            rebuild_todo_fts(conn)
+            if args.optimize:
+                # 세그먼트를 하나로 병합(검색 속도 향상, 대용량일수록 시간이 걸림)
+                conn.exec_driver_sql(f"INSERT INTO {TODO_FTS_TABLE}({TODO_FTS_TABLE}) VALUES ('optimize')")
+            count = conn.exec_driver_sql("SELECT count(*) FROM todo").scalar()
+        print(f"{TODO_FTS_TABLE} rebuilt ({shard.path}): {count} todos in {time.perf_counter() - started:.2f}s")
+
+
+def rebalance(args: argparse.Namespace) -> None:
+    import json
+    from db import DB_SHARDS
+    from db_shard import rebalance as run_rebalance
+
+    started = time.perf_counter()
+    stats = run_rebalance(args.shards or DB_SHARDS, dry_run=args.dry_run)
+    stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FastAPI-practice 관리 명령")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("migrate", help="스키마 생성/보완(idempotent)")
+    p.set_defaults(func=migrate)
+
+    p = commands.add_parser("rebuild-fts", help="todo 전문 검색 인덱스를 todo 테이블 기준으로 재생성")
+    p.add_argument("--optimize", action="store_true", help="재생성 후 인덱스 세그먼트 병합")
+    p.set_defaults(func=rebuild_fts)
+
+    p = commands.add_parser("rebalance", help="사용자/todo를 jump hash 기준 샤드로 재배치하고 디렉터리 갱신")
+    p.add_argument("--shards", type=int, default=None, help="목표 샤드 수(기본: DB_SHARDS)")
+    p.add_argument("--dry-run", action="store_true", help="이동 대상 수만 계산")
+    p.set_defaults(func=rebalance)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # model/__init__.py
 from .user import UserTable
 from .todo import TodoTable
+from .image import ImageTable, PredictionTable
 
-__all__ = ["UserTable", "TodoTable"]
+__all__ = ["UserTable", "TodoTable", "ImageTable", "PredictionTable"]
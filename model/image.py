@@ -0,0 +1,44 @@
+# model/image.py
+from __future__ import annotations
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Index, Text, UniqueConstraint, PrimaryKeyConstraint
+from db_base import db_base
+
+
+class ImageTable(db_base):
+    """
+    사용자별 업로드 이미지 소유 기록.
+    파일 자체는 내용 해시(content_hash)로 한 번만 저장되고, 같은 이미지를 올린 사용자마다 행이 하나씩 생긴다.
+    """
+    __tablename__ = "image"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "content_hash"),
+        # 사용자별 업로드 목록(GET /ml/images) keyset 페이지 조회: owner_id = ? AND id > ? ORDER BY id
+        Index("ix_image_owner_id_id", "owner_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # FK: 사용자 삭제 시 소유 기록도 함께 삭제(CASCADE). 파일은 다른 사용자와 공유될 수 있으므로 남김
+    owner_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    # 저장소 파일 이름({content_hash}{ext}). /ml/myImg/{filename} 조회 키
+    filename = Column(String(100), nullable=False, index=True)
+    content_type = Column(String(50), nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(Float, nullable=False)  # epoch seconds
+
+    def __repr__(self):
+        return f"<Image(id={self.id}, owner_id={self.owner_id}, filename={self.filename})>"
+
+
+class PredictionTable(db_base):
+    """(내용 해시, 모델 버전)별 예측 결과 캐시. 같은 이미지를 같은 모델로 다시 예측하지 않음"""
+    __tablename__ = "prediction"
+    __table_args__ = (PrimaryKeyConstraint("content_hash", "model_version"),)
+
+    content_hash = Column(String(64), nullable=False)
+    model_version = Column(String(64), nullable=False)
+    result = Column(Text, nullable=False)  # JSON 직렬화된 예측값
+    created_at = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<Prediction(content_hash={self.content_hash}, model_version={self.model_version})>"
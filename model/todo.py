@@ -12,6 +12,8 @@ class TodoTable(db_base):
     title = Column(String(200), nullable=False)
     description = Column(String(2000), nullable=True)
     completed = Column(Boolean, default=False)
+    # 갱신될 때마다 1씩 증가(ETag / If-Match 낙관적 동시성 제어에 사용)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # FK: 사용자 테이블과 연결 (삭제 시 CASCADE)
     owner_id = Column(
@@ -43,6 +45,7 @@ class TodoTable(db_base):
             "title": self.title,
             "description": self.description,
             "completed": bool(self.completed),
+            "version": self.version,
         }
 
     def __repr__(self):
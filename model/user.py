@@ -10,6 +10,10 @@ class UserTable(db_base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True, nullable=False)
     password = Column(String(200), nullable=False)
+    # 유저 정보가 갱신될 때마다 1씩 증가(ETag / If-Match)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # 소유한 todo가 생성/수정/삭제될 때마다 증가(todo 목록의 ETag). DB 트리거로 관리(db.py 참고)
+    todos_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # 기본적으로 컬렉션을 자동 로드하지 않음(noload).
     # 필요할 때 쿼리 옵션(selectinload/joinedload)으로 명시적으로 로드.
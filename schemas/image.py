@@ -0,0 +1,20 @@
+# schemas/image.py
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class ImageOut(BaseModel):
+    id: int
+    filename: str  # /ml/myImg/{filename} 조회 키
+    content_hash: str
+    content_type: str
+    size: int
+    created_at: float  # epoch seconds
+
+    # Pydantic v2: allow validation from ORM objects
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ImagePage(BaseModel):
+    items: List[ImageOut]
+    next_after: Optional[int] = None  # 다음 페이지 요청 시 after 값(마지막 페이지면 None)
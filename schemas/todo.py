@@ -1,7 +1,8 @@
 # schemas/todo.py
 from typing import Optional
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 from validators.string import TitleRule, OptionalDescriptionRule
+from env import env
 
 
 """
@@ -16,6 +17,7 @@ class Todo(BaseModel):
     title: TitleRule
     description: OptionalDescriptionRule = None
     completed: bool = False
+    version: int = 1  # 갱신 시마다 증가(ETag)
 
     # Pydantic v2: allow validation from ORM objects
     model_config = ConfigDict(from_attributes=True)
@@ -50,3 +52,44 @@ class UpdateTodoInput(BaseModel):
     title: Optional[TitleRule] = None
     description: OptionalDescriptionRule = None
     completed: Optional[bool] = None
+
+
+# ---- 일괄 처리(batch) ----
+# 한 요청에 담을 수 있는 최대 항목 수
+TODO_BATCH_MAX_ITEMS = env.get_int("TODO_BATCH_MAX_ITEMS", 500)
+
+
+class BatchCreateTodoInput(BaseModel):
+    items: list[CreateTodoInput] = Field(..., min_length=1, max_length=TODO_BATCH_MAX_ITEMS)
+
+
+class BatchUpdateTodoItem(UpdateTodoInput):
+    id: int
+
+
+class BatchUpdateTodoInput(BaseModel):
+    items: list[BatchUpdateTodoItem] = Field(..., min_length=1, max_length=TODO_BATCH_MAX_ITEMS)
+
+    @model_validator(mode="after")
+    def unique_ids(self):
+        # 같은 id를 여러 번 수정하면 적용 순서가 모호하므로 금지
+        ids = [item.id for item in self.items]
+        if len(ids) != len(set(ids)):
+            raise ValueError("duplicate todo id in batch")
+        return self
+
+
+class BatchDeleteTodoInput(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=TODO_BATCH_MAX_ITEMS)
+
+
+class TodoBatchItemResult(BaseModel):
+    index: int  # 요청 배열에서의 위치
+    id: Optional[int] = None
+    status: int  # 항목별 HTTP 상태(201/200/204/404)
+    todo: Optional[Todo] = None
+    code: Optional[str] = None  # 실패 시 오류 코드
+
+
+class TodoBatchResult(BaseModel):
+    results: list[TodoBatchItemResult]
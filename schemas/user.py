@@ -1,6 +1,6 @@
 # schemas/user.py
 from typing import Optional, List
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, ConfigDict
 from validators.user import UserName, UserPassword
 
 
@@ -8,7 +8,8 @@ class User(BaseModel):
     id: int
     name: UserName
     password: UserPassword
-    todo_id_list: List[int] = Field(default_factory=list)
+    version: int = 1  # 갱신 시마다 증가(ETag)
+    todo_id_list: Optional[List[int]] = None  # include=todo_ids 로 요청했을 때만 채움
 
     # Pydantic v2: allow validation from ORM objects
     model_config = ConfigDict(from_attributes=True)
@@ -17,7 +18,13 @@ class User(BaseModel):
 class UserOut(BaseModel):
     id: int
     name: UserName
-    todo_id_list: List[int] = Field(default_factory=list)
+    version: int = 1
+    todo_id_list: Optional[List[int]] = None
+
+
+class TodoIdPage(BaseModel):
+    ids: List[int]
+    next_after: Optional[int] = None  # 다음 페이지 요청 시 after 값(마지막 페이지면 None)
 
 
 class UserWithTokenOutput(BaseModel):
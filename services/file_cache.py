@@ -0,0 +1,166 @@
+# services/file_cache.py
+"""
+크기 한도가 있는 디스크 파일 캐시(LRU). /ml/myImg 썸네일과 원격 저장소 원본의 로컬 사본에 사용한다.
+
+- 파일은 처음 요청할 때 한 번만 만들고(create(임시 경로) → rename), 이후 요청은 파일을 그대로 사용한다.
+  같은 파일을 동시에 요청하면 생성은 한 번만 한다.
+- 캐시 대상은 root 아래에서 patterns(glob)에 맞고 include(이름)를 만족하는 파일이다(생성 중인 .part 등 숨김 파일 제외).
+  같은 디렉터리를 여러 캐시가 나눠 써도 서로의 파일을 지우지 않도록 대상을 구분한다.
+- 전체 크기가 max_bytes를 넘으면 오래 사용하지 않은 파일부터 지운다. 사용 시각은 파일 mtime으로 기록하며
+  (여러 워커 프로세스가 같은 디렉터리를 공유해도 동작), 디스크 쓰기를 줄이려고 touch_interval마다 한 번만 갱신한다.
+- 크기 합계는 프로세스별 추정치로 관리하고, 한도를 넘을 때만 디렉터리를 훑어 실제 크기로 다시 맞춘다.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from stat import S_ISREG
+from typing import Awaitable, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from utils.metrics import metrics
+
+
+def _scan(root: Path, patterns: tuple[str, ...], include: Callable[[str], bool]) -> list[tuple[float, int, Path]]:
+    """(mtime, 크기, 경로) 목록"""
+    found = []
+    for pattern in patterns:
+        for path in root.glob(pattern):
+            if path.name.startswith(".") or not include(path.name):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if S_ISREG(st.st_mode):  # 디렉터리(원본 사본의 해시 디렉터리 등) 제외
+                found.append((st.st_mtime, st.st_size, path))
+    return found
+
+
+def _evict(entries: list[tuple[float, int, Path]], max_bytes: int, target_bytes: int, keep: Path) -> tuple[int, int]:
+    """
+    실제 크기 합계가 max_bytes를 넘으면 오래된 것부터 target_bytes 이하가 될 때까지 삭제(방금 만든 keep은 제외).
+    (남은 합계, 삭제 수)
+    """
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    if total <= max_bytes:
+        return total, removed
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= target_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return total, removed
+
+
+def _touch_if_stale(path: Path, interval: float) -> bool:
+    """파일의 사용 시각(mtime)을 갱신. 파일이 없으면 False"""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return False
+    now = time.time()
+    if now - st.st_mtime > interval:
+        os.utime(path, (now, now))
+    return True
+
+
+def _adopt(src: Path, path: Path) -> Optional[int]:
+    """src를 캐시 경로로 옮김. 이미 있으면 src를 지우고 None, 옮겼으면 크기"""
+    if path.exists():
+        src.unlink(missing_ok=True)
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    size = src.stat().st_size
+    os.replace(src, path)
+    return size
+
+
+class FileCache:
+    def __init__(
+        self,
+        root: Path,
+        *,
+        name: str,
+        label: str,
+        max_bytes: int,
+        patterns: tuple[str, ...] = ("*", "*/*"),
+        include: Callable[[str], bool] = lambda name: True,
+        touch_interval: float = 60.0,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max(0, max_bytes)
+        self.patterns = patterns
+        self.include = include
+        self.touch_interval = touch_interval
+        self._bytes: Optional[int] = None  # 추정 합계(처음 사용할 때 디렉터리를 훑어 초기화)
+        self._inflight: dict[Path, asyncio.Future] = {}
+
+        # 메트릭 이름: ml_{name}_cache_hits_total 등
+        self._hits = metrics.counter(f"ml_{name}_cache_hits_total", f"디스크 캐시에 있던 파일로 응답한 요청 수({label})")
+        self._misses = metrics.counter(f"ml_{name}_cache_misses_total", f"파일을 새로 만든 요청 수({label})")
+        self._evictions = metrics.counter(f"ml_{name}_evictions_total", f"크기 한도로 삭제한 파일 수({label})")
+        metrics.gauge(f"ml_{name}_cache_bytes", f"디스크 캐시 크기 추정치(바이트, {label})",
+                      getter=lambda: self._bytes or 0)
+
+    async def get(self, path: Path, create: Callable[[Path], Awaitable[None]]) -> Path:
+        """캐시 파일 경로를 반환. 없으면 create(임시 경로)로 만든 뒤 path로 옮김"""
+        if await run_in_threadpool(_touch_if_stale, path, self.touch_interval):
+            self._hits.inc()
+            return path
+        if path in self._inflight:
+            await asyncio.shield(self._inflight[path])
+            self._hits.inc()
+            return path
+
+        self._misses.inc()
+        flight = self._inflight[path] = asyncio.get_running_loop().create_future()
+        try:
+            part = path.with_name(f".{path.name}.part")
+            try:
+                await run_in_threadpool(path.parent.mkdir, parents=True, exist_ok=True)
+                await create(part)
+                size = (await run_in_threadpool(part.stat)).st_size
+                await run_in_threadpool(os.replace, part, path)
+            except BaseException:
+                await run_in_threadpool(part.unlink, missing_ok=True)
+                raise
+            await self._account(size, path)
+            flight.set_result(None)
+        except Exception as e:
+            flight.set_exception(e)
+            flight.exception()  # 기다리는 요청이 없어도 "never retrieved" 경고를 남기지 않음
+            raise
+        except BaseException:
+            flight.cancel()
+            raise
+        finally:
+            del self._inflight[path]
+        return path
+
+    async def adopt(self, src: Path, path: Path) -> Path:
+        """이미 만들어 둔 파일 src를 캐시에 넣음(src는 옮겨지거나 삭제됨)"""
+        size = await run_in_threadpool(_adopt, src, path)
+        if size is not None:
+            await self._account(size, path)
+        return path
+
+    async def _account(self, added: int, created: Path) -> None:
+        if self._bytes is None:
+            entries = await run_in_threadpool(_scan, self.root, self.patterns, self.include)
+            self._bytes = sum(size for _, size, _ in entries)
+        else:
+            self._bytes += added
+        if self._bytes > self.max_bytes:
+            # 한도의 90%까지 줄여 매 생성마다 디렉터리를 훑지 않도록 함
+            entries = await run_in_threadpool(_scan, self.root, self.patterns, self.include)
+            self._bytes, removed = await run_in_threadpool(
+                _evict, entries, self.max_bytes, int(self.max_bytes * 0.9), created)
+            self._evictions.inc(removed)
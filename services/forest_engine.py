@@ -0,0 +1,183 @@
+# services/forest_engine.py
+"""
+배열 기반 랜덤 포레스트 추론 엔진(ML_ENGINE=flat).
+
+scikit-learn의 RandomForest.predict는 호출마다 입력 검증, 트리별 predict 호출(트리 100개면 100번),
+joblib 병렬화 준비 등 고정 비용이 커서, /ml/predict가 보내는 1~수십 행 입력에서는 이 비용이 지연 대부분을 차지한다.
+FlatForest는 학습된 포레스트의 모든 트리 노드를 하나의 평탄한 NumPy 배열(feature, threshold, children, value)로
+이어 붙이고, (트리 수 x 행 수) 노드 인덱스 배열을 깊이 단위로 한 번에 전진시키는 벡터화 순회로 예측한다.
+
+- 결과는 scikit-learn과 같다: 입력을 float32로 변환해 float64 임계값과 비교(`x <= threshold`면 왼쪽),
+  트리별 확률을 정규화해 트리 순서대로 합산한 뒤 트리 수로 나누고 argmax → classes_.
+  (tests/test_forest_engine.py와 benchmarks/forest_engine.py가 model.predict와 결과를 비교)
+- 호출마다 입력 검증을 하지 않으므로 (N, n_features) 숫자 배열만 넘긴다. 결측값(NaN) 분기는 지원하지 않는다.
+- 단일 출력 RandomForest/ExtraTrees 분류기·회귀기만 지원(그 외는 TypeError → scikit-learn 엔진 사용).
+- save()로 배열을 .npy 파일로 저장하고 load(mmap_mode="r")로 열면 배열이 np.memmap이 되어, 같은 폴더를 여는
+  모든 워커 프로세스가 같은 물리 페이지(페이지 캐시)를 공유한다(워커마다 포레스트 사본을 두지 않음).
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+# save()/load() 파일: 배열별 .npy + 나머지 속성(JSON)
+_ARRAYS = ("feature", "threshold", "children", "value", "roots")
+_META_FILE = "flat.json"
+
+# 순회 중 이 깊이마다 모든 행이 리프에 도달했는지 확인(트리 깊이가 제각각이라 최대 깊이까지 돌 필요 없음)
+_CONVERGENCE_CHECK_EVERY = 4
+
+
+class FlatForest:
+    def __init__(
+        self,
+        *,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        classes: np.ndarray | None,
+    ) -> None:
+        self.feature = feature  # (nodes,) 분기 특성 인덱스(리프: 0)
+        self.threshold = threshold  # (nodes,) float64 임계값
+        self.children = children  # (2 * nodes,) [왼쪽, 오른쪽] 자식의 전역 인덱스(리프: 자기 자신)
+        self.value = value  # (nodes, outputs) 정규화된 클래스 확률 또는 회귀값
+        self.roots = roots  # (trees, 1) 트리별 루트 노드의 전역 인덱스
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.classes = classes  # 분류기: classes_, 회귀기: None
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_estimator(cls, model: Any) -> "FlatForest":
+        """학습된 포레스트를 평탄한 배열로 변환(원본 트리 배열은 복사하므로 model은 이후 필요 없음)"""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators or getattr(model, "n_outputs_", 1) != 1:
+            raise TypeError(f"unsupported estimator for flat engine: {type(model).__name__}")
+        classes = getattr(model, "classes_", None)
+        if classes is not None and np.ndim(classes) != 1:
+            raise TypeError("multi-output classifier is not supported")
+
+        trees = [est.tree_ for est in estimators]
+        counts = np.array([t.node_count for t in trees], dtype=np.intp)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.intp)
+
+        features, thresholds, children, values = [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            left = np.asarray(tree.children_left, dtype=np.intp)
+            right = np.asarray(tree.children_right, dtype=np.intp)
+            is_leaf = left < 0
+            own = np.arange(tree.node_count, dtype=np.intp)
+            # 리프는 자기 자신을 가리키게 해서 더 깊은 트리를 순회하는 동안 제자리에 머물도록 함
+            left = np.where(is_leaf, own, left) + offset
+            right = np.where(is_leaf, own, right) + offset
+            children.append(np.stack([left, right], axis=1).reshape(-1))
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.asarray(tree.threshold, dtype=np.float64))
+
+            value = np.asarray(tree.value[:, 0, :], dtype=np.float64)
+            if classes is not None:
+                # DecisionTreeClassifier.predict_proba와 같은 정규화(합이 0이면 그대로)
+                normalizer = value.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            values.append(value)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            value=np.concatenate(values),
+            roots=offsets.reshape(-1, 1),
+            max_depth=max(t.max_depth for t in trees),
+            n_features=int(model.n_features_in_),
+            classes=None if classes is None else np.asarray(classes),
+        )
+
+    @property
+    def shared(self) -> bool:
+        """모든 노드 배열이 파일 mmap(np.memmap)이면 True(프로세스 간 페이지 공유)"""
+        return all(isinstance(getattr(self, name), np.memmap) for name in _ARRAYS)
+
+    def save(self, directory: Path) -> None:
+        """배열을 directory/{이름}.npy로 저장(load(mmap_mode="r")로 열 수 있도록 pickle 없이 저장)"""
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name), allow_pickle=False)
+        meta = {
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "classes": None if self.classes is None else self.classes.tolist(),
+        }
+        # 메타 파일을 마지막에 써서 완성된 폴더임을 표시
+        (directory / _META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory: Path, *, mmap_mode: Optional[str] = "r") -> "FlatForest":
+        """save()로 저장한 폴더에서 로딩. mmap_mode="r"이면 배열을 복사하지 않고 파일을 읽기 전용으로 매핑"""
+        meta = json.loads((directory / _META_FILE).read_text(encoding="utf-8"))
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False) for name in _ARRAYS
+        }
+        return cls(
+            **arrays,
+            max_depth=meta["max_depth"],
+            n_features=meta["n_features"],
+            classes=None if meta["classes"] is None else np.asarray(meta["classes"]),
+        )
+
+    @staticmethod
+    def is_saved(directory: Path) -> bool:
+        return (directory / _META_FILE).exists()
+
+    def apply(self, x: Any) -> np.ndarray:
+        """(N, n_features) 입력 → (트리 수, N) 도달한 리프 노드의 전역 인덱스"""
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        n = x.shape[0]
+        flat_x = x.reshape(-1)
+        row_base = np.arange(n, dtype=np.intp) * self.n_features  # (N,) 행 시작 위치
+
+        leaves = np.repeat(self.roots, n, axis=1).reshape(-1)  # (트리 수 * N,) 결과
+        # 아직 리프에 도달하지 않은 (트리, 행) 쌍만 순회: 결과 위치, 현재 노드, 행 시작 위치
+        active = np.arange(leaves.size, dtype=np.intp)
+        node = leaves.copy()
+        base = np.tile(row_base, self.n_trees)
+        for depth in range(1, self.max_depth + 1):
+            go_right = flat_x.take(base + self.feature.take(node)) > self.threshold.take(node)
+            nxt = self.children.take(2 * node + go_right)
+            if depth % _CONVERGENCE_CHECK_EVERY == 0:
+                # 리프에 도달한 쌍은 결과에 기록하고 이후 순회에서 제외
+                moving = nxt != node
+                if not moving.all():
+                    leaves[active] = nxt
+                    active, nxt, base = active[moving], nxt[moving], base[moving]
+                    if not active.size:
+                        return leaves.reshape(self.n_trees, n)
+            node = nxt
+        leaves[active] = node
+        return leaves.reshape(self.n_trees, n)
+
+    def predict_proba(self, x: Any) -> np.ndarray:
+        """(N, n_classes) 트리 평균 클래스 확률(회귀기: (N, 1) 평균 예측값)"""
+        per_tree = self.value.take(self.apply(x), axis=0)  # (트리 수, N, 출력 수)
+        # 첫 번째 축 합산은 트리 순서대로 누적(scikit-learn의 순차 합산과 같은 반올림)
+        return np.add.reduce(per_tree, axis=0) / self.n_trees
+
+    def predict(self, x: Any) -> np.ndarray:
+        proba = self.predict_proba(x)
+        if self.classes is None:
+            return proba[:, 0]
+        return self.classes.take(np.argmax(proba, axis=1))
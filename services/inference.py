@@ -0,0 +1,186 @@
+# services/inference.py
+"""
+마이크로 배칭 추론 스케줄러.
+
+scikit-learn 포레스트는 predict 호출 한 번의 고정 비용(트리 순회 준비, 입력 검증, joblib 병렬화 등)이 커서
+(1, 784) 한 행씩 예측하면 동시 요청이 늘어도 처리량이 거의 오르지 않는다. 이 모듈은
+동시에 들어온 /ml/predict 요청의 전처리 결과를 모아 짧은 구간(max_wait_ms) 또는 N개(max_batch) 단위로
+(N, 784) 배열 하나로 predict를 호출하고, 각 요청자에게 자신의 행 결과를 돌려준다(db_writer의 group commit과 같은 구조).
+
+- predict는 지정한 실행기(기본: 스레드풀, ML 서비스는 프로세스 풀)에서 실행되므로 배치를 계산하는 동안에도
+  이벤트 루프는 다음 배치를 모은다. max_concurrent_batches개까지 배치를 동시에 실행하고,
+  슬롯이 모두 차 있는 동안 들어온 요청은 다음 배치에 함께 실린다.
+- 배치 크기/대기 시간 분포는 ml_inference_batch_size, ml_inference_queue_wait_seconds 히스토그램으로 노출한다.
+- ML_BATCH=0이면 배칭 없이 요청마다 바로 predict 한다.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from env import env
+from utils.metrics import metrics
+
+# (N, features) 배열을 받아 길이 N의 예측 배열을 반환하는 함수(프로세스 풀에서 실행하려면 pickle 가능해야 함)
+PredictFn = Callable[[Any], Any]
+# (predict 함수, 입력)을 받아 실행하는 코루틴 함수(실행기 대신 사용. 예: 깨진 프로세스 풀을 교체하는 ML 서비스 실행 경로)
+PredictRunner = Callable[[PredictFn, Any], Awaitable[Any]]
+
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class BatchingPredictor:
+    def __init__(
+        self,
+        predict_fn: PredictFn,
+        *,
+        enabled: bool = True,
+        max_batch: int = 32,
+        max_wait_ms: float = 2.0,
+        executor: Optional[Executor] = None,
+        runner: Optional[PredictRunner] = None,
+        max_concurrent_batches: int = 1,
+    ) -> None:
+        self.predict_fn = predict_fn
+        self.enabled = enabled
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self.runner = runner  # 지정하면 executor 대신 사용
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set[asyncio.Task] = set()
+
+        self._batch_size = metrics.histogram(
+            "ml_inference_batch_size", "predict 호출 1회에 묶인 요청 수", buckets=_BATCH_SIZE_BUCKETS)
+        self._queue_wait = metrics.histogram(
+            "ml_inference_queue_wait_seconds", "요청이 배치에 실려 predict가 시작되기까지 대기한 시간(초)",
+            buckets=_WAIT_BUCKETS)
+        self._predict_latency = metrics.histogram("ml_inference_predict_seconds", "배치 predict 실행 시간(초)")
+        metrics.gauge("ml_inference_inflight_batches", "실행 중인 predict 배치 수", getter=lambda: len(self._inflight))
+
+    async def predict(self, row: Any) -> Any:
+        """전처리된 입력 한 행(features,)의 예측값을 반환."""
+        if not self.enabled:
+            import numpy as np
+
+            self._batch_size.observe(1)
+            self._queue_wait.observe(0.0)
+            return (await self._run_predict(np.expand_dims(row, 0)))[0]
+        self._ensure_started()
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, time.perf_counter(), fut))
+        return await fut
+
+    async def predict_many(self, x: Any) -> Any:
+        """이미 (N, features)로 묶인 입력(배치 업로드)은 큐를 거치지 않고 predict 한 번으로 처리."""
+        self._batch_size.observe(len(x))
+        self._queue_wait.observe(0.0)
+        return await self._run_predict(x)
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue))
+
+    async def close(self) -> None:
+        """대기 중인 요청을 모두 처리한 뒤 스케줄러 태스크를 종료."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple[Any, float, asyncio.Future]]:
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        while True:
+            # 실행 슬롯을 먼저 확보한 뒤 배치를 모음(슬롯을 기다리는 동안 쌓인 요청이 한 배치로 묶임)
+            await slots.acquire()
+            batch = await self._collect(queue)
+            task = asyncio.create_task(self._apply_and_release(batch, queue, slots))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _apply_and_release(self, batch, queue: asyncio.Queue, slots: asyncio.Semaphore) -> None:
+        try:
+            await self._apply(batch)
+        finally:
+            slots.release()
+            for _ in batch:
+                queue.task_done()
+
+    async def _run_predict(self, x: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            if self.runner is not None:
+                return await self.runner(self.predict_fn, x)
+            if self.executor is None:
+                return await run_in_threadpool(self.predict_fn, x)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.predict_fn, x)
+        finally:
+            self._predict_latency.observe(time.perf_counter() - started)
+
+    async def _apply(self, batch: list[tuple[Any, float, asyncio.Future]]) -> None:
+        import numpy as np
+
+        # 이미 취소된 요청은 배치에서 제외
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        now = time.perf_counter()
+        for _, enqueued, _ in batch:
+            self._queue_wait.observe(now - enqueued)
+        self._batch_size.observe(len(batch))
+
+        try:
+            preds = await self._run_predict(np.stack([row for row, _, _ in batch]))
+        except Exception as e:
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, _, fut), pred in zip(batch, preds):
+            if not fut.done():
+                fut.set_result(pred)
+
+
+def create_batching_predictor(
+    predict_fn: PredictFn,
+    *,
+    executor: Optional[Executor] = None,
+    runner: Optional[PredictRunner] = None,
+    max_concurrent_batches: int = 1,
+) -> BatchingPredictor:
+    return BatchingPredictor(
+        predict_fn,
+        enabled=env.get_bool("ML_BATCH", True),
+        max_batch=env.get_int("ML_BATCH_MAX_SIZE", 32),
+        max_wait_ms=env.get_float("ML_BATCH_MAX_WAIT_MS", 2.0),
+        executor=executor,
+        runner=runner,
+        max_concurrent_batches=max_concurrent_batches,
+    )
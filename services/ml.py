@@ -1,91 +1,711 @@
 # services/ml.py
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from pathlib import Path
-from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterator, Callable, Optional
 
 from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from error.exceptions import ImageNotFoundError, UnauthorizedError
-from joblib import load
-import numpy as np
-from PIL import Image
+from db import open_session, shard_for
+from db_writer import run_write
+from env import env
+from error.exceptions import (
+    ImageNotFoundError,
+    InvalidUploadError,
+    UnauthorizedError,
+    PayloadTooLargeError,
+    ServerBusyError,
+    UnsupportedMediaTypeError,
+)
+from log import logger
+from model import ImageTable, PredictionTable
+from schemas.image import ImageOut
+from services import ml_worker
+from services.ml_worker import CONTENT_HASH_BYTES
+from services.inference import BatchingPredictor, create_batching_predictor
+from services.model_manager import ModelManager
+from services.file_cache import FileCache
+from services.storage import create_storage, object_key
+from utils.metrics import metrics
+from utils.etag import image_etag
+from utils.timing import StageTimer
+from utils.upload import IMAGE_EXTENSIONS, SNIFF_BYTES, sniff_image_type
+
+# numpy / PIL / joblib(+ 모델 역직렬화 시 scikit-learn)은 import 비용이 크므로
+# /ml 요청을 처음 처리할 때 import 한다(앱 import/워커 부팅 시간에서 제외).
+
+# 이미지 디코딩/전처리와 predict를 실행할 프로세스 수(0: 프로세스 풀 없이 메인 프로세스의 스레드에서 실행)
+ML_WORKERS = env.get_int("ML_WORKERS", min(4, os.cpu_count() or 1))
+# 디코딩을 허용하는 이미지 최대 픽셀 수(가로 x 세로, 초과 시 413). 압축 폭탄이 워커 메모리를 소진하지 않도록 헤더에서 확인
+ML_MAX_IMAGE_PIXELS = env.get_int("ML_MAX_IMAGE_PIXELS", 40_000_000)
+
+# 업로드 제한: 파일 최대 크기, 저장소로 옮겨 쓰는 청크 크기, 허용 형식(파일 시그니처 기준)
+ML_UPLOAD_MAX_BYTES = env.get_int("ML_UPLOAD_MAX_BYTES", 10 * 1024 * 1024)
+ML_UPLOAD_CHUNK_BYTES = env.get_int("ML_UPLOAD_CHUNK_BYTES", 256 * 1024)
+ML_UPLOAD_ALLOWED_TYPES = frozenset(
+    t.strip() for t in env.get("ML_UPLOAD_ALLOWED_TYPES", "image/png,image/jpeg,image/gif,image/bmp,image/webp").split(",")
+    if t.strip()
+)
+
+# 모델 수명 주기(services/model_manager.py): lifespan 미리 로딩, 버전 폴더를 두는 캐시 폴더,
+# flat 엔진 배열의 mmap 모드(빈 값: 워커마다 메모리에 읽음), 워밍업 predict 횟수, 핫 리로드 감시 주기(초, 0: 감시 안 함)
+ML_PRELOAD = env.get_bool("ML_PRELOAD", True)
+ML_MODEL_CACHE_DIR = Path(env.get("ML_MODEL_CACHE_DIR", "model_cache"))
+ML_MODEL_MMAP = env.get("ML_MODEL_MMAP", "r") or None
+ML_MODEL_WARMUP_ROUNDS = env.get_int("ML_MODEL_WARMUP_ROUNDS", 2)
+ML_MODEL_WATCH_SECONDS = env.get_float("ML_MODEL_WATCH_SECONDS", 0.0)
+
+# 추론 엔진: sklearn(model.predict) 또는 flat(services/forest_engine.py 배열 기반 순회, 결과 동일)
+ML_ENGINE = env.get("ML_ENGINE", "sklearn").strip().lower()
+
+# 배치 예측(/ml/predict/batch): 요청 본문 최대 크기, 최대 이미지 수, predict 한 번에 묶는 최대 행 수
+# (응답은 이 단위로 스트리밍되므로 메모리/첫 응답 지연이 전체 이미지 수가 아니라 이 크기에 비례)
+ML_BATCH_UPLOAD_MAX_BYTES = env.get_int("ML_BATCH_UPLOAD_MAX_BYTES", 64 * 1024 * 1024)
+ML_BATCH_MAX_FILES = env.get_int("ML_BATCH_MAX_FILES", 1000)
+ML_BATCH_PREDICT_ROWS = max(1, env.get_int("ML_BATCH_PREDICT_ROWS", 256))
+
+_ZIP_SIGNATURE = b"PK\x03\x04"
+
+# 저장 이미지 응답(/ml/myImg): 브라우저 캐시 유지 시간(초. 저장 파일은 내용/이름이 바뀌지 않으므로 immutable),
+# 썸네일 크기 목록(?size=는 이 중 요청 이상인 가장 작은 크기로 맞춤), 썸네일 디스크 캐시 최대 크기(바이트)
+ML_IMAGE_CACHE_MAX_AGE = env.get_int("ML_IMAGE_CACHE_MAX_AGE", 365 * 24 * 3600)
+ML_IMAGE_CACHE_CONTROL = f"private, max-age={ML_IMAGE_CACHE_MAX_AGE}, immutable"
+ML_THUMBNAIL_SIZES = tuple(sorted(
+    int(v) for v in env.get("ML_THUMBNAIL_SIZES", "64,128,256").split(",") if v.strip().isdigit() and int(v) > 0
+)) or (128,)
+ML_THUMBNAIL_CACHE_MAX_BYTES = env.get_int("ML_THUMBNAIL_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+# GET /ml/images 페이지 크기 상한
+ML_IMAGE_PAGE_MAX_LIMIT = env.get_int("ML_IMAGE_PAGE_MAX_LIMIT", 1000)
+# /ml/predict 응답에 단계별 시간(Server-Timing 헤더)을 포함할지 여부(히스토그램 기록은 항상)
+ML_SERVER_TIMING = env.get_bool("ML_SERVER_TIMING", True)
+# 원격 저장소(ML_STORAGE_BACKEND=s3)를 쓸 때 원본의 로컬 사본(추론/이미지 응답용) 디스크 캐시 한도
+ML_OBJECT_CACHE_MAX_BYTES = env.get_int("ML_OBJECT_CACHE_MAX_BYTES", 1024 * 1024 * 1024)
+
+# 썸네일 파일 이름: "{원본 이름}@{size}{ext}"(원본 옆에 저장)
+THUMBNAIL_MARK = "@"
+
+# 원본 MIME → 썸네일 (PIL 형식, 확장자, MIME). 그 외 형식(GIF/BMP)은 PNG로 저장
+_THUMBNAIL_FORMATS: dict[str, tuple[str, str, str]] = {
+    "image/jpeg": ("JPEG", ".jpg", "image/jpeg"),
+    "image/webp": ("WEBP", ".webp", "image/webp"),
+}
+_DEFAULT_THUMBNAIL_FORMAT = ("PNG", ".png", "image/png")
+
+# 예측 캐시 미스 표시(예측값 자체가 None일 수 있으므로 별도 객체)
+_NO_PREDICTION = object()
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    content_hash: str
+    filename: str  # {content_hash}{ext}
+    content_type: str
+    size: int
+    path: Path  # 추론/응답에 사용할 로컬 파일(로컬 저장소 객체 또는 원격 객체의 로컬 사본)
+
+
+@dataclass(frozen=True)
+class ServedImage:
+    """/ml/myImg 응답 대상: 파일 경로, MIME, strong ETag, 파일 stat(Last-Modified/Range 처리에 사용)"""
+    path: Path
+    media_type: str
+    etag: str
+    stat: os.stat_result
+
+
+def thumbnail_path(original: Path, size: int, ext: str) -> Path:
+    return original.with_name(f"{original.stem}{THUMBNAIL_MARK}{size}{ext}")
+
+
+def _thumbnail_size(requested: int) -> int:
+    """요청 크기 이상인 가장 작은 허용 크기(없으면 가장 큰 크기). 임의 크기로 캐시가 늘어나지 않도록 함"""
+    return next((size for size in ML_THUMBNAIL_SIZES if size >= requested), ML_THUMBNAIL_SIZES[-1])
+
+
+def _sniff_file(path: Path) -> Optional[str]:
+    with open(path, "rb") as f:
+        return sniff_image_type(f.read(SNIFF_BYTES))
+
+
+@dataclass
+class BatchInput:
+    """배치 예측 입력. 항목마다 이름과 디코딩 소스((임시 파일 경로, zip 멤버 또는 None)) 또는 미리 판정된 오류 코드"""
+    names: list[str] = field(default_factory=list)
+    sources: list[Any] = field(default_factory=list)
+    errors: list[Optional[str]] = field(default_factory=list)
+    spooled: list[Path] = field(default_factory=list)  # 업로드를 옮겨 둔 임시 파일(스트리밍이 끝나면 삭제)
+
+    def add(self, name: str, source: Any, error: Optional[str] = None) -> None:
+        self.names.append(name)
+        self.sources.append(None if error else source)
+        self.errors.append(error)
+
+
+def _list_zip_members(path: Path) -> list[tuple[str, int, bool]]:
+    """zip의 이미지 후보 멤버 (이름, 압축 해제 크기, 암호화 여부) 목록(디렉터리/숨김 파일/macOS 메타데이터 제외)"""
+    import zipfile
+
+    with zipfile.ZipFile(path) as archive:
+        return [
+            (info.filename, info.file_size, bool(info.flag_bits & 0x1))
+            for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith("__MACOSX/")
+            and not Path(info.filename).name.startswith(".")
+        ]
+
+
+def _model_not_loaded(x: Any) -> Any:
+    raise RuntimeError("ML model is not loaded")
 
 
 class MLService:
-    def __init__(self, *, storage_dir: str | Path = "S3") -> None:
+    def __init__(self, *, storage_dir: str | Path = "S3", workers: int = ML_WORKERS) -> None:
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
-        # 모델 경로 및 지연 로딩 캐시
         project_root = Path(__file__).resolve().parents[1]
-        self.model_path = project_root / "assets" / "ratron-random_forest_model.joblib"
-        self._model = None
-
-    def _ensure_model(self):
-        """모델을 지연 로딩하여 재사용."""
-        if self._model is None:
-            # 신뢰된 파일만 로드(고정 경로)
-            self._model = load(self.model_path.as_posix())
-        return self._model
-
-    async def predict(self, image: UploadFile, *, user_id: str) -> dict[str, Any]:
-        # 파일명 생성: {user_id}-{upload_time}.{ext}
-        ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-        # includes leading dot, e.g. ".png"
-        ext = Path(image.filename or "").suffix
-        filename = f"{user_id}-{ts}{ext}" if ext else f"{user_id}-{ts}"
-        save_path = self.storage_dir / filename
-
-        content = await image.read()
-        save_path.write_bytes(content)
-
-        # ML 예측 수행: 업로드된 이미지를 전처리하여 입력으로 사용
-        model = self._ensure_model()
-        # 실제 이미지 기반 전처리: 회색조 28x28 → 평탄화(1, 784)
+        default_model = project_root / "assets" / "ratron-random_forest_model.joblib"
+        self.model_path = Path(env.get("ML_MODEL_PATH", default_model.as_posix()))
+
+        # CPU 바운드 작업 실행기(spawn: 이벤트 루프 프로세스를 fork 하지 않음).
+        # 모델은 ModelManager가 워밍업 작업으로 워커마다 버전별로 한 번 로딩
+        self.workers = max(0, workers)
+        self._executor: Optional[Executor] = self._create_executor()
+        if self._executor is None:
+            ml_worker.init_worker(ML_MAX_IMAGE_PIXELS)
+        self._rewarm_task: Optional[asyncio.Task] = None
+        self._pending = 0  # 실행기에 제출되어 끝나지 않은 전처리 작업 수(이벤트 루프 스레드에서만 변경)
+        metrics.gauge("ml_pool_workers", "ML 프로세스 풀 크기(0: 스레드 모드)", getter=lambda: self.workers)
+        metrics.gauge("ml_pool_pending", "ML 실행기에 제출되어 대기/실행 중인 전처리 작업 수", getter=lambda: self._pending)
+        self._preprocess_latency = metrics.histogram("ml_preprocess_seconds", "이미지 디코딩/전처리 대기+실행 시간(초)")
+        self._cache_hits = metrics.counter("ml_prediction_cache_hits_total", "저장된 예측 결과로 응답한 요청 수")
+        self._cache_misses = metrics.counter("ml_prediction_cache_misses_total", "추론을 실행한 요청 수")
+        self._dedup = metrics.counter("ml_storage_dedup_total", "이미 저장된 내용이라 파일을 새로 쓰지 않은 업로드 수")
+        self._pool_restarts = metrics.counter("ml_pool_restarts_total", "워커가 죽어 깨진 ML 프로세스 풀을 새로 만든 횟수")
+        # (내용 해시, 모델 버전) → 진행 중인 추론 결과
+        self._inflight_predictions: dict[tuple[str, str], asyncio.Future] = {}
+
+        # 동시 요청의 입력을 (N, 784) 배치로 묶어 predict(services/inference.py). 워커 수만큼 배치를 동시에 실행
+        # (스레드 모드에서는 모델이 메인 프로세스에 한 번 로딩됨: ml_worker.load_model 캐시)
+        self.predictor: BatchingPredictor = create_batching_predictor(
+            _model_not_loaded,
+            runner=self._run,
+            max_concurrent_batches=max(1, self.workers),
+        )
+
+        # 모델 로딩/교체 시 배치 스케줄러의 predict 대상(ModelRef)을 새 버전으로 바꿈
+        self.models = ModelManager(
+            self.model_path, cache_dir=ML_MODEL_CACHE_DIR, mmap_mode=ML_MODEL_MMAP, engine=ML_ENGINE,
+            warmup_rounds=ML_MODEL_WARMUP_ROUNDS, workers=max(1, self.workers), run=self._run,
+        )
+        self.models.on_swap(lambda ref: setattr(self.predictor, "predict_fn", ref))
+
+        # 업로드 원본 저장소(services/storage.py). 원격 저장소면 storage_dir은 임시 파일/로컬 사본 위치
+        self.storage = create_storage(self.storage_dir)
+        self.thumbnails = FileCache(
+            self.storage_dir, name="thumbnail", label="썸네일", max_bytes=ML_THUMBNAIL_CACHE_MAX_BYTES,
+            patterns=(f"*{THUMBNAIL_MARK}*", f"*/*{THUMBNAIL_MARK}*"),
+        )
+        # 원격 객체의 로컬 사본: 로컬 저장소와 같은 "{hash 앞 2글자}/{파일 이름}" 배치(썸네일 제외)
+        self.objects = FileCache(
+            self.storage_dir, name="object", label="원격 저장소 원본 사본", max_bytes=ML_OBJECT_CACHE_MAX_BYTES,
+            patterns=("*/*",), include=lambda name: THUMBNAIL_MARK not in name,
+        )
+
+    async def start(self) -> None:
+        """모델을 모든 워커에 미리 로딩·워밍업하고 핫 리로드 감시 시작(lifespan에서 호출)"""
+        await self._ensure_model()
+        self.models.start_watching(ML_MODEL_WATCH_SECONDS)
+
+    async def _ensure_model(self) -> str:
+        """현재 모델 버전(모델 파일 내용 해시). 예측 캐시 키로 사용하며, 로딩 전이면 로딩"""
+        ref = await self.models.ensure_loaded()
+        return ref.version
+
+    def _create_executor(self) -> Optional[Executor]:
+        if not self.workers:
+            return None
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=ml_worker.init_worker,
+            initargs=(ML_MAX_IMAGE_PIXELS,),
+        )
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        실행기(프로세스 풀, 0이면 스레드풀)에서 fn 실행. 워커가 죽어(OOM kill 등) 풀이 깨지면 새 풀로 교체한다.
+        - 제출 시점에 이미 깨져 있었다면(작업이 실행되지 않음) 새 풀에서 바로 실행
+        - 실행 도중 깨졌다면 이 작업이 원인일 수 있으므로 다시 실행하지 않고 ServerBusyError(503 + Retry-After)
+        """
+        executor = self._executor
+        if executor is None:
+            return await run_in_threadpool(fn, *args)
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                fut = loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool as e:
+                executor = self._replace_broken_pool(executor, e)
+                fut = loop.run_in_executor(executor, fn, *args)
+            return await fut
+        except BrokenProcessPool as e:
+            self._replace_broken_pool(executor, e)
+            raise ServerBusyError(context={"queue": "ml", "reason": "worker_pool_broken"}) from e
+
+    def _replace_broken_pool(self, executor: Executor, error: BaseException) -> Executor:
+        """깨진 풀을 새 풀로 교체하고 현재 모델을 새 워커에 다시 워밍업(같은 풀에서 실패한 동시 요청들은 한 번만 교체)"""
+        if self._executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create_executor()
+            self._pool_restarts.inc()
+            logger.warning("ml_pool_broken", extra={"context": {"error": str(error)}})
+            if self.models.current is not None:
+                self._rewarm_task = asyncio.get_running_loop().create_task(self._rewarm())
+        return self._executor
+
+    async def _rewarm(self) -> None:
         try:
-            with Image.open(save_path) as im:
-                im = im.convert("L")
-                im = im.resize((28, 28), Image.BILINEAR)
-                arr = np.asarray(im, dtype=np.float32)  # 0..255 범위 유지
-        except Exception as e:
-            # 이미지 디코딩 실패 시 예외 전파(라우터에서 500 처리)
-            raise e
-
-        x = arr.reshape(1, 28 * 28)
-        pred = model.predict(x)
+            await self.models.warm()
+        except Exception as e:  # 워밍업에 실패해도 요청 처리 시 워커가 모델을 로딩함
+            logger.warning("ml_pool_rewarm_failed", extra={"context": {"error": str(e)}})
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        self._pending += 1
+        try:
+            return await self._run(fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def _local_file(self, key: str) -> Path:
+        """객체의 로컬 파일. 원격 저장소면 로컬 사본을 쓰고 없으면 내려받음(객체가 없으면 FileNotFoundError)"""
+        local = self.storage.local_path(key)
+        if local is not None:
+            return local
+        return await self.objects.get(self.storage_dir / key, lambda part: self.storage.download(key, part))
+
+    async def _store_upload(self, image: UploadFile, timings: StageTimer) -> StoredImage:
+        """
+        업로드를 청크 단위로 임시 파일에 옮겨 쓰면서 BLAKE2b 해시를 계산하고, 내용 주소({hash}{ext})로 저장.
+        단계 시간: read(업로드 읽기), hash, write(임시 파일 쓰기 + 저장소 저장)
+        - 첫 청크에서 Content-Type과 파일 시그니처를 확인(허용 형식이 아니면 415)
+        - 누적 크기가 ML_UPLOAD_MAX_BYTES를 넘으면 즉시 중단(413)
+        - 같은 내용의 객체가 이미 있으면 저장소에 다시 쓰지 않음(중복 제거)
+        - 원격 저장소면 임시 파일을 로컬 사본으로 남겨 추론과 이후 이미지 조회에 사용
+        """
+        declared = (image.content_type or "").split(";")[0].strip().lower()
+        if declared and declared != "application/octet-stream" and declared not in ML_UPLOAD_ALLOWED_TYPES:
+            raise UnsupportedMediaTypeError(context={"content_type": declared})
+        with timings.span("read"):
+            chunk = await image.read(max(ML_UPLOAD_CHUNK_BYTES, SNIFF_BYTES))
+        sniffed = sniff_image_type(chunk[:SNIFF_BYTES])
+        if sniffed not in ML_UPLOAD_ALLOWED_TYPES:
+            raise UnsupportedMediaTypeError(context={"content_type": declared or None})
+
+        part_path = self.storage_dir / f".upload-{uuid.uuid4().hex}.part"
+        f = await run_in_threadpool(part_path.open, "wb")
+        digest = hashlib.blake2b(digest_size=CONTENT_HASH_BYTES)
+        size = 0
+        try:
+            while chunk:
+                size += len(chunk)
+                if size > ML_UPLOAD_MAX_BYTES:
+                    raise PayloadTooLargeError(context={"max_bytes": ML_UPLOAD_MAX_BYTES})
+                with timings.span("hash"):
+                    digest.update(chunk)
+                with timings.span("write"):
+                    await run_in_threadpool(f.write, chunk)
+                with timings.span("read"):
+                    chunk = await image.read(ML_UPLOAD_CHUNK_BYTES)
+            with timings.span("write"):
+                await run_in_threadpool(f.close)
+                filename = f"{digest.hexdigest()}{IMAGE_EXTENSIONS[sniffed]}"
+                key = object_key(filename)
+                if not await self.storage.put(key, part_path, content_type=sniffed):
+                    self._dedup.inc()
+                local = self.storage.local_path(key)
+                if local is None:
+                    local = await self.objects.adopt(part_path, self.storage_dir / key)
+                else:
+                    await run_in_threadpool(part_path.unlink)
+        except BaseException:
+            await run_in_threadpool(f.close)
+            await run_in_threadpool(part_path.unlink, missing_ok=True)
+            raise
+        return StoredImage(
+            content_hash=digest.hexdigest(), filename=filename, content_type=sniffed, size=size, path=local)
+
+    async def _cached_prediction(self, content_hash: str, model_version: str, *, db: AsyncSession) -> Any:
+        result = await db.scalar(select(PredictionTable.result).where(
+            PredictionTable.content_hash == content_hash, PredictionTable.model_version == model_version))
+        return _NO_PREDICTION if result is None else json.loads(result)
+
+    async def _infer(self, path: Path, timings: StageTimer) -> Any:
+        # 디코딩/전처리는 실행기(프로세스 풀)에서 저장된 파일을 mmap으로 읽어 수행(이미지를 메모리에 두 번 올리지 않음)
+        started = time.perf_counter()
+        try:
+            row, stages = await self._submit(ml_worker.preprocess, path.as_posix())
+        except ml_worker.ImageTooLargeError as e:
+            raise PayloadTooLargeError(context={"max_pixels": ML_MAX_IMAGE_PIXELS}) from e
+        elapsed = time.perf_counter() - started
+        self._preprocess_latency.observe(elapsed)
+        # 워커가 잰 decode/grayscale/resize 외 나머지는 실행기 대기 + 프로세스 간 전달 시간
+        timings.add("preprocess_wait", elapsed - sum(stages.values()))
+        for stage, seconds in stages.items():
+            timings.add(stage, seconds)
+
+        # ML 예측 수행: 전처리된 (784,) 입력을 배치 스케줄러에 넘김(배치 대기 포함)
+        with timings.span("predict"):
+            pred = await self.predictor.predict(row)
         # JSON 직렬화를 위해 Python 기본 타입으로 변환
         try:
-            predict_value: Any = pred[0].item()  # numpy 스칼라 → Python 스칼라
+            return pred.item()  # numpy 스칼라 → Python 스칼라
         except Exception:
-            predict_value = (
-                pred[0].tolist() if hasattr(pred[0], "tolist") else pred[0]
-            )
+            return pred.tolist() if hasattr(pred, "tolist") else pred
+
+    async def predict(
+        self, image: UploadFile, *, user_id: str, db: AsyncSession, timings: Optional[StageTimer] = None
+    ) -> dict[str, Any]:
+        """
+        업로드 저장 → 소유 기록 → 예측(캐시 또는 추론). timings에 단계별 시간을 기록
+        (read/hash/write/db/preprocess_wait/decode/grayscale/resize/predict, 캐시 적중 시 전처리·예측 단계 없음)
+        """
+        timings = timings or StageTimer("ml_predict")
+        stored = await self._store_upload(image, timings)
+
+        # 소유 기록(같은 사용자가 같은 이미지를 다시 올리면 기존 기록 유지)
+        own = sqlite_insert(ImageTable).values(
+            owner_id=int(user_id), content_hash=stored.content_hash, filename=stored.filename,
+            content_type=stored.content_type, size=stored.size, created_at=time.time(),
+        ).on_conflict_do_nothing(index_elements=["owner_id", "content_hash"])
+
+        async def record(s: AsyncSession) -> None:
+            await s.execute(own)
+
+        with timings.span("db"):
+            await run_write(db, record)
+
+        # 같은 이미지를 같은 모델로 예측한 결과가 있으면 추론 없이 반환
+        model_version = await self._ensure_model()
+        with timings.span("db"):
+            predict_value = await self._cached_prediction(stored.content_hash, model_version, db=db)
+        cached = predict_value is not _NO_PREDICTION
+        if cached:
+            self._cache_hits.inc()
+        elif (stored.content_hash, model_version) in self._inflight_predictions:
+            # 같은 이미지의 추론이 이미 진행 중이면 그 결과를 함께 사용(single flight)
+            with timings.span("predict"):
+                predict_value = await asyncio.shield(
+                    self._inflight_predictions[(stored.content_hash, model_version)])
+            cached = True
+            self._cache_hits.inc()
+        else:
+            self._cache_misses.inc()
+            key = (stored.content_hash, model_version)
+            flight = self._inflight_predictions[key] = asyncio.get_running_loop().create_future()
+            try:
+                predict_value = await self._infer(stored.path, timings)
+                remember = sqlite_insert(PredictionTable).values(
+                    content_hash=stored.content_hash, model_version=model_version,
+                    result=json.dumps(predict_value), created_at=time.time(),
+                ).on_conflict_do_nothing(index_elements=["content_hash", "model_version"])
+
+                async def save(s: AsyncSession) -> None:
+                    await s.execute(remember)
+
+                with timings.span("db"):
+                    await run_write(db, save)
+                flight.set_result(predict_value)
+            except Exception as e:
+                flight.set_exception(e)
+                flight.exception()  # 기다리는 요청이 없어도 "never retrieved" 경고를 남기지 않음
+                raise
+            except BaseException:
+                flight.cancel()
+                raise
+            finally:
+                del self._inflight_predictions[key]
 
         return {
-            "url": str(save_path.as_posix()),
-            "filename": filename,
-            "size": len(content),
-            "content_type": image.content_type,
+            "url": self.storage.uri(object_key(stored.filename)),
+            "filename": stored.filename,
+            "content_hash": stored.content_hash,
+            "size": stored.size,
+            "content_type": stored.content_type,
             "predict": predict_value,
+            "cached": cached,
         }
 
-    def get_my_image_path(self, img_url: str, *, user_id: str) -> Path:
+    async def prepare_batch(self, images: list[UploadFile]) -> BatchInput:
+        """
+        배치 업로드를 응답 스트리밍 전에 임시 파일로 옮겨 둠(응답 본문을 보내는 동안에는 업로드 파일이 이미 닫혀 있음).
+        워커에는 경로만 넘기고 워커가 파일에서 직접 읽어 디코딩한다(이미지 bytes를 메모리에 모아 pickle 하지 않음).
+        - 파일 하나가 zip이면 멤버 목록만 읽음(이미지는 워커가 zip에서 직접 읽음)
+        - 여러 파일이면 파일마다 ML_UPLOAD_MAX_BYTES까지 옮김(초과한 항목은 오류로 표시)
+        """
+        if len(images) > ML_BATCH_MAX_FILES:
+            raise PayloadTooLargeError(context={"max_files": ML_BATCH_MAX_FILES})
+        if len(images) == 1:
+            head = await images[0].read(len(_ZIP_SIGNATURE))
+            await images[0].seek(0)
+            if head == _ZIP_SIGNATURE:
+                return await self._prepare_zip(images[0])
+
+        batch = BatchInput()
+        try:
+            for image in images:
+                path = self.storage_dir / f".batch-{uuid.uuid4().hex}"
+                batch.spooled.append(path)
+                if await self._spool(image, path, ML_UPLOAD_MAX_BYTES):
+                    batch.add(image.filename or "", (path.as_posix(), None))
+                else:
+                    await run_in_threadpool(path.unlink, missing_ok=True)
+                    batch.add(image.filename or "", None, "PAYLOAD_TOO_LARGE")
+        except BaseException:
+            await self._discard_batch(batch)
+            raise
+        return batch
+
+    async def _spool(self, upload: UploadFile, path: Path, limit: Optional[int] = None) -> bool:
+        """업로드를 청크 단위로 path에 씀. limit 바이트를 넘으면 멈추고 False"""
+        written = 0
+        f = await run_in_threadpool(path.open, "wb")
+        try:
+            while chunk := await upload.read(ML_UPLOAD_CHUNK_BYTES):
+                written += len(chunk)
+                if limit is not None and written > limit:
+                    return False
+                await run_in_threadpool(f.write, chunk)
+        finally:
+            await run_in_threadpool(f.close)
+        return True
+
+    async def _prepare_zip(self, upload: UploadFile) -> BatchInput:
+        path = self.storage_dir / f".batch-{uuid.uuid4().hex}.zip"
+        try:
+            await self._spool(upload, path)
+            try:
+                members = await run_in_threadpool(_list_zip_members, path)
+            except Exception as e:  # zipfile.BadZipFile, 잘린 중앙 디렉터리 등
+                raise InvalidUploadError("Invalid zip archive", context={"error": str(e)}) from e
+            if len(members) > ML_BATCH_MAX_FILES:
+                raise PayloadTooLargeError(context={"max_files": ML_BATCH_MAX_FILES})
+        except BaseException:
+            await run_in_threadpool(path.unlink, missing_ok=True)
+            raise
+
+        batch = BatchInput(spooled=[path])
+        for name, size, encrypted in members:
+            error = "INVALID_IMAGE" if encrypted else "PAYLOAD_TOO_LARGE" if size > ML_UPLOAD_MAX_BYTES else None
+            batch.add(name, (path.as_posix(), name), error)
+        return batch
+
+    async def stream_batch(self, batch: BatchInput, *, user_id: str) -> AsyncIterator[bytes]:
+        """
+        ML_BATCH_PREDICT_ROWS개 단위로 디코딩 → 예측 캐시 조회 → 남은 행을 predict 한 번 → 결과 저장 후
+        입력 순서대로 NDJSON 한 줄씩 내보냄. 이미지는 저장하지 않으며(/ml/myImg 대상 아님) 예측 결과는
+        /ml/predict와 같은 캐시(내용 해시, 모델 버전)를 공유한다.
+        """
+        try:
+            for start in range(0, len(batch.names), ML_BATCH_PREDICT_ROWS):
+                end = min(start + ML_BATCH_PREDICT_ROWS, len(batch.names))
+                for line in await self._predict_chunk(batch, start, end, user_id=user_id):
+                    yield json.dumps(line, ensure_ascii=False).encode() + b"\n"
+        finally:
+            await self._discard_batch(batch)
+
+    async def _discard_batch(self, batch: BatchInput) -> None:
+        """배치 업로드의 임시 파일 삭제"""
+        for path in batch.spooled:
+            await run_in_threadpool(path.unlink, missing_ok=True)
+        batch.spooled.clear()
+
+    async def _decode(self, sources: list[Any]) -> list[tuple[Optional[str], Optional[str], Any]]:
+        # 워커 수만큼 나눠 동시에 디코딩(한 작업에 여러 장을 보내 작업당 IPC 비용을 나눔)
+        if not sources:
+            return []
+        parts = max(1, min(self.workers, len(sources)))
+        size = -(-len(sources) // parts)
+        decoded = await asyncio.gather(*(
+            self._submit(ml_worker.decode_images, sources[i:i + size], ML_UPLOAD_ALLOWED_TYPES, ML_UPLOAD_MAX_BYTES)
+            for i in range(0, len(sources), size)
+        ))
+        return [item for part in decoded for item in part]
+
+    async def _predict_chunk(self, batch: BatchInput, start: int, end: int, *, user_id: str) -> list[dict[str, Any]]:
+        import numpy as np
+
+        pending = [i for i in range(start, end) if batch.errors[i] is None]
+        started = time.perf_counter()
+        decoded = await self._decode([batch.sources[i] for i in pending])
+        self._preprocess_latency.observe(time.perf_counter() - started)
+        for i in range(start, end):
+            batch.sources[i] = None  # 처리한 청크의 소스는 바로 해제
+
+        hashes: dict[int, str] = {}
+        rows: dict[str, Any] = {}  # 같은 내용은 한 번만 predict
+        for i, (digest, error, row) in zip(pending, decoded):
+            if error is not None:
+                batch.errors[i] = error
+            else:
+                hashes[i] = digest
+                rows.setdefault(digest, row)
+
+        model_version = await self._ensure_model()
+        async with open_session(shard_for(int(user_id))) as db:
+            cached = await self._cached_predictions(list(rows), model_version, db=db)
+            missing = [digest for digest in rows if digest not in cached]
+            fresh: dict[str, Any] = {}
+            if missing:
+                preds = await self.predictor.predict_many(np.stack([rows[digest] for digest in missing]))
+                fresh = dict(zip(missing, preds.tolist()))
+                remember = sqlite_insert(PredictionTable).values([
+                    {"content_hash": digest, "model_version": model_version,
+                     "result": json.dumps(value), "created_at": time.time()}
+                    for digest, value in fresh.items()
+                ]).on_conflict_do_nothing(index_elements=["content_hash", "model_version"])
+
+                async def save(s: AsyncSession) -> None:
+                    await s.execute(remember)
+
+                await run_write(db, save)
+        self._cache_hits.inc(sum(1 for digest in hashes.values() if digest in cached))
+        self._cache_misses.inc(len(missing))
+
+        lines = []
+        for i in range(start, end):
+            line: dict[str, Any] = {"index": i, "filename": batch.names[i]}
+            if i in hashes:
+                digest = hashes[i]
+                hit = digest in cached
+                line.update(content_hash=digest, predict=cached[digest] if hit else fresh[digest], cached=hit)
+            else:
+                line["error"] = batch.errors[i]
+            lines.append(line)
+        return lines
+
+    async def _cached_predictions(self, hashes: list[str], model_version: str, *, db: AsyncSession) -> dict[str, Any]:
+        if not hashes:
+            return {}
+        rows = await db.execute(select(PredictionTable.content_hash, PredictionTable.result).where(
+            PredictionTable.model_version == model_version, PredictionTable.content_hash.in_(hashes)))
+        return {row.content_hash: json.loads(row.result) for row in rows}
+
+    async def close(self) -> None:
+        await self.models.stop_watching()
+        if self._rewarm_task is not None:
+            self._rewarm_task.cancel()
+        await self.predictor.close()
+        if self._executor is not None:
+            await run_in_threadpool(self._executor.shutdown, wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def get_my_image(
+        self, img_url: str, *, user_id: str, db: AsyncSession, size: Optional[int] = None
+    ) -> ServedImage:
+        """
+        소유 기록으로 사용자의 이미지를 찾아 응답 정보를 반환. size를 주면 썸네일(처음 요청 시 생성해 디스크에 캐시).
+        ETag는 내용 해시(이전 방식 파일은 mtime/크기) 기반이라 파일 내용이 같으면 모든 워커에서 같다.
+        """
         # 단일 파일 이름만 허용하여 traversal 방지
         img_name = Path(img_url).name
-        # 소유권 검증: 저장 규칙상 "{user_id}-..." 이어야 함
-        if not img_name.startswith(f"{user_id}-"):
-            raise UnauthorizedError()
+        row = (await db.execute(select(ImageTable.content_type, ImageTable.content_hash).where(
+            ImageTable.owner_id == int(user_id), ImageTable.filename == img_name))).first()
+        if row is not None:
+            try:
+                img_path = await self._local_file(object_key(img_name))
+            except FileNotFoundError:
+                raise ImageNotFoundError()
+            media_type, key = row.content_type, row.content_hash
+        elif "-" in img_name and THUMBNAIL_MARK not in img_name:
+            # 이전 저장 방식("{user_id}-{timestamp}{ext}") 파일: 이름 접두사로 소유권 검증
+            if not img_name.startswith(f"{user_id}-"):
+                raise UnauthorizedError()
+            img_path, media_type, key = self.storage_dir / img_name, None, None
+        else:
+            raise ImageNotFoundError()
 
-        img_path = self.storage_dir / img_name
-        if not img_path.exists() or not img_path.is_file():
+        try:
+            stat = await run_in_threadpool(img_path.stat)
+        except FileNotFoundError:
             raise ImageNotFoundError()
-        return img_path
+        if key is None:
+            # 이전 방식 파일은 확장자와 관계없이 파일 시그니처로 형식 판별
+            media_type = await run_in_threadpool(_sniff_file, img_path) or "application/octet-stream"
+            key = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        if size is None:
+            return ServedImage(img_path, media_type, image_etag(key), stat)
+
+        size = _thumbnail_size(size)
+        fmt, ext, thumb_type = _THUMBNAIL_FORMATS.get(media_type, _DEFAULT_THUMBNAIL_FORMAT)
+
+        async def create(part: Path) -> None:
+            try:
+                await self._submit(ml_worker.make_thumbnail, img_path.as_posix(), part.as_posix(), size, fmt)
+            except ml_worker.ImageTooLargeError as e:
+                raise PayloadTooLargeError(context={"max_pixels": ML_MAX_IMAGE_PIXELS}) from e
+
+        thumb = await self.thumbnails.get(thumbnail_path(img_path, size, ext), create)
+        return ServedImage(thumb, thumb_type, image_etag(key, size), await run_in_threadpool(thumb.stat))
+
+    async def list_images(
+        self, *, user_id: str, db: AsyncSession, limit: int, after: Optional[int] = None
+    ) -> tuple[list[ImageOut], Optional[int]]:
+        """
+        사용자가 업로드한 이미지 목록(소유 기록 id 순, keyset 페이지). 저장소를 나열하지 않고 DB의 소유 기록만 조회하므로
+        저장소 종류와 관계없이 (owner_id, id) 인덱스 범위 조회 한 번으로 끝난다. 다음 페이지가 있으면 마지막 id를 함께 반환.
+        """
+        stmt = select(ImageTable).where(ImageTable.owner_id == int(user_id))
+        if after is not None:
+            stmt = stmt.where(ImageTable.id > after)
+        # 다음 페이지 존재 여부 판단을 위해 1개 더 조회
+        rows = (await db.execute(stmt.order_by(ImageTable.id).limit(limit + 1))).scalars().all()
+
+        next_cursor: Optional[int] = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1].id
+        return [ImageOut.model_validate(row) for row in rows], next_cursor
 
 
 # 싱글톤 인스턴스 & DI 팩토리
-ml_service = MLService()
+# 첫 /ml 요청 시 생성(저장 디렉터리 생성 등 부수 효과를 import 시점에서 제외)
+_ml_service: Optional[MLService] = None
 
 
 def get_ml_service() -> MLService:
-    return ml_service
+    global _ml_service
+    if _ml_service is None:
+        _ml_service = MLService()
+    return _ml_service
+
+
+async def start_ml_service() -> None:
+    """lifespan 시작 시 호출: ML_PRELOAD이면 서비스를 만들고 모델을 미리 로딩(첫 요청 지연 제거)"""
+    if not ML_PRELOAD:
+        return
+    try:
+        await get_ml_service().start()
+    except Exception as e:
+        # 모델 파일 문제로 앱 전체가 뜨지 못하지 않도록 경고만 남기고 첫 /ml 요청에서 다시 로딩 시도
+        logger.warning("ml_model_preload_failed", extra={"context": {"error": str(e)}})
+
+
+async def close_ml_service() -> None:
+    """lifespan 종료 시 호출: 생성된 경우에만 배치 스케줄러/프로세스 풀을 정리"""
+    if _ml_service is not None:
+        await _ml_service.close()
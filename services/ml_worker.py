@@ -0,0 +1,278 @@
+# services/ml_worker.py
+"""
+ML 프로세스 풀 워커에서 실행되는 CPU 바운드 작업(이미지 디코딩/전처리, 모델 predict, 워밍업, 배치 업로드 디코딩).
+
+프로세스 풀(ProcessPoolExecutor)로 넘기므로 모두 pickle 가능한 모듈 최상위 함수/클래스이고,
+모델은 워커 프로세스마다 버전별로 한 번만 로딩해 모듈 전역에 보관한다(spawn 워커가 가볍게 뜨도록 무거운 import 없음).
+ML_WORKERS=0(스레드 모드)이면 같은 함수가 메인 프로세스의 스레드에서 실행되며 모델도 메인 프로세스에 한 번 로딩된다.
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+# 내용 해시(BLAKE2b) 길이(바이트). 저장 파일 이름/예측 캐시 키에는 16진 문자열(2배 길이)로 사용
+CONTENT_HASH_BYTES = 32
+
+# 업로드로 받는 이미지 형식(PIL 이름, utils.upload.IMAGE_EXTENSIONS와 같은 목록). 저장된 업로드는 이 형식 디코더만 시도
+# (모든 플러그인을 시도하면 PCD 등이 작은 mmap 버퍼 끝 너머로 seek 해 ValueError로 실패)
+_UPLOAD_FORMATS = ("PNG", "JPEG", "GIF", "BMP", "WEBP")
+
+# 디코딩을 허용하는 최대 픽셀 수(init_worker로 설정, None: 제한 없음). 헤더의 크기로 픽셀 디코딩 전에 확인해
+# 압축 폭탄/거대 이미지가 워커 메모리를 소진해 프로세스 풀 전체가 깨지지 않게 함
+_max_pixels: Optional[int] = None
+
+# 워커당 보관하는 모델 버전 수: 현재 버전 + 핫 리로드 직전 버전(교체 전에 스케줄된 배치용)
+_MAX_CACHED_MODELS = 2
+
+# 모델 버전 폴더(services/model_manager.py가 만듦, 만든 뒤에는 바뀌지 않음) 안의 파일
+MODEL_FILE = "model.joblib"  # 원본 모델 파일의 사본
+VERSION_FILE = "VERSION"  # 사본의 내용 해시(폴더 이름과 같음). 로딩 후 ModelRef.version과 비교
+FLAT_DIR = "flat"  # ML_ENGINE=flat: FlatForest 배열(.npy). 워커마다 mmap으로 열어 물리 페이지를 공유
+
+# (버전 폴더, 버전, 엔진) → 로딩된 모델(워커 프로세스별 캐시)
+_models: "OrderedDict[tuple[str, str, str], Any]" = OrderedDict()
+_models_lock = threading.Lock()
+
+
+class ImageTooLargeError(ValueError):
+    """이미지 픽셀 수가 상한(ML_MAX_IMAGE_PIXELS)을 초과"""
+
+
+class ModelLoadError(RuntimeError):
+    """모델 파일 자체의 문제로 로딩/변환 실패(깨진 파일, 버전 폴더 불일치 등). 같은 파일로 다시 시도해도 실패함"""
+
+
+def init_worker(max_pixels: Optional[int]) -> None:
+    """워커 초기화(ProcessPoolExecutor initializer. 스레드 모드에서는 메인 프로세스에서 한 번 호출)"""
+    global _max_pixels
+    _max_pixels = max_pixels if max_pixels and max_pixels > 0 else None
+
+
+def _open(fp: Any, formats: Optional[tuple[str, ...]] = None) -> Any:
+    """Image.open + 픽셀 수 상한 확인(헤더만 읽은 상태라 픽셀을 디코딩하기 전에 거절)"""
+    from PIL import Image
+
+    try:
+        im = Image.open(fp, formats=formats)
+    except Image.DecompressionBombError as e:  # PIL 자체 상한(MAX_IMAGE_PIXELS의 2배) 초과
+        raise ImageTooLargeError(str(e)) from None
+    if _max_pixels is not None and im.width * im.height > _max_pixels:
+        im.close()
+        raise ImageTooLargeError(f"image is {im.width}x{im.height}, more than {_max_pixels} pixels")
+    return im
+
+
+@dataclass(frozen=True)
+class ModelRef:
+    """
+    predict 대상 모델(버전 폴더 + 버전). 배치마다 pickle 되어 워커로 전달되고, 워커는 버전별로 캐시한다.
+    path는 버전마다 다른 폴더라 원본 모델 파일이 교체되어도 같은 ModelRef가 다른 모델을 가리키지 않는다.
+    """
+    path: str
+    version: str
+    mmap_mode: Optional[str] = "r"  # flat 엔진 배열을 여는 방식(None: 워커 메모리로 읽음)
+    engine: str = "sklearn"  # "flat": FLAT_DIR의 FlatForest 배열로 예측(prepare_model이 만든 경우)
+
+    def __call__(self, x: Any) -> Any:
+        return predict_batch(self, x)
+
+
+def prepare_model(directory: str, engine: str) -> str:
+    """
+    버전 폴더를 엔진에 맞게 준비하고 실제로 사용할 엔진을 반환(모델 로딩마다 실행기에서 한 번 실행).
+    engine="flat"이면 포레스트를 FlatForest 배열로 변환해 FLAT_DIR에 저장한다(이미 있으면 그대로 사용).
+    scikit-learn 트리는 역직렬화할 때 노드 배열을 자체 버퍼로 복사하므로 joblib mmap으로는 워커 간에 공유되지 않지만,
+    이 배열은 np.load(mmap_mode="r")로 열면 모든 워커가 같은 페이지를 사용한다. flat 미지원 모델이면 "sklearn".
+    """
+    if engine != "flat":
+        return "sklearn"
+    from services.forest_engine import FlatForest
+
+    root = Path(directory)
+    target = root / FLAT_DIR
+    if FlatForest.is_saved(target):
+        return "flat"
+    from joblib import load
+
+    # 신뢰된 파일만 로드(설정된 고정 경로의 사본)
+    try:
+        model = load(root / MODEL_FILE)
+    except Exception as e:
+        raise ModelLoadError(f"cannot load {root / MODEL_FILE}: {e}") from None
+    try:
+        flat = FlatForest.from_estimator(model)
+    except TypeError:
+        return "sklearn"  # 지원하지 않는 모델은 scikit-learn predict 사용
+    part = root / f".{FLAT_DIR}-{uuid.uuid4().hex}"
+    flat.save(part)
+    try:
+        os.rename(part, target)
+    except OSError:  # 다른 프로세스(다른 uvicorn 워커)가 먼저 만듦
+        shutil.rmtree(part, ignore_errors=True)
+    return "flat"
+
+
+def load_model(ref: ModelRef) -> Any:
+    key = (ref.path, ref.version, ref.engine)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = _load(ref)
+                _models[key] = model
+                while len(_models) > _MAX_CACHED_MODELS:
+                    _models.popitem(last=False)
+    return model
+
+
+def _load(ref: ModelRef) -> Any:
+    root = Path(ref.path)
+    # 폴더가 요청한 버전인지 확인(다른 버전을 같은 버전 키로 캐시하지 않음)
+    stored = (root / VERSION_FILE).read_text(encoding="utf-8").strip()
+    if stored != ref.version:
+        raise ModelLoadError(f"model version mismatch: {ref.path} is {stored}, expected {ref.version}")
+    try:
+        if ref.engine == "flat":
+            from services.forest_engine import FlatForest
+
+            return FlatForest.load(root / FLAT_DIR, mmap_mode=ref.mmap_mode)
+        from joblib import load
+
+        return load(root / MODEL_FILE)
+    except Exception as e:  # 역직렬화 실패(잘린 파일, 다른 형식 등)
+        raise ModelLoadError(f"cannot load {ref.path}: {e}") from None
+
+
+def engine_of(model: Any) -> str:
+    from services.forest_engine import FlatForest
+
+    return "flat" if isinstance(model, FlatForest) else "sklearn"
+
+
+def warm_up(ref: ModelRef, rounds: int, batch: int) -> dict[str, Any]:
+    """
+    모델을 로딩하고 더미 입력으로 predict를 돌려 첫 호출 비용을 미리 치름.
+    로딩/워밍업 시간, 실제 엔진, 프로세스 id, 모델 배열이 mmap 공유인지를 반환
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    model = load_model(ref)
+    loaded = time.perf_counter()
+    # 단건/배치 크기를 번갈아 실행(두 코드 경로 모두 예열)
+    for i in range(rounds):
+        model.predict(np.zeros((1 if i % 2 == 0 else batch, 28 * 28), dtype=np.float32))
+    return {"load_seconds": loaded - started, "warmup_seconds": time.perf_counter() - loaded,
+            "engine": engine_of(model), "pid": os.getpid(), "shared": bool(getattr(model, "shared", False))}
+
+
+def _to_row(im: Any, stages: Optional[dict[str, float]] = None) -> Any:
+    """
+    PIL 이미지 → 회색조 28x28 → 평탄화(784,) float32(0..255 범위 유지).
+    stages를 주면 단계별 시간(초)을 기록: decode(픽셀 디코딩), grayscale, resize(배열 변환 포함)
+
+    입력 행은 예측 캐시 키(내용 해시, 모델 버전)에 전처리 방식이 포함되지 않으므로 항상 같은 값이어야 한다.
+    JPEG draft 축소나 reducing_gap은 더 빠르지만 픽셀 값이 달라지므로 사용하지 않는다(단건/배치 예측도 같은 경로).
+    """
+    import numpy as np
+    from PIL import Image
+
+    started = time.perf_counter()
+    im.load()  # 지연 디코딩을 명시적으로 실행(convert가 하던 일을 분리해 시간 측정)
+    decoded = time.perf_counter()
+    im = im.convert("L")
+    converted = time.perf_counter()
+    im = im.resize((28, 28), Image.BILINEAR)
+    row = np.asarray(im, dtype=np.float32).reshape(28 * 28)
+    if stages is not None:
+        stages["decode"] = stages.get("decode", 0.0) + decoded - started
+        stages["grayscale"] = converted - decoded
+        stages["resize"] = time.perf_counter() - converted
+    return row
+
+
+def preprocess(path: str) -> tuple[Any, dict[str, float]]:
+    """저장된 업로드 이미지 → ((784,) float32 입력 행, 워커에서 측정한 단계별 시간(초))"""
+    stages: dict[str, float] = {}
+    started = time.perf_counter()
+    # 파일을 mmap으로 열어 디코더가 페이지 캐시를 직접 읽게 함(파일 전체를 bytes로 복사하지 않음)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        with _open(buf, _UPLOAD_FORMATS) as im:
+            stages["decode"] = time.perf_counter() - started  # 헤더 파싱(이후 픽셀 디코딩 시간을 더함)
+            return _to_row(im, stages), stages
+
+
+def make_thumbnail(src: str, dst: str, size: int, fmt: str) -> None:
+    """원본 이미지를 긴 변이 size 이하가 되도록 비율을 유지해 축소해 fmt(PIL 형식 이름)로 저장"""
+    from PIL import Image
+
+    with _open(src) as im:
+        im.draft(im.mode, (size, size))  # JPEG: 디코딩 단계에서 축소
+        im.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+        if fmt == "JPEG" and im.mode not in ("L", "RGB"):
+            im = im.convert("RGB")
+        im.save(dst, format=fmt)
+
+
+def decode_images(
+    sources: list[Any], allowed_types: frozenset[str], max_bytes: int
+) -> list[tuple[Optional[str], Optional[str], Any]]:
+    """
+    배치 업로드 이미지들을 디코딩. sources 항목은 (파일 경로, None) 또는 (zip 경로, 멤버 이름).
+    항목마다 (내용 해시, 오류 코드, (784,) 입력 행)을 반환하며, 실패한 항목은 해시/행 대신 오류 코드만 채움
+    (한 장이 깨져도 나머지는 계속 처리).
+    """
+    import io
+    import zipfile
+
+    from PIL import Image
+
+    archives: dict[str, zipfile.ZipFile] = {}
+    results: list[tuple[Optional[str], Optional[str], Any]] = []
+    try:
+        for source in sources:
+            try:
+                path, member = source
+                if member is None:
+                    with open(path, "rb") as f:
+                        data = f.read(max_bytes + 1)
+                else:
+                    archive = archives.get(path) or archives.setdefault(path, zipfile.ZipFile(path))
+                    with archive.open(member) as f:
+                        data = f.read(max_bytes + 1)  # 헤더의 크기 정보와 달라도 한도까지만 읽음
+                if len(data) > max_bytes:
+                    results.append((None, "PAYLOAD_TOO_LARGE", None))
+                    continue
+                with _open(io.BytesIO(data)) as im:
+                    if Image.MIME.get(im.format or "") not in allowed_types:
+                        results.append((None, "UNSUPPORTED_MEDIA_TYPE", None))
+                        continue
+                    row = _to_row(im)
+                digest = hashlib.blake2b(data, digest_size=CONTENT_HASH_BYTES).hexdigest()
+                results.append((digest, None, row))
+            except Image.UnidentifiedImageError:
+                results.append((None, "UNSUPPORTED_MEDIA_TYPE", None))
+            except ImageTooLargeError:
+                results.append((None, "PAYLOAD_TOO_LARGE", None))
+            except Exception:  # 디코딩 실패(잘린 파일, 알 수 없는 형식, 압축 해제 오류 등)
+                results.append((None, "INVALID_IMAGE", None))
+    finally:
+        for archive in archives.values():
+            archive.close()
+    return results
+
+
+def predict_batch(ref: ModelRef, x: Any) -> Any:
+    """(N, 784) 입력 → 길이 N 예측 배열"""
+    return load_model(ref).predict(x)
@@ -0,0 +1,267 @@
+# services/model_manager.py
+"""
+ML 모델 수명 주기 관리: 시작 시 로딩 + 워밍업, 버전 보고, 무중단 핫 리로드.
+
+- 버전: 모델 파일 내용의 BLAKE2b 해시. 예측 캐시 키(prediction.model_version)로도 사용한다.
+- 버전 폴더: 로딩할 때 모델 파일을 캐시 폴더(ML_MODEL_CACHE_DIR)로 복사하면서 해시를 계산하고,
+  "{캐시 폴더}/{버전}/"으로 rename 해 고정한다. 워커는 원본 경로가 아니라 이 폴더(ModelRef.path)를 로딩하고
+  폴더의 VERSION이 ModelRef.version과 같은지 확인하므로, 원본이 교체되거나 제자리에서 다시 쓰이는 도중이라도
+  한 버전 키에 다른 모델이 캐시되지 않는다(해시 계산과 로딩이 같은 사본을 읽음).
+- 공유: ML_ENGINE=flat이면 포레스트를 FlatForest 배열(.npy)로 버전 폴더에 한 번 저장하고 워커마다 mmap으로 연다.
+  같은 폴더를 여는 모든 워커 프로세스(ML 프로세스 풀, uvicorn 워커)가 같은 물리 페이지를 사용한다(info()의 shared_memory).
+  scikit-learn 엔진은 트리 역직렬화 시 노드 배열이 복사되므로 워커마다 사본을 가진다.
+- 워밍업: 워커 수만큼 워밍업 작업을 일반 작업으로 보내고 응답한 프로세스 id를 모은다. 한 워커가 작업을 여러 개
+  가져가 빠진 워커가 있으면 모든 워커가 응답할 때까지 다시 보낸다(워커를 붙잡고 기다리지 않으므로 리로드 중에도
+  /ml/predict 배치가 같은 풀에서 계속 처리된다). 끝내 빠진 워커는 첫 배치에서 모델을 로딩한다.
+- 핫 리로드: 모델 파일이 바뀌면(ML_MODEL_WATCH_SECONDS 주기로 확인) 새 버전을 워커에 로딩·워밍업한 뒤
+  predict 대상(ModelRef)을 한 번에 교체한다. 이미 스케줄된 배치는 이전 버전으로 끝나고, 새 파일이 깨져 있으면
+  이전 버전을 그대로 유지한다. 캐시 폴더에는 현재/직전 버전만 남긴다.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from log import logger
+from services import ml_worker
+from services.ml_worker import ModelLoadError, ModelRef
+from utils.metrics import metrics
+
+# (함수, *인자)를 실행기(프로세스 풀/스레드)에서 실행하는 코루틴 함수. 기본: 스레드풀
+Runner = Callable[..., Awaitable[Any]]
+
+# 워밍업 작업을 받지 못한 워커가 있을 때 다시 보내기 전 대기 시간(초)
+_WARMUP_RETRY_SECONDS = 0.05
+
+
+@dataclass(frozen=True)
+class _FileStamp:
+    inode: int  # rename으로 교체되면 바뀜
+    mtime_ns: int
+    size: int
+
+
+def _stamp(path: Path) -> _FileStamp:
+    st = path.stat()
+    return _FileStamp(st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def install_model(src: Path, cache_dir: Path) -> tuple[str, Path]:
+    """
+    모델 파일을 cache_dir로 복사하면서 내용 해시(버전)를 계산하고 "{cache_dir}/{버전}/" 폴더로 고정.
+    (버전, 버전 폴더)를 반환하며, 같은 버전 폴더가 이미 있으면 그대로 사용한다.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    part = cache_dir / f".install-{uuid.uuid4().hex}"
+    part.mkdir()
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(src, "rb") as f, open(part / ml_worker.MODEL_FILE, "wb") as out:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+                out.write(block)
+        version = digest.hexdigest()
+        (part / ml_worker.VERSION_FILE).write_text(version, encoding="utf-8")
+        directory = cache_dir / version
+        if not directory.exists():
+            try:
+                os.rename(part, directory)
+            except OSError:  # 다른 프로세스가 같은 버전을 먼저 고정함
+                pass
+        return version, directory
+    finally:
+        shutil.rmtree(part, ignore_errors=True)
+
+
+def _prune(cache_dir: Path, keep: set[str]) -> None:
+    """keep 외 버전 폴더 삭제(이미 mmap으로 연 워커는 삭제된 파일을 계속 읽을 수 있음)"""
+    for entry in cache_dir.iterdir():
+        if entry.is_dir() and not entry.name.startswith(".") and entry.name not in keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+class ModelManager:
+    def __init__(
+        self,
+        model_path: Path,
+        *,
+        cache_dir: Path,
+        mmap_mode: Optional[str] = "r",
+        engine: str = "sklearn",
+        warmup_rounds: int = 2,
+        warmup_batch: int = 32,
+        workers: int = 1,
+        run: Runner = run_in_threadpool,
+        warmup_timeout: float = 30.0,
+    ) -> None:
+        self.model_path = model_path
+        self.cache_dir = cache_dir
+        self.mmap_mode = mmap_mode
+        self.engine = engine  # 요청한 엔진
+        self.active_engine: Optional[str] = None  # 실제 사용 중인 엔진(flat 미지원 모델이면 sklearn)
+        self.warmup_rounds = max(0, warmup_rounds)
+        self.warmup_batch = max(1, warmup_batch)
+        self.workers = max(1, workers)  # 모델을 로딩할 워커 수(스레드 모드: 1, 프로세스 풀: 풀 크기)
+        self.warmup_timeout = warmup_timeout  # 모든 워커가 응답할 때까지 워밍업 작업을 다시 보내는 시간 한도(초)
+        # 호출할 때마다 현재 실행기를 사용(프로세스 풀이 교체되어도 이전 풀을 붙잡지 않음)
+        self.run = run
+        self.current: Optional[ModelRef] = None
+        self.previous: Optional[ModelRef] = None
+        self.shared_memory: Optional[bool] = None  # 모든 워커가 모델 배열을 mmap으로 공유하는지
+        self.loaded_at: Optional[float] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.reloads = 0
+        self._stamp: Optional[_FileStamp] = None
+        self._lock = asyncio.Lock()
+        self._listeners: list[Callable[[ModelRef], None]] = []
+        self._watch_task: Optional[asyncio.Task] = None
+
+        metrics.gauge("ml_model_load_seconds", "현재 모델 로딩 시간(초, 워커 중 최댓값)",
+                      getter=lambda: self.load_seconds or 0.0)
+        self._reload_total = metrics.counter("ml_model_reloads_total", "핫 리로드로 교체된 횟수")
+        self._reload_failed = metrics.counter("ml_model_reload_failures_total", "새 모델 로딩/워밍업 실패 횟수")
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.current.version if self.current else None
+
+    def on_swap(self, listener: Callable[[ModelRef], None]) -> None:
+        """모델이 (다시) 로딩될 때마다 새 ModelRef로 호출할 콜백 등록(예: 배치 스케줄러의 predict 대상 교체)"""
+        self._listeners.append(listener)
+
+    def info(self) -> dict[str, Any]:
+        # GET /ml/model 응답: 서버 파일 시스템 경로(모델 파일, 버전 폴더)는 넣지 않음
+        return {
+            "version": self.version,
+            "mmap_mode": self.mmap_mode,
+            "engine": self.active_engine,
+            "shared_memory": self.shared_memory,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "reloads": self.reloads,
+        }
+
+    async def ensure_loaded(self) -> ModelRef:
+        """아직 로딩되지 않았으면 로딩 + 워밍업(lifespan 미리 로딩을 끈 경우 첫 요청에서 호출)"""
+        if self.current is None:
+            async with self._lock:
+                if self.current is None:
+                    await self._load()
+        return self.current
+
+    async def warm(self) -> None:
+        """현재 버전을 모든 워커에 다시 로딩·워밍업(교체된 프로세스 풀의 새 워커가 요청 전에 모델을 로딩하도록)"""
+        async with self._lock:
+            if self.current is not None:
+                await self._warm_up(self.current)
+
+    async def reload_if_changed(self) -> bool:
+        """모델 파일이 바뀌었으면 새 버전으로 교체하고 True. 실패하면 이전 버전 유지"""
+        async with self._lock:
+            try:
+                stamp = await run_in_threadpool(_stamp, self.model_path)
+            except FileNotFoundError:
+                return False  # rename 교체 도중이거나 삭제됨: 현재 버전 유지
+            if stamp == self._stamp:
+                return False
+            previous = self.current
+            try:
+                await self._load()
+            except Exception as e:
+                # 파일 자체가 깨졌으면 같은 파일을 반복해서 로딩하지 않음. 풀 교체 등 그 외 실패는 다음 확인 때 다시 시도
+                if isinstance(e, ModelLoadError):
+                    self._stamp = stamp
+                self._reload_failed.inc()
+                logger.warning("ml_model_reload_failed", extra={"context": {
+                    "path": str(self.model_path), "error": str(e), "version": self.version}})
+                return False
+            if previous is not None and previous.version != self.version:
+                self.reloads += 1
+                self._reload_total.inc()
+                logger.info("ml_model_reloaded", extra={"context": {
+                    "from": previous.version, "to": self.version, "load_seconds": self.load_seconds}})
+                return True
+            return False
+
+    async def _warm_up(self, ref: ModelRef) -> list[dict[str, Any]]:
+        # 워커 수만큼 워밍업 작업을 동시에 보내고 응답한 프로세스를 모음(이미 로딩한 워커는 predict 몇 번만 실행)
+        reports: dict[int, dict[str, Any]] = {}
+        deadline = time.monotonic() + self.warmup_timeout
+        while True:
+            for report in await asyncio.gather(*(
+                self.run(ml_worker.warm_up, ref, self.warmup_rounds, self.warmup_batch) for _ in range(self.workers)
+            )):
+                reports.setdefault(report["pid"], report)
+            if len(reports) >= self.workers:
+                return list(reports.values())
+            if time.monotonic() >= deadline:
+                logger.warning("ml_model_warmup_incomplete", extra={"context": {
+                    "version": ref.version, "workers": self.workers, "warmed": len(reports)}})
+                return list(reports.values())
+            # 아직 뜨는 중인 워커(spawn)가 다음 작업을 가져갈 수 있게 잠시 쉼
+            await asyncio.sleep(_WARMUP_RETRY_SECONDS)
+
+    async def _load(self) -> None:
+        stamp = await run_in_threadpool(_stamp, self.model_path)
+        started = time.perf_counter()
+        try:
+            version, directory = await run_in_threadpool(install_model, self.model_path, self.cache_dir)
+        except OSError as e:
+            raise ModelLoadError(f"cannot copy {self.model_path}: {e}") from e
+        # flat 엔진이면 배열 파일을 한 번 만들어 둠(워커는 mmap으로 열기만 함). 미지원 모델이면 sklearn
+        engine = await self.run(ml_worker.prepare_model, directory.as_posix(), self.engine)
+        ref = ModelRef(directory.as_posix(), version, self.mmap_mode, engine)
+        reports = await self._warm_up(ref)
+
+        # 새 버전이 준비된 뒤에만 교체(이전 버전으로 스케줄된 배치는 워커 캐시의 이전 모델로 계속 처리)
+        if self.current is not None and self.current.version != version:
+            self.previous = self.current
+        self.current = ref
+        self._stamp = stamp
+        self.loaded_at = time.time()
+        self.load_seconds = round(max(r["load_seconds"] for r in reports), 4)
+        self.active_engine = engine
+        self.shared_memory = all(r["shared"] for r in reports)
+        self.warmup_seconds = round(time.perf_counter() - started, 4)
+        if engine == "flat" and self.mmap_mode and not self.shared_memory:
+            logger.warning("ml_model_not_shared", extra={"context": {"version": version}})
+        for listener in self._listeners:
+            listener(ref)
+        keep = {version} | ({self.previous.version} if self.previous else set())
+        await run_in_threadpool(_prune, self.cache_dir, keep)
+
+    def start_watching(self, interval: float) -> None:
+        """interval초마다 모델 파일 변경을 확인해 핫 리로드(interval <= 0이면 사용 안 함)"""
+        if interval <= 0 or self._watch_task is not None:
+            return
+
+        async def watch() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.reload_if_changed()
+                except Exception as e:  # 감시 태스크가 죽지 않도록
+                    logger.warning("ml_model_watch_failed", extra={"context": {"error": str(e)}})
+
+        self._watch_task = asyncio.get_running_loop().create_task(watch())
+
+    async def stop_watching(self) -> None:
+        if self._watch_task is None:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
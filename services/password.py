@@ -0,0 +1,126 @@
+# services/password.py
+"""
+비밀번호 해싱/검증 전용 실행기.
+
+bcrypt는 호출당 수백 ms의 CPU를 사용하므로 공용 스레드풀(run_in_threadpool)에서 실행하면
+로그인이 몰릴 때 다른 동기 작업(DB_ASYNC=0 세션 등)까지 밀린다. 이 모듈은
+- 전용 실행기(기본: 프로세스 풀)에서 bcrypt를 실행하고
+- 대기 중인 작업 수를 제한해 가득 차면 즉시 ServerBusyError(503 + Retry-After)로 거절하며
+- 대기열 깊이와 처리 지연 시간을 메트릭으로 노출한다.
+- 워커 프로세스가 죽어(OOM kill 등) 프로세스 풀이 깨지면 새 풀로 교체해 한 번 다시 시도한다
+  (교체한 풀도 실패하면 ServerBusyError).
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+import bcrypt
+
+from env import env
+from error.exceptions import ServerBusyError
+from log import logger
+from utils.metrics import metrics
+
+# bcrypt 비용 인자(2^rounds 반복). 기존 해시는 자신의 비용으로 검증되므로 값을 바꿔도 로그인에 영향 없음
+BCRYPT_ROUNDS = env.get_int("BCRYPT_ROUNDS", 12)
+
+_HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0)
+
+
+# 프로세스 풀에서 실행되므로 모듈 최상위 함수여야 함(pickle 가능)
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        *,
+        mode: str = "process",
+        workers: Optional[int] = None,
+        max_pending: int = 64,
+        rounds: int = BCRYPT_ROUNDS,
+    ) -> None:
+        if mode not in ("process", "thread"):
+            raise ValueError(f"unknown password hasher mode: {mode}")
+        self.mode = mode
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max(1, max_pending)
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+        self._pending = 0  # 실행 중 + 대기 중인 작업 수(이벤트 루프 스레드에서만 변경)
+
+        metrics.gauge("password_hash_queue_depth", "실행 중/대기 중인 해싱 작업 수", getter=lambda: self._pending)
+        self._rejected = metrics.counter("password_hash_rejected_total", "대기열이 가득 차 거절된 요청 수")
+        self._restarts = metrics.counter("password_hash_pool_restarts_total", "깨진 프로세스 풀을 새로 만든 횟수")
+        self._hash_latency = metrics.histogram(
+            "password_hash_seconds", "해싱 대기+실행 시간(초)", buckets=_HASH_BUCKETS)
+        self._verify_latency = metrics.histogram(
+            "password_verify_seconds", "검증 대기+실행 시간(초)", buckets=_HASH_BUCKETS)
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                # spawn: 이벤트 루프/DB 커넥션 스레드가 있는 프로세스를 fork 하지 않음
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                # bcrypt는 GIL을 해제하므로 전용 스레드 풀로도 공용 풀과 분리 가능
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any, latency) -> Any:
+        if self._pending >= self.max_pending:
+            self._rejected.inc()
+            raise ServerBusyError(context={"queue": "password_hash"})
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            for _ in range(2):  # 깨진 풀을 교체하고 한 번만 재시도(bcrypt 작업은 다시 실행해도 안전)
+                executor = self._ensure_executor()
+                try:
+                    return await loop.run_in_executor(executor, fn, *args)
+                except BrokenProcessPool as e:
+                    self._discard_broken(executor, e)
+            raise ServerBusyError(context={"queue": "password_hash", "reason": "worker_pool_broken"})
+        finally:
+            self._pending -= 1
+            latency.observe(time.perf_counter() - started)
+
+    def _discard_broken(self, executor: Executor, error: BaseException) -> None:
+        """깨진 풀을 버림(다음 _ensure_executor가 새로 만듦). 같은 풀에서 실패한 동시 요청들은 한 번만 교체"""
+        if self._executor is not executor:
+            return
+        self._executor = None
+        self._restarts.inc()
+        logger.warning("password_hash_pool_broken", extra={"context": {"error": str(error)}})
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def hash(self, password: str) -> str:
+        return (await self._submit(_hash, password.encode(), self.rounds, latency=self._hash_latency)).decode()
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit(_check, password.encode(), hashed.encode(), latency=self._verify_latency)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    mode=env.get("PASSWORD_HASHER_MODE", "process"),
+    workers=env.get_int("PASSWORD_HASHER_WORKERS", 0) or None,
+    max_pending=env.get_int("PASSWORD_HASHER_MAX_PENDING", 64),
+)
@@ -0,0 +1,281 @@
+# services/storage.py
+"""
+업로드 이미지 객체 저장소: 인터페이스(ObjectStorage)와 백엔드.
+
+- 키: 내용 주소 "{hash 앞 2글자}/{hash}{ext}" (object_key). 해시 앞 글자로 디렉터리/프리픽스를 나눠
+  한 디렉터리에 파일이 몰리지 않게 한다. 내용이 같으면 키도 같으므로 객체는 한 번만 쓰고 이후에는 바뀌지 않는다.
+- LocalStorage(ML_STORAGE_BACKEND=local, 기본): 로컬 디렉터리(S3/). 같은 파일시스템의 임시 파일을 hard link로
+  붙여 원자적으로 저장(이미 있으면 아무것도 하지 않음).
+- S3Storage(ML_STORAGE_BACKEND=s3): S3 호환 API(boto3, 선택 의존성 `uv sync --group s3`).
+  ML_S3_ENDPOINT_URL로 MinIO, moto 서버 같은 로컬 대체 서버를 지정할 수 있고, 인증 정보는 boto3 기본 체인
+  (AWS_ACCESS_KEY_ID 등 환경 변수, ~/.aws) 사용. 여러 노드가 같은 버킷을 공유한다.
+- 모든 I/O는 스레드풀에서 실행하므로 이벤트 루프를 막지 않는다.
+- 사용자별 업로드 목록은 저장소를 나열하지 않고 DB의 소유 기록(images 테이블, owner_id 인덱스)으로 조회한다
+  (MLService.list_images).
+"""
+from __future__ import annotations
+
+import os
+import shutil
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from env import env
+
+ML_STORAGE_BACKEND = env.get("ML_STORAGE_BACKEND", "local").strip().lower()
+ML_S3_BUCKET = env.get("ML_S3_BUCKET", "")
+ML_S3_PREFIX = env.get("ML_S3_PREFIX", "")
+ML_S3_ENDPOINT_URL = env.get("ML_S3_ENDPOINT_URL", "") or None
+ML_S3_REGION = env.get("ML_S3_REGION", "") or None
+
+# stream() 기본 청크 크기
+STREAM_CHUNK_BYTES = 256 * 1024
+
+
+def object_key(filename: str) -> str:
+    """저장 파일 이름({content_hash}{ext}) → 객체 키"""
+    return f"{filename[:2]}/{filename}"
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    key: str
+    size: int
+    last_modified: float  # epoch seconds
+    etag: Optional[str] = None  # 백엔드가 제공하는 경우(S3)
+
+
+class ObjectStorage(ABC):
+    """객체 저장소 인터페이스. 키가 없으면 get/stream/download/stat은 FileNotFoundError"""
+
+    @abstractmethod
+    async def put(self, key: str, src: Path, *, content_type: str) -> bool:
+        """src 파일 내용을 key로 저장(src는 그대로 둠). 이미 같은 키가 있으면 쓰지 않고 False"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def stat(self, key: str) -> ObjectInfo: ...
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes: ...
+
+    @abstractmethod
+    def stream(
+        self, key: str, *, start: int = 0, end: Optional[int] = None, chunk_size: int = STREAM_CHUNK_BYTES
+    ) -> AsyncIterator[bytes]:
+        """[start, end) 범위를 chunk_size 단위로 읽음(end=None이면 끝까지)"""
+
+    @abstractmethod
+    async def download(self, key: str, dst: Path) -> None:
+        """객체를 로컬 파일 dst로 내려받음"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def uri(self, key: str) -> str:
+        """응답/로그에 표시할 객체 위치"""
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """객체가 로컬 파일이면 그 경로(FileResponse/워커가 직접 읽음), 원격 저장소면 None"""
+        return None
+
+
+def _link_or_copy(src: Path, dst: Path) -> bool:
+    if dst.exists():
+        return False
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+        return True
+    except FileExistsError:
+        return False  # 동시에 같은 내용이 저장됨
+    except OSError:
+        pass  # hard link를 지원하지 않는 파일시스템/다른 장치: 복사 후 rename
+    part = dst.with_name(f".{dst.name}.part")
+    shutil.copyfile(src, part)
+    os.replace(part, dst)
+    return True
+
+
+def _read_range(path: Path, start: int, end: Optional[int], chunk_size: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else max(0, end - start)
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                return
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+class LocalStorage(ObjectStorage):
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        # 키는 object_key 형식("xx/name")만 허용(경로 조작 방지)
+        parts = Path(key).parts
+        if len(parts) != 2 or any(p in ("", ".", "..") for p in parts):
+            raise ValueError(f"invalid object key: {key!r}")
+        return self.root / key
+
+    async def put(self, key: str, src: Path, *, content_type: str) -> bool:
+        return await run_in_threadpool(_link_or_copy, src, self._path(key))
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self._path(key).is_file)
+
+    async def stat(self, key: str) -> ObjectInfo:
+        st = await run_in_threadpool(self._path(key).stat)
+        return ObjectInfo(key=key, size=st.st_size, last_modified=st.st_mtime)
+
+    async def get(self, key: str) -> bytes:
+        return await run_in_threadpool(self._path(key).read_bytes)
+
+    async def stream(
+        self, key: str, *, start: int = 0, end: Optional[int] = None, chunk_size: int = STREAM_CHUNK_BYTES
+    ) -> AsyncIterator[bytes]:
+        chunks = _read_range(self._path(key), start, end, chunk_size)
+        try:
+            while chunk := await run_in_threadpool(next, chunks, b""):
+                yield chunk
+        finally:
+            chunks.close()
+
+    async def download(self, key: str, dst: Path) -> None:
+        await run_in_threadpool(shutil.copyfile, self._path(key), dst)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self._path(key).unlink, missing_ok=True)
+
+    def uri(self, key: str) -> str:
+        return self._path(key).as_posix()
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self._path(key)
+
+
+class S3Storage(ObjectStorage):
+    def __init__(
+        self, bucket: str, *, prefix: str = "", endpoint_url: Optional[str] = None, region: Optional[str] = None
+    ) -> None:
+        if not bucket:
+            raise ValueError("ML_S3_BUCKET is required for the s3 storage backend")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self._client_instance: Any = None
+
+    def _client(self) -> Any:
+        # boto3는 import 비용이 크고 선택 의존성이므로 처음 사용할 때 로딩(클라이언트는 스레드 간 공유 가능)
+        if self._client_instance is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError("s3 storage backend requires boto3 (uv sync --group s3)") from e
+            self._client_instance = boto3.client("s3", endpoint_url=self.endpoint_url, region_name=self.region)
+        return self._client_instance
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    @staticmethod
+    def _is_missing(e: Exception) -> bool:
+        code = str(getattr(e, "response", {}).get("Error", {}).get("Code", ""))
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self._client().head_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as e:
+            if self._is_missing(e):
+                return None
+            raise
+
+    def _put(self, key: str, src: Path, content_type: str) -> bool:
+        if self._head(key) is not None:
+            return False
+        # upload_file: 큰 파일은 멀티파트로 나눠 병렬 업로드
+        self._client().upload_file(
+            src.as_posix(), self.bucket, self._key(key), ExtraArgs={"ContentType": content_type})
+        return True
+
+    async def put(self, key: str, src: Path, *, content_type: str) -> bool:
+        return await run_in_threadpool(self._put, key, src, content_type)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self._head, key) is not None
+
+    async def stat(self, key: str) -> ObjectInfo:
+        head = await run_in_threadpool(self._head, key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return ObjectInfo(
+            key=key, size=head["ContentLength"], last_modified=head["LastModified"].timestamp(), etag=head.get("ETag"))
+
+    def _get_object(self, key: str, byte_range: Optional[str] = None) -> Any:
+        kwargs = {"Range": byte_range} if byte_range else {}
+        try:
+            return self._client().get_object(Bucket=self.bucket, Key=self._key(key), **kwargs)
+        except Exception as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    async def get(self, key: str) -> bytes:
+        obj = await run_in_threadpool(self._get_object, key)
+        return await run_in_threadpool(obj["Body"].read)
+
+    async def stream(
+        self, key: str, *, start: int = 0, end: Optional[int] = None, chunk_size: int = STREAM_CHUNK_BYTES
+    ) -> AsyncIterator[bytes]:
+        byte_range = None
+        if start or end is not None:
+            if end is not None and end <= start:
+                return
+            byte_range = f"bytes={start}-{'' if end is None else end - 1}"
+        obj = await run_in_threadpool(self._get_object, key, byte_range)
+        body = obj["Body"]
+        chunks = body.iter_chunks(chunk_size)
+        try:
+            while chunk := await run_in_threadpool(next, chunks, b""):
+                yield chunk
+        finally:
+            body.close()
+
+    def _download(self, key: str, dst: Path) -> None:
+        try:
+            self._client().download_file(self.bucket, self._key(key), dst.as_posix())
+        except Exception as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    async def download(self, key: str, dst: Path) -> None:
+        await run_in_threadpool(self._download, key, dst)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(lambda: self._client().delete_object(Bucket=self.bucket, Key=self._key(key)))
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+
+def create_storage(root: Path) -> ObjectStorage:
+    """설정(ML_STORAGE_BACKEND)에 맞는 저장소. root는 로컬 저장소 디렉터리(원격 저장소면 임시 파일/로컬 사본 위치)"""
+    if ML_STORAGE_BACKEND == "s3":
+        return S3Storage(ML_S3_BUCKET, prefix=ML_S3_PREFIX, endpoint_url=ML_S3_ENDPOINT_URL, region=ML_S3_REGION)
+    if ML_STORAGE_BACKEND != "local":
+        raise ValueError(f"unknown ML_STORAGE_BACKEND: {ML_STORAGE_BACKEND!r} (local | s3)")
+    return LocalStorage(root)
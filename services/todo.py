@@ -1,82 +1,483 @@
 # services/todo.py
-from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from schemas.todo import Todo, CreateTodoInput, UpdateTodoInput
-from error.exceptions import TodoNotFoundError, UserNotFoundError
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import AsyncIterator, Collection, Hashable, Optional
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete, func, literal_column, table, column
+from sqlalchemy.exc import IntegrityError
+from schemas.todo import Todo, CreateTodoInput, UpdateTodoInput, BatchUpdateTodoItem
+from error.exceptions import TodoNotFoundError, UserNotFoundError, PreconditionFailedError
 from model import TodoTable, UserTable
+from db import open_session, shard_for, is_foreign_key_violation, TODO_FTS_TABLE
+from db_writer import run_write
+from db_shard import user_directory
+from env import env
+from utils.metrics import metrics
+
+# 스트리밍 시 한 번에 읽어오는 행 수(keyset 청크 크기)
+TODO_STREAM_CHUNK = env.get_int("TODO_STREAM_CHUNK", 500)
 
 
 def _to_todo_schema(row: TodoTable) -> Todo:
     return Todo.model_validate(row)
 
 
+# ---- 전문 검색(FTS5) ----
+_todo_fts = table(TODO_FTS_TABLE, column("rowid"))
+_todo_fts_ref = literal_column(TODO_FTS_TABLE)
+# bm25 컬럼 가중치(title, description): 제목 일치를 더 높게 평가
+_BM25_WEIGHTS = (2.0, 1.0)
+
+
+def _fts_query(q: str) -> Optional[str]:
+    """
+    사용자 입력을 FTS5 MATCH 식으로 변환.
+    FTS 문법(AND/OR/NEAR/컬럼 필터 등)이 그대로 해석되지 않도록 토큰마다 큰따옴표로 감싸고(AND 결합),
+    끝이 '*'인 토큰만 접두 검색으로 허용.
+    """
+    terms = []
+    for token in q.split():
+        prefix = token.endswith("*")
+        token = token.rstrip("*")
+        if not token:
+            continue
+        terms.append('"' + token.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms) or None
+
+
+# ---- 읽기 캐시 ----
+# 사용자(owner_id) 단위로 항목을 관리하고, 해당 사용자의 쓰기가 commit되면 전체를 무효화(write-through invalidation).
+# 값은 직렬화된 JSON(bytes)으로 저장하므로 공유 캐시(Redis 등)로 그대로 옮길 수 있다.
+# 주의: 기본 백엔드는 프로세스 내 캐시이므로 멀티 워커 배포에서는 다른 워커의 쓰기가 TTL 동안 반영되지 않을 수 있음.
+
+
+class TodoCacheBackend(ABC):
+    """캐시 백엔드 인터페이스(공유 캐시 구현 시 이 클래스를 구현)"""
+
+    @abstractmethod
+    async def get(self, owner_id: int, key: Hashable) -> Optional[bytes]: ...
+
+    @abstractmethod
+    async def set(self, owner_id: int, key: Hashable, value: bytes, *, generation: int) -> None:
+        """generation이 현재 값과 다르면(조회 도중 무효화됨) 저장하지 않음"""
+
+    @abstractmethod
+    async def generation(self, owner_id: int) -> int: ...
+
+    @abstractmethod
+    async def invalidate(self, owner_id: int) -> None: ...
+
+
+class InMemoryLRUBackend(TodoCacheBackend):
+    """프로세스 내 LRU + TTL + 메모리 상한 캐시"""
+
+    # 항목당 키/튜플 등 부가 메모리 추정치(bytes)
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, *, max_entries: int, max_bytes: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries: OrderedDict[tuple[int, Hashable], tuple[float, bytes]] = OrderedDict()
+        self._owner_keys: dict[int, set[Hashable]] = {}
+        self._generations: OrderedDict[int, int] = OrderedDict()
+        self._bytes = 0
+
+        self.hits = metrics.counter("todo_cache_hits_total", "todo 캐시 적중 수")
+        self.misses = metrics.counter("todo_cache_misses_total", "todo 캐시 미스 수")
+        self.evictions = metrics.counter("todo_cache_evictions_total", "용량 초과로 제거된 항목 수")
+        self.expirations = metrics.counter("todo_cache_expirations_total", "TTL 만료로 제거된 항목 수")
+        self.invalidations = metrics.counter("todo_cache_invalidations_total", "쓰기로 인한 사용자 단위 무효화 수")
+        metrics.gauge("todo_cache_entries", "캐시 항목 수", getter=lambda: len(self._entries))
+        metrics.gauge("todo_cache_bytes", "캐시 사용 메모리 추정치", getter=lambda: self._bytes)
+
+    async def get(self, owner_id: int, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get((owner_id, key))
+        if entry is None:
+            self.misses.inc()
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._remove((owner_id, key))
+            self.expirations.inc()
+            self.misses.inc()
+            return None
+        self._entries.move_to_end((owner_id, key))
+        self.hits.inc()
+        return value
+
+    async def set(self, owner_id: int, key: Hashable, value: bytes, *, generation: int) -> None:
+        if self._generations.get(owner_id, 0) != generation:
+            return
+        size = len(value) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        self._remove((owner_id, key))
+        self._entries[(owner_id, key)] = (time.monotonic() + self.ttl, value)
+        self._owner_keys.setdefault(owner_id, set()).add(key)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions.inc()
+
+    async def generation(self, owner_id: int) -> int:
+        return self._generations.get(owner_id, 0)
+
+    async def invalidate(self, owner_id: int) -> None:
+        self._generations[owner_id] = self._generations.get(owner_id, 0) + 1
+        self._generations.move_to_end(owner_id)
+        # 세대 기록도 무한히 늘어나지 않도록 상한 유지
+        while len(self._generations) > self.max_entries:
+            self._generations.popitem(last=False)
+        for key in self._owner_keys.pop(owner_id, set()):
+            entry = self._entries.pop((owner_id, key), None)
+            if entry is not None:
+                self._bytes -= len(entry[1]) + self.ENTRY_OVERHEAD
+        self.invalidations.inc()
+
+    def _remove(self, full_key: tuple[int, Hashable]) -> None:
+        entry = self._entries.pop(full_key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry[1]) + self.ENTRY_OVERHEAD
+        owner_id, key = full_key
+        keys = self._owner_keys.get(owner_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._owner_keys[owner_id]
+
+
+_todo_page_adapter = TypeAdapter(tuple[list[Todo], Optional[int]])
+
+
+class TodoCache:
+    """TodoService가 사용하는 캐시 파사드(비활성화 시 모든 조회가 미스)"""
+
+    def __init__(self, backend: Optional[TodoCacheBackend]) -> None:
+        self.backend = backend
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def generation(self, owner_id: int) -> int:
+        return await self.backend.generation(owner_id) if self.backend else 0
+
+    async def get_todo(self, owner_id: int, todo_id: int) -> Optional[Todo]:
+        if not self.backend:
+            return None
+        raw = await self.backend.get(owner_id, ("todo", todo_id))
+        return Todo.model_validate_json(raw) if raw is not None else None
+
+    async def set_todo(self, owner_id: int, todo: Todo, *, generation: int) -> None:
+        if self.backend:
+            await self.backend.set(owner_id, ("todo", todo.id), todo.model_dump_json().encode(), generation=generation)
+
+    async def get_page(self, owner_id: int, limit: Optional[int], after: Optional[int]):
+        if not self.backend:
+            return None
+        raw = await self.backend.get(owner_id, ("page", limit, after))
+        return _todo_page_adapter.validate_json(raw) if raw is not None else None
+
+    async def set_page(self, owner_id: int, limit: Optional[int], after: Optional[int], page, *, generation: int) -> None:
+        if self.backend:
+            await self.backend.set(owner_id, ("page", limit, after), _todo_page_adapter.dump_json(page), generation=generation)
+
+    async def invalidate(self, owner_id: int) -> None:
+        if self.backend:
+            await self.backend.invalidate(owner_id)
+
+
+def _build_cache() -> TodoCache:
+    if not env.get_bool("TODO_CACHE_ENABLED", False):
+        return TodoCache(None)
+    return TodoCache(InMemoryLRUBackend(
+        max_entries=env.get_int("TODO_CACHE_MAX_ENTRIES", 10000),
+        max_bytes=env.get_int("TODO_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        ttl_seconds=env.get_float("TODO_CACHE_TTL_SECONDS", 30.0),
+    ))
+
+
+todo_cache = _build_cache()
+
+
 class TodoService:
-    def __init__(self):
-        pass
-
-    def create_todo(self, payload: CreateTodoInput, *, user_id: int, db: Session) -> Todo:
-        # 사용자 존재 검증 FK 오류 방지를 위한 사전 검증
-        user = db.execute(select(UserTable).where(
-            UserTable.id == user_id)).scalar_one_or_none()
-        if not user:
-            raise UserNotFoundError(context={"user_id": user_id})
+    def __init__(self, cache: TodoCache = todo_cache):
+        self.cache = cache
+
+    @staticmethod
+    async def _new_ids(count: int) -> list[dict]:
+        """샤딩 모드에서는 샤드 간 이동에도 겹치지 않는 전역 todo id를 미리 발급(단일 DB면 SQLite가 할당)"""
+        if not user_directory.enabled:
+            return [{} for _ in range(count)]
+        return [{"id": todo_id} for todo_id in await user_directory.allocate_todo_ids(count)]
 
-        row = TodoTable(
+    async def create_todo(self, payload: CreateTodoInput, *, user_id: int, db: AsyncSession) -> Todo:
+        (new_id,) = await self._new_ids(1)
+        stmt = insert(TodoTable).values(
+            **new_id,
             title=payload.title,
             description=payload.description,
             completed=payload.completed,
             owner_id=user_id,
-        )
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-        return _to_todo_schema(row)
+        ).returning(TodoTable)
 
-    def get_todo(self, todo_id: int, *, user_id: int, db: Session) -> Todo:
-        row = db.execute(
-            select(TodoTable).where(TodoTable.id ==
-                                    todo_id, TodoTable.owner_id == user_id)
-        ).scalar_one_or_none()
-        if not row:
-            raise TodoNotFoundError(context={"todo_id": todo_id})
-        return _to_todo_schema(row)
-
-    def get_all_todos(self, *, user_id: int, db: Session) -> list[Todo]:
-        rows = db.execute(
-            select(TodoTable).where(TodoTable.owner_id ==
-                                    user_id).order_by(TodoTable.id)
-        ).scalars().all()
-        return [
-            _to_todo_schema(row) for row in rows
-        ]
+        async def op(s: AsyncSession) -> Todo:
+            # INSERT ... RETURNING 한 번으로 생성(사용자 존재 여부는 FK 제약으로 검증)
+            try:
+                row = (await s.execute(stmt)).scalar_one()
+            except IntegrityError as e:
+                if is_foreign_key_violation(e):
+                    raise UserNotFoundError(context={"user_id": user_id}) from e
+                raise
+            return _to_todo_schema(row)
+
+        todo = await run_write(db, op)
+        await self.cache.invalidate(user_id)
+        return todo
+
+    async def get_todo(self, todo_id: int, *, user_id: int, db: AsyncSession) -> Todo:
+        cached = await self.cache.get_todo(user_id, todo_id)
+        if cached is not None:
+            return cached
+        generation = await self.cache.generation(user_id)
 
-    def update_todo(self, todo_id: int, payload: UpdateTodoInput, *, user_id: int, db: Session) -> Todo:
-        row = db.execute(
+        row = (await db.execute(
             select(TodoTable).where(TodoTable.id ==
                                     todo_id, TodoTable.owner_id == user_id)
-        ).scalar_one_or_none()
+        )).scalar_one_or_none()
         if not row:
             raise TodoNotFoundError(context={"todo_id": todo_id})
+        todo = _to_todo_schema(row)
+        await self.cache.set_todo(user_id, todo, generation=generation)
+        return todo
+
+    async def get_todo_page(
+        self, *, user_id: int, db: AsyncSession, limit: Optional[int] = None, after: Optional[int] = None
+    ) -> tuple[list[Todo], Optional[int]]:
+        """
+        keyset(TodoTable.id) 기반 페이지 조회.
+        limit이 없으면 전체를 반환하고, 다음 페이지가 있으면 마지막 id를 next cursor로 함께 반환.
+        """
+        cached = await self.cache.get_page(user_id, limit, after)
+        if cached is not None:
+            return cached
+        generation = await self.cache.generation(user_id)
+
+        page = await self._fetch_page(user_id=user_id, db=db, limit=limit, after=after)
+        await self.cache.set_page(user_id, limit, after, page, generation=generation)
+        return page
+
+    async def stream_todos(self, *, user_id: int, after: Optional[int] = None) -> AsyncIterator[Todo]:
+        """
+        전체 todo를 keyset 청크 단위로 읽어 하나씩 내보냄(메모리 사용량이 목록 크기와 무관).
+        응답 스트리밍 동안 커넥션/읽기 lock을 오래 잡지 않도록 청크마다 짧은 세션을 사용.
+        청크는 캐시에 저장하지 않음.
+        """
+        cursor = after
+        while True:
+            async with open_session(shard_for(user_id)) as db:
+                todos, cursor = await self._fetch_page(
+                    user_id=user_id, db=db, limit=TODO_STREAM_CHUNK, after=cursor)
+            for todo in todos:
+                yield todo
+            if cursor is None:
+                return
+
+    async def _fetch_page(
+        self, *, user_id: int, db: AsyncSession, limit: Optional[int], after: Optional[int]
+    ) -> tuple[list[Todo], Optional[int]]:
+        stmt = select(TodoTable).where(TodoTable.owner_id == user_id)
+        if after is not None:
+            stmt = stmt.where(TodoTable.id > after)
+        stmt = stmt.order_by(TodoTable.id)
+        if limit is not None:
+            # 다음 페이지 존재 여부 판단을 위해 1개 더 조회
+            stmt = stmt.limit(limit + 1)
+        rows = (await db.execute(stmt)).scalars().all()
+
+        next_cursor: Optional[int] = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1].id
+        return [_to_todo_schema(row) for row in rows], next_cursor
+
+    async def search_todos(
+        self, q: str, *, user_id: int, db: AsyncSession, limit: int, offset: int = 0
+    ) -> tuple[list[Todo], Optional[int]]:
+        """
+        title/description 전문 검색. bm25 점수순(동점은 id순)으로 정렬하고 호출자의 todo로 한정.
+        반환: (todo 목록, 다음 페이지 offset 또는 None)
+        """
+        match = _fts_query(q)
+        if match is None:
+            return [], None
+        rank = func.bm25(_todo_fts_ref, *_BM25_WEIGHTS)
+        stmt = (
+            select(TodoTable)
+            .join(_todo_fts, _todo_fts.c.rowid == TodoTable.id)
+            .where(_todo_fts_ref.op("MATCH")(match), TodoTable.owner_id == user_id)
+            .order_by(rank, TodoTable.id)
+            .limit(limit + 1)  # 다음 페이지 존재 여부 판단용
+            .offset(offset)
+        )
+        rows = (await db.execute(stmt)).scalars().all()
+        next_offset = offset + limit if len(rows) > limit else None
+        return [_to_todo_schema(row) for row in rows[:limit]], next_offset
+
+    async def get_todos_version(self, *, user_id: int, db: AsyncSession) -> int:
+        """todo 목록의 리비전(todo 생성/수정/삭제 시 트리거로 증가). 목록 ETag 계산용."""
+        version = await db.scalar(select(UserTable.todos_version).where(UserTable.id == user_id))
+        if version is None:
+            raise UserNotFoundError(context={"user_id": user_id})
+        return version
 
+    async def update_todo(
+        self,
+        todo_id: int,
+        payload: UpdateTodoInput,
+        *,
+        user_id: int,
+        db: AsyncSession,
+        expected_versions: Optional[Collection[int]] = None,
+    ) -> Todo:
+        """expected_versions가 주어지면(If-Match) 현재 version이 그 중 하나일 때만 갱신."""
         changes = payload.model_dump(exclude_unset=True)
-        for k, v in changes.items():
-            setattr(row, k, v)
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-        return _to_todo_schema(row)
-
-    def delete_todo(self, todo_id: int, *, user_id: int, db: Session) -> None:
-        row = db.execute(
-            select(TodoTable).where(TodoTable.id ==
-                                    todo_id, TodoTable.owner_id == user_id)
-        ).scalar_one_or_none()
-        if not row:
-            raise TodoNotFoundError(context={"todo_id": todo_id})
-        db.delete(row)
-        db.commit()
+        where = [TodoTable.id == todo_id, TodoTable.owner_id == user_id]
+        if expected_versions is not None:
+            where.append(TodoTable.version.in_(expected_versions))
+        if changes:
+            # UPDATE ... RETURNING 한 번으로 갱신 + 결과 조회(version 증가 포함)
+            stmt = (
+                update(TodoTable).where(*where)
+                .values(**changes, version=TodoTable.version + 1)
+                .returning(TodoTable)
+            )
+        else:
+            stmt = select(TodoTable).where(*where)
+
+        async def op(s: AsyncSession) -> Todo:
+            row = (await s.execute(stmt)).scalar_one_or_none()
+            if not row:
+                await self._raise_missing(s, todo_id, user_id=user_id, conditional=expected_versions is not None)
+            return _to_todo_schema(row)
+
+        todo = await run_write(db, op)
+        await self.cache.invalidate(user_id)
+        return todo
+
+    async def delete_todo(
+        self,
+        todo_id: int,
+        *,
+        user_id: int,
+        db: AsyncSession,
+        expected_versions: Optional[Collection[int]] = None,
+    ) -> None:
+        where = [TodoTable.id == todo_id, TodoTable.owner_id == user_id]
+        if expected_versions is not None:
+            where.append(TodoTable.version.in_(expected_versions))
+        stmt = delete(TodoTable).where(*where).returning(TodoTable.id)
+
+        async def op(s: AsyncSession) -> None:
+            if (await s.execute(stmt)).scalar_one_or_none() is None:
+                await self._raise_missing(s, todo_id, user_id=user_id, conditional=expected_versions is not None)
+
+        await run_write(db, op)
+        await self.cache.invalidate(user_id)
+
+    @staticmethod
+    async def _raise_missing(s: AsyncSession, todo_id: int, *, user_id: int, conditional: bool) -> None:
+        """조건부 갱신이 0행이면 행 존재 여부로 404(없음)와 412(버전 불일치)를 구분"""
+        if conditional:
+            exists = await s.scalar(
+                select(TodoTable.id).where(TodoTable.id == todo_id, TodoTable.owner_id == user_id))
+            if exists is not None:
+                raise PreconditionFailedError(context={"todo_id": todo_id})
+        raise TodoNotFoundError(context={"todo_id": todo_id})
+
+    # ---- 일괄 처리: 항목 수와 무관하게 한 트랜잭션 + 소수의 SQL 문으로 처리 ----
+
+    async def create_todos(self, payloads: list[CreateTodoInput], *, user_id: int, db: AsyncSession) -> list[Todo]:
+        """다중 행 INSERT ... RETURNING 한 번으로 생성. 입력 순서대로 결과 반환."""
+        values = [
+            {
+                **new_id,
+                "title": p.title,
+                "description": p.description,
+                "completed": p.completed,
+                "owner_id": user_id,
+            }
+            for p, new_id in zip(payloads, await self._new_ids(len(payloads)))
+        ]
+
+        async def op(s: AsyncSession) -> list[Todo]:
+            try:
+                rows = (await s.execute(
+                    insert(TodoTable).returning(TodoTable, sort_by_parameter_order=True),
+                    values,
+                )).scalars().all()
+            except IntegrityError as e:
+                if is_foreign_key_violation(e):
+                    raise UserNotFoundError(context={"user_id": user_id}) from e
+                raise
+            return [_to_todo_schema(row) for row in rows]
+
+        todos = await run_write(db, op)
+        await self.cache.invalidate(user_id)
+        return todos
+
+    async def update_todos(
+        self, items: list[BatchUpdateTodoItem], *, user_id: int, db: AsyncSession
+    ) -> list[Optional[Todo]]:
+        """
+        같은 변경 내용을 가진 항목끼리 묶어 UPDATE ... WHERE id IN (...) RETURNING 으로 처리.
+        입력 순서대로 결과를 반환하며, 존재하지 않거나 소유하지 않은 항목은 None.
+        """
+        groups: dict[tuple, list[int]] = {}
+        for item in items:
+            changes = item.model_dump(exclude_unset=True, exclude={"id"})
+            groups.setdefault(tuple(sorted(changes.items())), []).append(item.id)
+
+        async def op(s: AsyncSession) -> list[Optional[Todo]]:
+            found: dict[int, Todo] = {}
+            for changes, ids in groups.items():
+                if changes:
+                    stmt = (
+                        update(TodoTable)
+                        .where(TodoTable.id.in_(ids), TodoTable.owner_id == user_id)
+                        .values(**dict(changes), version=TodoTable.version + 1)
+                        .returning(TodoTable)
+                    )
+                else:
+                    # 변경 사항이 없으면 존재 여부만 확인
+                    stmt = select(TodoTable).where(
+                        TodoTable.id.in_(ids), TodoTable.owner_id == user_id)
+                for row in (await s.execute(stmt)).scalars().all():
+                    found[row.id] = _to_todo_schema(row)
+            return [found.get(item.id) for item in items]
+
+        todos = await run_write(db, op)
+        await self.cache.invalidate(user_id)
+        return todos
+
+    async def delete_todos(self, todo_ids: list[int], *, user_id: int, db: AsyncSession) -> list[bool]:
+        """DELETE ... WHERE id IN (...) AND owner_id = ? 한 번으로 삭제. 항목별 삭제 여부 반환."""
+        async def op(s: AsyncSession) -> list[bool]:
+            deleted = set((await s.execute(
+                delete(TodoTable)
+                .where(TodoTable.id.in_(todo_ids), TodoTable.owner_id == user_id)
+                .returning(TodoTable.id)
+            )).scalars().all())
+            return [todo_id in deleted for todo_id in todo_ids]
 
+        deleted = await run_write(db, op)
+        await self.cache.invalidate(user_id)
+        return deleted
 
 # 싱글톤 서비스 인스턴스 (추후 DI 컨테이너/Repo 교체 지점)
 todo_service = TodoService()
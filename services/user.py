@@ -1,77 +1,186 @@
 # services/user.py
-import bcrypt
-from typing import Optional
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import json
+from typing import Collection, Optional
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.user import User, CreateUserInput, UpdateUserInput, LoginUserInput
-from error.exceptions import UserAlreadyExistsError, LoginFailedError, UserNotFoundError
+from error.exceptions import UserAlreadyExistsError, LoginFailedError, UserNotFoundError, PreconditionFailedError
 from model import UserTable, TodoTable
-
-
-def _todo_id_list(db: Session, user_id: int) -> list[int]:
-    rows = db.execute(
-        select(TodoTable.id).where(TodoTable.owner_id == user_id).order_by(TodoTable.id)
-    ).scalars().all()
-    return list(rows)
-
-
-def _to_user_schema(row: UserTable, *, db: Session | None = None, with_todo_ids: bool = True) -> User:
-    todo_ids: list[int] = []
-    if with_todo_ids and db is not None:
-        todo_ids = _todo_id_list(db, row.id)
-    return User(id=row.id, name=row.name, password=row.password, todo_id_list=todo_ids)
+from db import is_unique_violation
+from db_writer import run_write
+from db_shard import user_directory
+from services.todo import todo_cache
+from services.password import password_hasher
+
+
+def _todo_ids_column():
+    """
+    사용자의 todo id 목록을 JSON 배열 한 칸으로 집계하는 상관 서브쿼리.
+    사용자 조회와 같은 SELECT 안에서 계산되어 추가 왕복/ORM 객체 생성이 없다(owner_id 인덱스 사용).
+    """
+    ids = (
+        select(TodoTable.id).where(TodoTable.owner_id == UserTable.id)
+        .order_by(TodoTable.id).correlate(UserTable).subquery()
+    )
+    return select(func.json_group_array(ids.c.id)).scalar_subquery().label("todo_ids")
+
+
+async def _select_user(db: AsyncSession, *where, with_todo_ids: bool) -> Optional[User]:
+    """조건에 맞는 사용자 한 명을 조회. with_todo_ids=True면 todo id 목록을 같은 쿼리에서 집계"""
+    if not with_todo_ids:
+        row = (await db.execute(select(UserTable).where(*where))).scalar_one_or_none()
+        return _to_user_schema(row) if row else None
+    result = (await db.execute(select(UserTable, _todo_ids_column()).where(*where))).one_or_none()
+    if result is None:
+        return None
+    row, todo_ids = result
+    return _to_user_schema(row, todo_ids=json.loads(todo_ids))
+
+
+def _to_user_schema(row: UserTable, *, todo_ids: Optional[list[int]] = None) -> User:
+    # todo_ids=None: 목록을 요청하지 않음(응답에서 필드 생략)
+    return User(id=row.id, name=row.name, password=row.password, version=row.version, todo_id_list=todo_ids)
+
+
+async def _raise_missing(s: AsyncSession, user_id: int, *, conditional: bool) -> None:
+    """조건부 갱신이 0행이면 행 존재 여부로 404(없음)와 412(버전 불일치)를 구분"""
+    if conditional:
+        exists = await s.scalar(select(UserTable.id).where(UserTable.id == user_id))
+        if exists is not None:
+            raise PreconditionFailedError(context={"user_id": user_id})
+    raise UserNotFoundError(context={"user_id": user_id})
 
 
 class UserService:
     def __init__(self):
         pass
 
-    def create_user(self, payload: CreateUserInput, *, db: Session) -> User:
-        # 중복 체크
-        exists = db.execute(select(UserTable.id).where(UserTable.name == payload.name)).first()
-        if exists:
+    async def create_user(self, payload: CreateUserInput, *, db: AsyncSession) -> User:
+        # 중복 체크: 이미 있는 이름이면 bcrypt 작업(해싱 대기열 슬롯)을 쓰기 전에 거절
+        # (동시 가입 경합은 아래 UNIQUE 제약으로 처리. 샤딩 모드는 디렉터리 선점에서 이미 걸러짐)
+        exists = await db.scalar(select(1).where(UserTable.name == payload.name))
+        if exists is not None:
             raise UserAlreadyExistsError(context={"name": payload.name})
 
-        hashed = bcrypt.hashpw(payload.password.encode(), bcrypt.gensalt()).decode()
-        row = UserTable(name=payload.name, password=hashed)
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-        return _to_user_schema(row, db=db)
-
-    def login_user(self, payload: LoginUserInput, *, db: Session) -> User:
-        row = db.execute(select(UserTable).where(UserTable.name == payload.name)).scalar_one_or_none()
-        if not row or not bcrypt.checkpw(payload.password.encode(), row.password.encode()):
+        # bcrypt는 CPU 바운드이므로 전용 실행기에서 수행(writer를 점유하지 않도록 쓰기 작업 밖에서 수행)
+        hashed = await password_hasher.hash(payload.password)
+
+        # 샤딩 모드에서는 디렉터리에서 발급된 전역 user_id를 사용(get_signup_db_session 참고)
+        new_id = {"id": db.info["user_id"]} if "user_id" in db.info else {}
+        stmt = insert(UserTable).values(**new_id, name=payload.name, password=hashed).returning(UserTable)
+
+        async def op(s: AsyncSession) -> User:
+            # INSERT ... RETURNING 한 번으로 생성(검사 이후 같은 이름이 먼저 생성된 경합은 UNIQUE 제약으로 검증)
+            try:
+                row = (await s.execute(stmt)).scalar_one()
+            except IntegrityError as e:
+                if is_unique_violation(e):
+                    raise UserAlreadyExistsError(context={"name": payload.name}) from e
+                raise
+            # 응답 형태는 로그인/조회와 같음(todo id 목록은 include=todo_ids 요청 시에만)
+            return _to_user_schema(row)
+
+        return await run_write(db, op)
+
+    async def login_user(self, payload: LoginUserInput, *, db: AsyncSession, with_todo_ids: bool = False) -> User:
+        user = await _select_user(db, UserTable.name == payload.name, with_todo_ids=with_todo_ids)
+        if not user or not await password_hasher.verify(payload.password, user.password):
             raise LoginFailedError(context={"name": payload.name})
-        return _to_user_schema(row, db=db)
+        return user
 
-    def get_user(self, user_id: int, *, db: Session) -> User:
-        row = db.execute(select(UserTable).where(UserTable.id == user_id)).scalar_one_or_none()
-        if not row:
+    async def get_user(self, user_id: int, *, db: AsyncSession, with_todo_ids: bool = False) -> User:
+        user = await _select_user(db, UserTable.id == user_id, with_todo_ids=with_todo_ids)
+        if not user:
             raise UserNotFoundError(context={"user_id": user_id})
-        return _to_user_schema(row, db=db)
-
-    def update_user(self, user_id: int, payload: UpdateUserInput, *, db: Session) -> User:
-        row = db.execute(select(UserTable).where(UserTable.id == user_id)).scalar_one_or_none()
-        if not row:
-            raise UserNotFoundError(context={"user_id": user_id})
-
+        return user
+
+    async def list_todo_ids(
+        self, user_id: int, *, db: AsyncSession, after: Optional[int] = None, limit: int = 100
+    ) -> tuple[list[int], Optional[int]]:
+        """
+        todo id 목록을 id 순 키셋 페이지로 반환. (ids, 다음 페이지 커서 또는 None)
+        owner_id 인덱스만 읽으므로 페이지 크기에 비례한 비용으로 끝난다.
+        """
+        stmt = select(TodoTable.id).where(TodoTable.owner_id == user_id)
+        if after is not None:
+            stmt = stmt.where(TodoTable.id > after)
+        ids = list((await db.execute(stmt.order_by(TodoTable.id).limit(limit + 1))).scalars())
+        if len(ids) > limit:
+            return ids[:limit], ids[limit - 1]
+        return ids, None
+
+    async def update_user(
+        self,
+        user_id: int,
+        payload: UpdateUserInput,
+        *,
+        db: AsyncSession,
+        expected_versions: Optional[Collection[int]] = None,
+        with_todo_ids: bool = False,
+    ) -> User:
+        """expected_versions가 주어지면(If-Match) 현재 version이 그 중 하나일 때만 갱신."""
         changes = payload.model_dump(exclude_unset=True)
         if "password" in changes and changes["password"]:
-            changes["password"] = bcrypt.hashpw(changes["password"].encode(), bcrypt.gensalt()).decode()
-        for k, v in changes.items():
-            setattr(row, k, v)
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-        return _to_user_schema(row, db=db)
-
-    def delete_user(self, user_id: int, *, db: Session) -> None:
-        row = db.execute(select(UserTable).where(UserTable.id == user_id)).scalar_one_or_none()
-        if not row:
-            raise UserNotFoundError(context={"user_id": user_id})
-        db.delete(row)
-        db.commit()
+            changes["password"] = await password_hasher.hash(changes["password"])
+
+        where = [UserTable.id == user_id]
+        if expected_versions is not None:
+            where.append(UserTable.version.in_(expected_versions))
+        if changes:
+            stmt = (
+                update(UserTable).where(*where)
+                .values(**changes, version=UserTable.version + 1)
+                .returning(UserTable)
+            )
+        else:
+            stmt = select(UserTable).where(*where)
+
+        async def op(s: AsyncSession) -> User:
+            # UPDATE ... RETURNING 한 번으로 갱신 + 결과 조회
+            try:
+                row = (await s.execute(stmt)).scalar_one_or_none()
+            except IntegrityError as e:
+                if is_unique_violation(e):
+                    raise UserAlreadyExistsError(context={"name": changes.get("name")}) from e
+                raise
+            if not row:
+                await _raise_missing(s, user_id, conditional=expected_versions is not None)
+            todo_ids = None
+            if with_todo_ids:
+                todo_ids = json.loads(await s.scalar(
+                    select(_todo_ids_column()).where(UserTable.id == user_id)))
+            return _to_user_schema(row, todo_ids=todo_ids)
+
+        # 샤딩 모드: 이름의 전역 유일성은 디렉터리에서 먼저 확보하고, 샤드 쓰기가 실패하면 되돌림
+        renamed_from = None
+        if user_directory.enabled and changes.get("name"):
+            renamed_from = await user_directory.rename(user_id, changes["name"])
+        try:
+            return await run_write(db, op)
+        except Exception:
+            if renamed_from is not None:
+                await user_directory.rename(user_id, renamed_from)
+            raise
+
+    async def delete_user(
+        self, user_id: int, *, db: AsyncSession, expected_versions: Optional[Collection[int]] = None
+    ) -> None:
+        where = [UserTable.id == user_id]
+        if expected_versions is not None:
+            where.append(UserTable.version.in_(expected_versions))
+        stmt = delete(UserTable).where(*where).returning(UserTable.id)
+
+        async def op(s: AsyncSession) -> None:
+            # 연관 todo는 FK(ON DELETE CASCADE)로 함께 삭제됨
+            if (await s.execute(stmt)).scalar_one_or_none() is None:
+                await _raise_missing(s, user_id, conditional=expected_versions is not None)
+
+        await run_write(db, op)
+        if user_directory.enabled:
+            await user_directory.release(user_id)
+        # 연쇄 삭제된 todo의 캐시도 무효화
+        await todo_cache.invalidate(user_id)
 
 
 # 싱글톤 인스턴스 & DI 팩토리
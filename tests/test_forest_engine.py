@@ -0,0 +1,80 @@
+# tests/test_forest_engine.py
+"""
+FlatForest(ML_ENGINE=flat)가 scikit-learn model.predict / predict_proba와 같은 결과를 내는지 확인.
+benchmarks/forest_engine.py의 정확성 확인과 같은 합성 모델(RandomForest 분류기, ExtraTrees 분류기,
+RandomForest 회귀기)을 작게 학습해 사용한다.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LogisticRegression
+
+from services.forest_engine import FlatForest
+
+
+@pytest.fixture(scope="module")
+def pixel_classifier() -> RandomForestClassifier:
+    """/ml/predict 입력과 같은 형태(784 특성, 0..255 픽셀 값)의 분류기"""
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 256, (500, 784)).astype(np.float32)
+    y = rng.integers(0, 10, 500)
+    return RandomForestClassifier(n_estimators=30, random_state=0).fit(x, y)
+
+
+@pytest.fixture(scope="module")
+def tabular() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(2)
+    x = rng.normal(size=(300, 20)).astype(np.float32)
+    y_class, y_reg = rng.integers(0, 3, 300), x[:, 0] * 2 + rng.normal(size=300)
+    test = rng.normal(size=(500, 20)).astype(np.float32)
+    return x, y_class, y_reg, test
+
+
+def test_random_forest_classifier_matches_sklearn(pixel_classifier):
+    flat = FlatForest.from_estimator(pixel_classifier)
+    x = np.random.default_rng(1).integers(0, 256, (1000, 784)).astype(np.float32)
+    x[0], x[1] = 0.0, 255.0  # 경계 행
+
+    np.testing.assert_array_equal(flat.predict(x), pixel_classifier.predict(x))
+    np.testing.assert_allclose(flat.predict_proba(x), pixel_classifier.predict_proba(x), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("rows", [1, 2, 33])
+def test_small_batches_match_sklearn(pixel_classifier, rows):
+    """/ml/predict 배치 크기(1~수십 행)에서도 결과가 같음(리프 도달 확인 주기와 무관)"""
+    flat = FlatForest.from_estimator(pixel_classifier)
+    x = np.random.default_rng(rows).integers(0, 256, (rows, 784)).astype(np.float32)
+
+    np.testing.assert_array_equal(flat.predict(x), pixel_classifier.predict(x))
+
+
+def test_extra_trees_classifier_matches_sklearn(tabular):
+    x, y_class, _, test = tabular
+    model = ExtraTreesClassifier(n_estimators=20, random_state=0).fit(x, y_class)
+    flat = FlatForest.from_estimator(model)
+
+    np.testing.assert_array_equal(flat.predict(test), model.predict(test))
+    np.testing.assert_allclose(flat.predict_proba(test), model.predict_proba(test), rtol=0, atol=1e-12)
+
+
+def test_random_forest_regressor_matches_sklearn(tabular):
+    x, _, y_reg, test = tabular
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(x, y_reg)
+    flat = FlatForest.from_estimator(model)
+
+    np.testing.assert_allclose(flat.predict(test), model.predict(test), rtol=0, atol=1e-9)
+
+
+def test_string_class_labels_are_preserved(tabular):
+    x, y_class, _, test = tabular
+    labels = np.array(["zero", "one", "two"])[y_class]
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(x, labels)
+
+    np.testing.assert_array_equal(FlatForest.from_estimator(model).predict(test), model.predict(test))
+
+
+def test_unsupported_estimator_raises_type_error(tabular):
+    x, y_class, _, _ = tabular
+    # TypeError면 ml_worker가 scikit-learn 엔진으로 대체
+    with pytest.raises(TypeError):
+        FlatForest.from_estimator(LogisticRegression(max_iter=200).fit(x, y_class))
@@ -0,0 +1,108 @@
+# tests/test_model_loading.py
+"""
+모델 버전 폴더(services/model_manager.install_model + ml_worker.prepare_model) 로딩 확인.
+ML_ENGINE=flat이면 워커가 FlatForest 배열을 mmap으로 열어(워커 간 물리 페이지 공유) scikit-learn과 같은 결과를 내는지,
+폴더 내용이 ModelRef.version과 다르면 로딩하지 않는지, 핫 리로드가 깨진 파일만 건너뛰는지 확인한다.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+from joblib import dump
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from starlette.concurrency import run_in_threadpool
+
+from services import ml_worker
+from services.model_manager import ModelManager, install_model
+
+
+@pytest.fixture(scope="module")
+def classifier() -> RandomForestClassifier:
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 256, (300, 784)).astype(np.float32)
+    return RandomForestClassifier(n_estimators=10, random_state=0).fit(x, rng.integers(0, 10, 300))
+
+
+@pytest.fixture
+def model_file(tmp_path, classifier):
+    path = tmp_path / "model.joblib"
+    dump(classifier, path)
+    return path
+
+
+def test_flat_model_arrays_are_memory_mapped(tmp_path, model_file, classifier):
+    version, directory = install_model(model_file, tmp_path / "cache")
+    assert ml_worker.prepare_model(directory.as_posix(), "flat") == "flat"
+
+    model = ml_worker.load_model(ml_worker.ModelRef(directory.as_posix(), version, "r", "flat"))
+    assert model.shared
+    assert all(isinstance(getattr(model, name), np.memmap) for name in ("feature", "threshold", "children", "value"))
+
+    x = np.random.default_rng(1).integers(0, 256, (50, 784)).astype(np.float32)
+    np.testing.assert_array_equal(model.predict(x), classifier.predict(x))
+
+
+def test_same_content_reuses_version_folder(tmp_path, model_file):
+    first = install_model(model_file, tmp_path / "cache")
+    assert install_model(model_file, tmp_path / "cache") == first
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == [first[0]]  # 복사 중 임시 폴더가 남지 않음
+
+
+def test_version_mismatch_is_rejected(tmp_path, model_file):
+    _, directory = install_model(model_file, tmp_path / "cache")
+    with pytest.raises(RuntimeError):
+        ml_worker.load_model(ml_worker.ModelRef(directory.as_posix(), "0" * 32, "r", "sklearn"))
+
+
+def test_unsupported_model_falls_back_to_sklearn(tmp_path):
+    rng = np.random.default_rng(2)
+    path = tmp_path / "linear.joblib"
+    dump(LogisticRegression(max_iter=200).fit(rng.normal(size=(50, 4)), rng.integers(0, 2, 50)), path)
+    _, directory = install_model(path, tmp_path / "cache")
+
+    assert ml_worker.prepare_model(directory.as_posix(), "flat") == "sklearn"
+    assert not (directory / ml_worker.FLAT_DIR).exists()
+
+
+def test_corrupt_model_file_raises_model_load_error(tmp_path):
+    path = tmp_path / "broken.joblib"
+    path.write_bytes(b"not a joblib file")
+    version, directory = install_model(path, tmp_path / "cache")
+
+    with pytest.raises(ml_worker.ModelLoadError):
+        ml_worker.prepare_model(directory.as_posix(), "flat")
+    with pytest.raises(ml_worker.ModelLoadError):
+        ml_worker.load_model(ml_worker.ModelRef(directory.as_posix(), version, "r", "sklearn"))
+
+
+def test_reload_retries_only_when_the_file_is_not_at_fault(tmp_path, model_file):
+    async def scenario():
+        manager = ModelManager(model_file, cache_dir=tmp_path / "cache", warmup_rounds=0)
+        await manager.ensure_loaded()
+
+        # 파일과 무관한 실패(풀 교체 등): 같은 파일을 다음 확인 때 다시 로딩
+        model_file.write_bytes(model_file.read_bytes() + b"\0")
+        manager.run = _failing_run
+        assert not await manager.reload_if_changed()
+        manager.run = run_in_threadpool
+        assert await manager.reload_if_changed()
+
+        # 깨진 파일: 한 번만 시도하고 파일이 다시 바뀔 때까지 건너뜀
+        model_file.write_bytes(b"not a joblib file")
+        assert not await manager.reload_if_changed()
+        calls = []
+
+        async def counting_run(fn, *args):
+            calls.append(fn)
+            return await run_in_threadpool(fn, *args)
+
+        manager.run = counting_run
+        assert not await manager.reload_if_changed()
+        assert calls == []
+
+    asyncio.run(scenario())
+
+
+async def _failing_run(fn, *args):
+    raise RuntimeError("worker pool broken")
@@ -0,0 +1,37 @@
+# tests/test_preprocess.py
+"""
+/ml/predict 입력 행(ml_worker.preprocess, decode_images)이 기존 전처리(convert("L") → resize BILINEAR)와
+같은 값인지 확인. 예측 캐시 키(내용 해시, 모델 버전)에 전처리 방식이 없으므로 값이 바뀌면 캐시와 새 예측이 달라진다.
+"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services import ml_worker
+
+
+def _reference(data: bytes) -> np.ndarray:
+    with Image.open(io.BytesIO(data)) as im:
+        return np.asarray(im.convert("L").resize((28, 28), Image.BILINEAR), dtype=np.float32).reshape(28 * 28)
+
+
+@pytest.mark.parametrize("fmt, size", [("JPEG", (1200, 900)), ("PNG", (640, 480)), ("JPEG", (28, 28))])
+def test_single_and_batch_rows_match_reference(tmp_path, fmt, size):
+    rng = np.random.default_rng(0)
+    im = Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8))
+    buf = io.BytesIO()
+    im.save(buf, format=fmt)
+    data = buf.getvalue()
+    path = tmp_path / f"upload.{fmt.lower()}"
+    path.write_bytes(data)
+    expected = _reference(data)
+
+    row, _ = ml_worker.preprocess(path.as_posix())
+    np.testing.assert_array_equal(row, expected)
+
+    [(_, error, batch_row)] = ml_worker.decode_images(
+        [(path.as_posix(), None)], frozenset({"image/png", "image/jpeg"}), len(data))
+    assert error is None
+    np.testing.assert_array_equal(batch_row, expected)
@@ -2,6 +2,6 @@ from schemas.user import User, UserOut
 
 
 def remove_password(user: User) -> UserOut:
-    data = user.model_dump()
-    data.pop("password", None)
-    return UserOut.model_validate(data)
+    # User는 이미 검증된 값이므로 model_dump/model_validate 왕복 없이 필드만 옮김
+    return UserOut.model_construct(
+        id=user.id, name=user.name, version=user.version, todo_id_list=user.todo_id_list)
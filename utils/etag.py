@@ -0,0 +1,92 @@
+# utils/etag.py
+"""
+행 버전(version) 기반 ETag 생성/파싱 및 조건부 요청(If-None-Match / If-Match) 처리 헬퍼.
+
+- 개별 리소스: "todo-{id}-v{version}", "user-{id}-v{version}" (strong ETag)
+- todo 목록: "todos-{owner_id}-r{todos_version}" (소유자의 todo가 바뀔 때마다 트리거로 증가)
+- 저장 이미지: "img-{내용 해시}", 썸네일 "img-{내용 해시}-s{size}" (내용 주소 저장이라 내용이 같으면 ETag도 같음)
+"""
+from __future__ import annotations
+
+import re
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+_ETAG_RE = re.compile(r'(W/)?"([^"]*)"')
+
+
+def todo_etag(todo_id: int, version: int) -> str:
+    return f'"todo-{todo_id}-v{version}"'
+
+
+def user_etag(user_id: int, version: int) -> str:
+    return f'"user-{user_id}-v{version}"'
+
+
+def todo_list_etag(owner_id: int, todos_version: int) -> str:
+    return f'"todos-{owner_id}-r{todos_version}"'
+
+
+def image_etag(key: str, size: Optional[int] = None) -> str:
+    return f'"img-{key}"' if size is None else f'"img-{key}-s{size}"'
+
+
+def _parse(header: str, *, strong_only: bool = False) -> list[str]:
+    """헤더 값의 ETag 목록(따옴표 포함, W/ 제거). '*' 는 그대로 반환."""
+    if header.strip() == "*":
+        return ["*"]
+    return [f'"{tag}"' for weak, tag in _ETAG_RE.findall(header) if not (strong_only and weak)]
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """If-None-Match가 현재 ETag와 일치하는지(= 304 응답 가능) 여부. 약한 비교를 사용."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = _parse(header)
+    return "*" in tags or etag in tags
+
+
+def not_modified_since(request: Request, last_modified: float) -> bool:
+    """
+    If-Modified-Since 이후 변경이 없는지(= 304 응답 가능) 여부.
+    If-None-Match가 있으면 그쪽이 우선이므로 무시(RFC 9110 13.1.3).
+    """
+    if request.headers.get("if-none-match"):
+        return False
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(last_modified) <= since
+
+
+def not_modified(etag: str, headers: Optional[dict[str, str]] = None) -> Response:
+    """본문 없이 304 응답(ETag와 캐시 관련 헤더는 유지)"""
+    return Response(status_code=HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **(headers or {})})
+
+
+def if_match_versions(request: Request, prefix: str) -> Optional[set[int]]:
+    """
+    If-Match 헤더에서 해당 리소스(prefix 예: "todo-3")의 기대 버전 목록을 추출.
+    헤더가 없거나 '*' 이면 None(조건 없음).
+    다른 리소스의 ETag만 있으면 빈 집합을 반환하며, 이 경우 갱신은 항상 412로 실패.
+    """
+    header = request.headers.get("if-match")
+    if not header:
+        return None
+    tags = _parse(header, strong_only=True)  # If-Match는 강한 비교(RFC 9110)
+    if "*" in tags:
+        return None
+    versions: set[int] = set()
+    for tag in tags:
+        head, sep, version = tag.strip('"').rpartition("-v")
+        if sep and head == prefix and version.isdigit():
+            versions.add(int(version))
+    return versions
@@ -0,0 +1,136 @@
+# utils/metrics.py
+"""
+프로세스 내 간단한 메트릭 레지스트리(Counter / Gauge / Histogram).
+GET /metrics 에서 JSON 스냅샷으로 노출한다. 외부 의존성 없이 동작하도록 최소 기능만 구현.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Callable, Optional, Sequence
+
+# 지연 시간(초) 측정용 기본 버킷
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Counter:
+    def __init__(self, name: str, description: str = "") -> None:
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {"type": "counter", "value": self._value}
+
+
+class Gauge:
+    def __init__(self, name: str, description: str = "", *, getter: Optional[Callable[[], float]] = None) -> None:
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._getter = getter  # 값을 조회 시점에 계산하는 경우
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._getter() if self._getter is not None else self._value
+
+    def snapshot(self) -> dict:
+        return {"type": "gauge", "value": self.value}
+
+
+class Histogram:
+    def __init__(self, name: str, description: str = "", *, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._count += 1
+            self._sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """버킷 경계 기준 근사 분위수(해당 분위가 속한 버킷의 상한)."""
+        if self._count == 0:
+            return None
+        rank = q * self._count
+        seen = 0
+        for idx, n in enumerate(self._counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, n in zip(list(self.buckets) + ["+Inf"], self._counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        return {
+            "type": "histogram",
+            "count": self._count,
+            "sum": self._sum,
+            "buckets": buckets,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = factory()
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, description))
+
+    def gauge(self, name: str, description: str = "", *, getter: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._get_or_create(name, lambda: Gauge(name, description, getter=getter))
+
+    def histogram(self, name: str, description: str = "", *, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, description, buckets=buckets))
+
+    def snapshot(self) -> dict[str, dict]:
+        return {name: metric.snapshot() for name, metric in sorted(self._metrics.items())}
+
+
+# 싱글톤 레지스트리
+metrics = MetricsRegistry()
@@ -0,0 +1,55 @@
+# utils/timing.py
+"""
+요청 단위 단계별 시간 측정. 단계마다 히스토그램({prefix}_{stage}_seconds)에 기록하고
+응답의 Server-Timing 헤더(브라우저 개발자 도구/클라이언트에서 확인)로도 내보낸다.
+
+    timer = StageTimer("ml_predict")
+    with timer.span("read"):
+        ...
+    timer.add("decode", seconds)  # 다른 프로세스에서 측정한 시간
+    response.headers["Server-Timing"] = timer.finish()
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from utils.metrics import metrics
+
+# 단계별 시간(초) 버킷: 기본 지연 버킷보다 작은 값(수십 µs 단위 전처리 단계)까지 구분
+STAGE_BUCKETS: tuple[float, ...] = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+class StageTimer:
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}  # 단계 → 누적 시간(초), 기록 순서 유지
+        self._finished = False
+
+    def add(self, stage: str, seconds: float) -> None:
+        """단계 시간을 누적(청크 반복처럼 같은 단계를 여러 번 기록하면 합산)"""
+        self.stages[stage] = self.stages.get(stage, 0.0) + max(0.0, seconds)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def finish(self) -> str:
+        """단계별 누적 시간과 전체 시간을 히스토그램에 한 번 기록하고 Server-Timing 헤더 값(ms)을 반환"""
+        total = time.perf_counter() - self.started
+        if not self._finished:
+            self._finished = True
+            for stage, seconds in [*self.stages.items(), ("total", total)]:
+                metrics.histogram(
+                    f"{self.prefix}_{stage}_seconds", f"{self.prefix} {stage} 단계 시간(초)", buckets=STAGE_BUCKETS,
+                ).observe(seconds)
+        parts = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items()]
+        return ", ".join([*parts, f"total;dur={total * 1000:.3f}"])
@@ -0,0 +1,91 @@
+# utils/upload.py
+"""
+업로드 요청 보호용 유틸리티.
+
+- BodyLimitRoute: 라우터의 route_class로 지정하면 요청 본문을 받는 도중 누적 크기가 한도를 넘는 즉시 413으로 중단
+  (Content-Length가 한도를 넘으면 본문을 읽기 전에 거절). multipart 파싱이 끝까지 진행되지 않으므로
+  거대한 업로드가 임시 파일/메모리를 채우지 않는다.
+- sniff_image_type: 첫 청크의 파일 시그니처(magic bytes)로 이미지 형식 판별
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException
+
+from error.exceptions import PayloadTooLargeError
+
+# (시그니처, MIME) — WEBP는 RIFF 컨테이너라 별도 처리
+_IMAGE_SIGNATURES: tuple[tuple[bytes, str], ...] = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+)
+
+# MIME → 저장 파일 확장자
+IMAGE_EXTENSIONS: dict[str, str] = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/bmp": ".bmp",
+    "image/webp": ".webp",
+}
+
+# 판별에 필요한 최소 바이트 수
+SNIFF_BYTES = 12
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """파일 앞부분으로 이미지 MIME 타입을 판별(알 수 없으면 None)"""
+    for signature, mime in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def body_limit_route(max_body_bytes: int, *, reported_max_bytes: Optional[int] = None) -> type[APIRoute]:
+    """
+    요청 본문 크기를 max_body_bytes로 제한하는 APIRoute 클래스를 만든다.
+    reported_max_bytes: 413 응답 context.max_bytes로 알려 줄 한도(기본: max_body_bytes). multipart 여유분을 더해
+    본문을 제한하더라도 클라이언트에는 설정된 파일 크기 한도를 알려 주기 위함
+    """
+    reported = max_body_bytes if reported_max_bytes is None else reported_max_bytes
+
+    class BodyLimitRoute(APIRoute):
+        def get_route_handler(self) -> Callable[[Request], Response]:
+            handler = super().get_route_handler()
+
+            async def limited_handler(request: Request) -> Response:
+                length = request.headers.get("content-length")
+                if length is not None and length.isdigit() and int(length) > max_body_bytes:
+                    raise PayloadTooLargeError(context={"max_bytes": reported})
+
+                received = 0
+                receive = request.receive
+
+                async def limited_receive():
+                    nonlocal received
+                    message = await receive()
+                    if message["type"] == "http.request":
+                        received += len(message.get("body", b""))
+                        if received > max_body_bytes:
+                            raise PayloadTooLargeError(context={"max_bytes": reported})
+                    return message
+
+                try:
+                    return await handler(Request(request.scope, limited_receive))
+                except HTTPException as e:
+                    # FastAPI는 본문 파싱 중 발생한 예외를 400으로 감싸므로 원래 예외(413)로 되돌림
+                    if isinstance(e.__cause__, PayloadTooLargeError):
+                        raise e.__cause__ from None
+                    raise
+
+            return limited_handler
+
+    return BodyLimitRoute